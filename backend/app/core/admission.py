@@ -0,0 +1,175 @@
+"""Admission control for the routes that call Gemini and hold DB connections.
+
+Requests beyond the global concurrency limit wait in a bounded priority
+queue (smaller documents first) for at most ADMISSION_QUEUE_TIMEOUT_SECONDS.
+A user over their own limit gets a 429 and a full queue or an expired wait
+gets a 503, both with Retry-After, so a spike is shed quickly instead of
+every request timing out against an exhausted quota.
+"""
+
+import asyncio
+import heapq
+import itertools
+import math
+import time
+from contextlib import asynccontextmanager
+
+from fastapi import Depends, HTTPException, Request, status
+
+from app.core.config import settings
+from app.core.metrics import (
+    ADMISSION_IN_FLIGHT,
+    ADMISSION_QUEUED,
+    ADMISSION_REJECTED,
+    ADMISSION_WAIT_SECONDS,
+)
+from app.core.security import get_current_user
+from app.models.user import User
+
+
+class AdmissionController:
+    def __init__(
+        self,
+        max_concurrent: int,
+        max_per_user: int,
+        max_queue: int,
+        queue_timeout: float,
+        retry_after: int,
+    ):
+        self.max_concurrent = max_concurrent
+        self.max_per_user = max_per_user
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.retry_after = retry_after
+        self.in_flight = 0
+        self._per_user = {}
+        self._waiters = []  # heap of (priority, sequence, future)
+        self._sequence = itertools.count()
+        self._publish()
+
+    @property
+    def queued(self) -> int:
+        return sum(1 for *_, waiter in self._waiters if not waiter.done())
+
+    def _publish(self):
+        ADMISSION_IN_FLIGHT.set(self.in_flight)
+        ADMISSION_QUEUED.set(self.queued)
+
+    def _reject(self, status_code: int, reason: str, detail: str):
+        ADMISSION_REJECTED.inc(reason=reason)
+        # Back clients off further the deeper the backlog is
+        backlog = self.queued / max(1, self.max_concurrent)
+        retry_after = math.ceil(self.retry_after * (1 + backlog))
+        raise HTTPException(
+            status_code=status_code,
+            detail=detail,
+            headers={"Retry-After": str(retry_after)},
+        )
+
+    def _forget_user(self, user_id: int):
+        self._per_user[user_id] -= 1
+        if not self._per_user[user_id]:
+            del self._per_user[user_id]
+
+    def _check_user(self, user_id: int):
+        if self._per_user.get(user_id, 0) >= self.max_per_user:
+            self._reject(
+                status.HTTP_429_TOO_MANY_REQUESTS,
+                "user_limit",
+                "Too many reports are already being processed for this account",
+            )
+
+    def check(self, user_id: int):
+        """Raise now what `acquire` would refuse without waiting, taking no slot"""
+        self._check_user(user_id)
+        if self.in_flight >= self.max_concurrent and self.queued >= self.max_queue:
+            self._reject(
+                status.HTTP_503_SERVICE_UNAVAILABLE,
+                "queue_full",
+                "Server is busy, please retry shortly",
+            )
+
+    async def acquire(self, user_id: int, priority: float = 0):
+        """Wait for a slot; lower priority values are admitted first"""
+        self._check_user(user_id)
+
+        if self.in_flight < self.max_concurrent and not self.queued:
+            self._per_user[user_id] = self._per_user.get(user_id, 0) + 1
+            self.in_flight += 1
+            self._publish()
+            return
+
+        if self.queued >= self.max_queue:
+            self._reject(
+                status.HTTP_503_SERVICE_UNAVAILABLE,
+                "queue_full",
+                "Server is busy, please retry shortly",
+            )
+
+        self._per_user[user_id] = self._per_user.get(user_id, 0) + 1
+        waiter = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._sequence), waiter))
+        self._publish()
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(waiter, self.queue_timeout)
+        except asyncio.TimeoutError:
+            self._forget_user(user_id)
+            self._publish()
+            self._reject(
+                status.HTTP_503_SERVICE_UNAVAILABLE,
+                "queue_timeout",
+                "Server is busy, please retry shortly",
+            )
+        except asyncio.CancelledError:
+            # A slot handed over just before cancellation must be passed on
+            if waiter.done() and not waiter.cancelled():
+                self.release(user_id)
+            else:
+                self._forget_user(user_id)
+                self._publish()
+            raise
+        finally:
+            ADMISSION_WAIT_SECONDS.observe(time.perf_counter() - start)
+
+    def release(self, user_id: int):
+        """Free a slot, handing it straight to the best queued waiter"""
+        self._forget_user(user_id)
+        self.in_flight -= 1
+        while self._waiters:
+            *_, waiter = heapq.heappop(self._waiters)
+            if not waiter.done():
+                self.in_flight += 1
+                waiter.set_result(None)
+                break
+        self._publish()
+
+    @asynccontextmanager
+    async def slot(self, user_id: int, priority: float = 0):
+        await self.acquire(user_id, priority)
+        try:
+            yield
+        finally:
+            self.release(user_id)
+
+
+admission = AdmissionController(
+    max_concurrent=settings.ADMISSION_MAX_CONCURRENT,
+    max_per_user=settings.ADMISSION_MAX_PER_USER,
+    max_queue=settings.ADMISSION_MAX_QUEUE,
+    queue_timeout=settings.ADMISSION_QUEUE_TIMEOUT_SECONDS,
+    retry_after=settings.ADMISSION_RETRY_AFTER_SECONDS,
+)
+
+
+async def admit_expensive_request(
+    request: Request, current_user: User = Depends(get_current_user)
+):
+    """Dependency holding an admission slot for the duration of the request.
+
+    Priority is the declared request size, so small uploads and body-less
+    diet-plan requests overtake large documents in the queue.
+    """
+    size = int(request.headers.get("content-length") or 0)
+    async with admission.slot(current_user.id, priority=size):
+        yield
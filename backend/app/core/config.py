@@ -10,6 +10,78 @@ class Settings(BaseSettings):
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7  # New setting
+    BATCH_UPLOAD_MAX_FILES: int = 50
+    BATCH_EXTRACT_CONCURRENCY: int = 4  # Parallel PDF text extractions
+    BATCH_LLM_CONCURRENCY: int = 8  # Parallel Gemini calls per batch
+    PROMPT_TOKEN_BUDGET: int = 24000  # Longer reports use chunked analysis
+    REPORT_TOKEN_LIMIT: int = 200000  # Reports are trimmed beyond this
+    ANALYSIS_CHUNK_TOKENS: int = 6000
+    ANALYSIS_CHUNK_CONCURRENCY: int = 4
+    LLM_PROVIDER: str = "gemini"  # "fake" for offline benchmarking
+    TTS_PROVIDER: str = "elevenlabs"  # "fake" for offline benchmarking
+    FAKE_LLM_LATENCY_MS: float = 800.0
+    FAKE_TTS_LATENCY_MS: float = 1500.0
+    FAKE_LATENCY_JITTER: float = 0.2
+    FAKE_LLM_PAYLOADS: dict = {}  # Overrides by kind: validation, analysis, diet
+    ADMISSION_MAX_CONCURRENT: int = 16  # Uploads/diet plans running at once
+    ADMISSION_MAX_PER_USER: int = 3
+    ADMISSION_MAX_QUEUE: int = 64
+    ADMISSION_QUEUE_TIMEOUT_SECONDS: float = 20.0
+    ADMISSION_RETRY_AFTER_SECONDS: int = 5
+    CIRCUIT_FAILURE_THRESHOLD: int = 5  # Consecutive failures before opening
+    CIRCUIT_RESET_SECONDS: float = 30.0  # Open time before a half-open probe
+    PROVIDER_TIMEOUT_SECONDS: float = 60.0
+    HEDGE_REQUESTS: bool = True  # Re-send calls still running past their p95
+    HEDGE_MIN_SAMPLES: int = 20  # Per provider and kind of call
+    PROVIDER_WORKERS: dict = {"gemini": 32, "elevenlabs": 16}  # Threads per provider
+    FAKE_LLM_FAILURE_RATE: float = 0.0
+    FAKE_TTS_FAILURE_RATE: float = 0.0
+    JSON_COMPRESSION: str = "auto"  # "zlib", "zstd" or "auto" (zstd if installed)
+    JSON_COMPRESSION_MIN_BYTES: int = 256
+    DIET_PRECOMPUTE_ENABLED: bool = True  # Generate diet plans right after upload
+    DIET_PRECOMPUTE_QUEUE_SIZE: int = 100
+    DIET_PRECOMPUTE_IDLE_POLL_SECONDS: float = 0.5
+    POPULATION_TABLES_DIR: str = ""  # Defaults to the bundled app/data tables
+    EXPORT_BATCH_SIZE: int = 200  # Rows fetched per cursor batch by /reports/export
+    ADMIN_EMAILS: list = []  # Users allowed to read /admin/stats
+    # Model tiers tried in order; the first whose max_* limits all hold wins
+    # and the last one takes everything else. Costs are USD per 1M tokens.
+    MODEL_ROUTING_POLICY: list = [
+        {
+            "tier": "fast",
+            "model": "gemini-1.5-flash-8b",
+            "max_tokens": 4000,
+            "max_pages": 2,
+            "max_tables": 2,
+            "max_analytes": 20,
+            "input_cost_per_mtok": 0.0375,
+            "output_cost_per_mtok": 0.15,
+        },
+        {
+            "tier": "standard",
+            "model": "gemini-1.5-flash",
+            "max_tokens": 24000,
+            "max_pages": 30,
+            "max_tables": 15,
+            "max_analytes": 80,
+            "input_cost_per_mtok": 0.075,
+            "output_cost_per_mtok": 0.30,
+        },
+        {
+            "tier": "long_context",
+            "model": "gemini-1.5-pro",
+            "input_cost_per_mtok": 1.25,
+            "output_cost_per_mtok": 5.00,
+        },
+    ]
+    MODEL_ROUTING_PINNED: dict = {"validate": "fast"}  # Call kind -> tier
+    DELTA_REANALYSIS_MAX_CHANGE: float = 0.25  # Share of changed lines on re-upload
+    UPLOAD_MAX_BYTES: int = 20 * 1024 * 1024  # Per file; Content-Length checked first
+    UPLOAD_MAX_PAGES: int = 100
+    UPLOAD_VALIDATION_PAGES: int = 3  # Pages extracted before validation passes
+    TTS_SEGMENT_MAX_CHARS: int = 600  # Longer summary sections split at sentences
+    TTS_SEGMENT_CONCURRENCY: int = 4  # Segments synthesized at once per summary
+    TTS_SEGMENT_CACHE_BYTES: int = 64 * 1024 * 1024
 
 
 settings=Settings()
@@ -7,14 +7,17 @@ ssl_context = ssl.create_default_context()
 ssl_context.check_hostname = False
 ssl_context.verify_mode = ssl.CERT_NONE
 
-engine = create_async_engine(
-    settings.DATABASE_URL, 
-    connect_args={
+if settings.DATABASE_URL.startswith("sqlite"):
+    # Local benchmarking profile, e.g. DATABASE_URL=sqlite+aiosqlite:///./bench.db
+    connect_args = {}
+else:
+    connect_args = {
         "ssl": ssl_context,
         "statement_cache_size": 0, # Add this to fix the pgbouncer issue
         "prepared_statement_cache_size": 0
     }
-)
+
+engine = create_async_engine(settings.DATABASE_URL, connect_args=connect_args)
 AsyncSessionLocal = sessionmaker(
     bind=engine, class_=AsyncSession, expire_on_commit=False
 )
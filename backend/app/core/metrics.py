@@ -0,0 +1,224 @@
+"""In-process metrics rendered in the Prometheus text exposition format.
+
+Kept dependency-free on purpose: a handful of counters, gauges and
+histograms guarded by a lock, since pipeline stages run both on the event
+loop and in the threadpool.
+"""
+
+import asyncio
+import functools
+import threading
+import time
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+def _format_labels(labelnames: tuple, values: tuple, extra: str = "") -> str:
+    pairs = [
+        f'{name}="{str(value)}"'.replace("\n", " ")
+        for name, value in zip(labelnames, values)
+    ]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(labels.get(name, "") for name in self.labelnames)
+
+    def samples(self) -> list:
+        with self._lock:
+            return [
+                f"{self.name}{_format_labels(self.labelnames, key)} {value}"
+                for key, value in sorted(self._values.items())
+            ]
+
+    def render(self) -> str:
+        header = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+        return "\n".join(header + self.samples())
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames=(), buckets=None):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets or DEFAULT_BUCKETS)
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.setdefault(key, [[0] * len(self.buckets), 0.0, 0])
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[0][i] += 1
+            state[1] += value
+            state[2] += 1
+
+    def samples(self) -> list:
+        lines = []
+        with self._lock:
+            for key, (counts, total, observed) in sorted(self._values.items()):
+                for bound, count in zip(self.buckets, counts):
+                    labels = _format_labels(self.labelnames, key, f'le="{bound}"')
+                    lines.append(f"{self.name}_bucket{labels} {count}")
+                labels = _format_labels(self.labelnames, key, 'le="+Inf"')
+                lines.append(f"{self.name}_bucket{labels} {observed}")
+                labels = _format_labels(self.labelnames, key)
+                lines.append(f"{self.name}_sum{labels} {total}")
+                lines.append(f"{self.name}_count{labels} {observed}")
+        return lines
+
+
+REGISTRY = []
+
+STAGE_SECONDS = Histogram(
+    "lablens_stage_duration_seconds",
+    "Time spent in each report pipeline stage",
+    ["stage"],
+)
+STAGE_ERRORS = Counter(
+    "lablens_stage_errors_total", "Pipeline stages that raised", ["stage"]
+)
+REQUEST_SECONDS = Histogram(
+    "lablens_http_request_duration_seconds",
+    "HTTP request latency by route",
+    ["method", "route", "status"],
+)
+LLM_CALLS = Counter(
+    "lablens_llm_calls_total", "LLM calls by purpose and outcome", ["kind", "outcome"]
+)
+LLM_CALL_SECONDS = Histogram(
+    "lablens_llm_call_duration_seconds", "LLM call latency by purpose", ["kind"]
+)
+MODEL_ROUTE_CALLS = Counter(
+    "lablens_model_route_calls_total",
+    "Routed LLM calls by purpose, tier, model and outcome",
+    ["kind", "tier", "model", "outcome"],
+)
+MODEL_ROUTE_SECONDS = Histogram(
+    "lablens_model_route_duration_seconds",
+    "Routed LLM call latency by purpose and tier",
+    ["kind", "tier"],
+)
+MODEL_ROUTE_TOKENS = Counter(
+    "lablens_model_route_tokens_total",
+    "LLM tokens by tier and direction (input/output)",
+    ["tier", "direction"],
+)
+MODEL_ROUTE_COST = Counter(
+    "lablens_model_route_cost_usd_total",
+    "Estimated LLM spend in USD by purpose and tier",
+    ["kind", "tier"],
+)
+DELTA_REANALYSIS = Counter(
+    "lablens_delta_reanalysis_total",
+    "Re-uploads by how they were analyzed (delta, unchanged, removed, full)",
+    ["outcome"],
+)
+CACHE_HITS = Counter("lablens_cache_hits_total", "Cache hits", ["cache"])
+CACHE_MISSES = Counter("lablens_cache_misses_total", "Cache misses", ["cache"])
+CIRCUIT_STATE = Gauge(
+    "lablens_circuit_state",
+    "Provider circuit breaker state (0 closed, 1 half-open, 2 open)",
+    ["provider"],
+)
+HEDGED_CALLS = Counter(
+    "lablens_hedged_calls_total",
+    "Provider calls that were hedged, by which request answered first",
+    ["provider", "winner"],
+)
+DIET_PRECOMPUTE = Counter(
+    "lablens_diet_precompute_total",
+    "Speculative diet-plan jobs by outcome",
+    ["outcome"],
+)
+ADMISSION_IN_FLIGHT = Gauge(
+    "lablens_admission_in_flight", "Admitted expensive requests running now"
+)
+ADMISSION_QUEUED = Gauge(
+    "lablens_admission_queued", "Expensive requests waiting for admission"
+)
+ADMISSION_WAIT_SECONDS = Histogram(
+    "lablens_admission_wait_seconds", "Time spent queued before admission"
+)
+ADMISSION_REJECTED = Counter(
+    "lablens_admission_rejected_total",
+    "Expensive requests turned away by admission control",
+    ["reason"],
+)
+
+
+class timed:
+    """Record the duration of a pipeline stage.
+
+    Usable as a context manager (``with timed("extract"):``) or as a
+    decorator on sync and async functions.
+    """
+
+    def __init__(self, stage: str):
+        self.stage = stage
+        self._start = None
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        STAGE_SECONDS.observe(time.perf_counter() - self._start, stage=self.stage)
+        if exc_type is not None:
+            STAGE_ERRORS.inc(stage=self.stage)
+        return False
+
+    def __call__(self, func):
+        if asyncio.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with timed(self.stage):
+                    return await func(*args, **kwargs)
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with timed(self.stage):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+
+def render_metrics() -> str:
+    """Render every registered metric in Prometheus text format"""
+    return "\n".join(metric.render() for metric in REGISTRY) + "\n"
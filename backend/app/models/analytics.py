@@ -0,0 +1,33 @@
+from sqlalchemy import Boolean, Column, Date, ForeignKey, Integer, String, Text
+from app.core.database import Base
+
+
+class ReportContribution(Base):
+    """What one report currently adds to the rollups, so overwrites can subtract it"""
+
+    __tablename__ = "report_contributions"
+    report_id = Column(Integer, ForeignKey("lab_reports.id"), primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    week = Column(Date, nullable=False)  # Monday of the upload week
+    analytes = Column(Text, nullable=False)  # JSON list of abnormal analytes
+    has_red_flags = Column(Boolean, nullable=False)
+
+
+class AnalyteRollup(Base):
+    __tablename__ = "analyte_rollups"
+    analyte = Column(String, primary_key=True)
+    abnormal_count = Column(Integer, nullable=False, default=0)
+
+
+class WeeklyRollup(Base):
+    __tablename__ = "weekly_rollups"
+    week = Column(Date, primary_key=True)
+    reports = Column(Integer, nullable=False, default=0)
+    red_flag_reports = Column(Integer, nullable=False, default=0)
+
+
+class UserRollup(Base):
+    __tablename__ = "user_rollups"
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    uploads = Column(Integer, nullable=False, default=0)  # Including overwrites
+    reports = Column(Integer, nullable=False, default=0)
@@ -1,6 +1,7 @@
-from sqlalchemy import Column, Integer, ForeignKey, Text
+from sqlalchemy import Column, Integer, ForeignKey
 from sqlalchemy.orm import relationship
 from app.core.database import Base
+from app.models.types import CompressedJSON
 
 
 class DietPlan(Base):
@@ -9,7 +10,7 @@ class DietPlan(Base):
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     report_id = Column(Integer, ForeignKey("lab_reports.id"), nullable=False)
-    diet_data = Column(Text, nullable=False)  # JSON data for the diet plan
+    diet_data = Column(CompressedJSON, nullable=False)  # JSON data for the diet plan
 
     user = relationship("User", back_populates="diet_plans")
     report = relationship("LabReport", back_populates="diet_plan")
@@ -1,6 +1,7 @@
 from sqlalchemy import Column, Integer, String, ForeignKey
 from sqlalchemy.orm import relationship
 from app.core.database import Base
+from app.models.types import CompressedJSON
 
 
 class LabReport(Base):
@@ -8,7 +9,7 @@ class LabReport(Base):
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
     filename = Column(String)
-    processed_data = Column(String)
-    visualization_data = Column(String)
+    processed_data = Column(CompressedJSON)
+    visualization_data = Column(CompressedJSON)
     user = relationship("User")
     diet_plan = relationship("DietPlan", back_populates="report")
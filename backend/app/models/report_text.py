@@ -0,0 +1,11 @@
+from sqlalchemy import Column, ForeignKey, Integer
+from app.core.database import Base
+from app.models.types import CompressedJSON
+
+
+class ReportText(Base):
+    """Compacted text a report was analyzed from, diffed on re-upload"""
+
+    __tablename__ = "report_texts"
+    report_id = Column(Integer, ForeignKey("lab_reports.id"), primary_key=True)
+    normalized_text = Column(CompressedJSON, nullable=False)  # Plain text, compressed
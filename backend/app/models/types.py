@@ -0,0 +1,79 @@
+"""Column types shared by the models."""
+
+import base64
+import json
+import zlib
+
+from sqlalchemy.types import Text, TypeDecorator
+
+from app.core.config import settings
+
+try:
+    import zstandard
+except ImportError:  # zstd is optional; zlib is always available
+    zstandard = None
+
+# Compressed values are stored as "<HEADER><codec>:<base64 payload>". Rows
+# written before compression was introduced hold plain JSON and never start
+# with the header, so they are returned unchanged.
+HEADER = "lzj1:"
+
+
+def _codec() -> str:
+    if settings.JSON_COMPRESSION == "auto":
+        return "zstd" if zstandard else "zlib"
+    return settings.JSON_COMPRESSION
+
+
+def compress_json(value: str) -> str:
+    """Compress JSON text, leaving small values as they are"""
+    raw = value.encode("utf-8")
+    if len(raw) < settings.JSON_COMPRESSION_MIN_BYTES:
+        return value
+
+    codec = _codec()
+    if codec == "zstd":
+        packed = zstandard.ZstdCompressor(level=6).compress(raw)
+    else:
+        packed = zlib.compress(raw, 6)
+    return f"{HEADER}{codec}:{base64.b64encode(packed).decode('ascii')}"
+
+
+def decompress_json(value: str) -> str:
+    """Return the JSON text of a stored value, compressed or not"""
+    if not value.startswith(HEADER):
+        return value
+
+    codec, _, payload = value[len(HEADER) :].partition(":")
+    packed = base64.b64decode(payload)
+    if codec == "zlib":
+        return zlib.decompress(packed).decode("utf-8")
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("zstandard is required to read zstd-compressed rows")
+        return zstandard.ZstdDecompressor().decompress(packed).decode("utf-8")
+    raise ValueError(f"Unknown JSON compression codec: {codec}")
+
+
+class CompressedJSON(TypeDecorator):
+    """Text column holding compressed JSON.
+
+    Reads and writes JSON strings like a plain text column (dicts and lists
+    are serialised on write), so existing ``json.loads`` call sites keep
+    working while the stored bytes shrink.
+    """
+
+    impl = Text
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        if not isinstance(value, str):
+            value = json.dumps(value)
+        return compress_json(value)
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return decompress_json(value)
@@ -0,0 +1,20 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import get_db
+from app.core.security import get_current_admin
+from app.models.user import User
+from app.services.analytics import read_stats
+
+router = APIRouter()
+
+
+@router.get("/stats")
+async def get_stats(
+    top: int = Query(10, ge=1, le=100),
+    weeks: int = Query(12, ge=1, le=104),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_admin),
+):
+    """Platform-wide report statistics, read from the analytics rollups"""
+    return await read_stats(db, top, weeks)
@@ -1,128 +1,69 @@
-from fastapi import APIRouter, UploadFile, File, Depends, HTTPException
+from fastapi import APIRouter, UploadFile, File, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import iterate_in_threadpool, run_in_threadpool
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from app.core.database import get_db
+from sqlalchemy import delete
+from typing import List
+from app.core.admission import admission, admit_expensive_request
+from app.core.config import settings
+from app.core.database import get_db, AsyncSessionLocal
+from app.core.metrics import CACHE_HITS, CACHE_MISSES, DELTA_REANALYSIS, timed
 from app.core.security import get_current_user
 from app.models.lab_report import LabReport
 from app.models.user import User
+from app.services.ai_service import (
+    analyze_report,
+    generate_diet_plan,
+    stream_analysis,
+    validate_lab_report,
+)
+from app.services import report_service
+from app.services.analytics import apply_report_rollup
+from app.services.delta_analysis import (
+    delta_outcome,
+    diff_report_text,
+    is_small_change,
+    load_previous_version,
+    reanalyze_delta,
+)
+from app.services.diet_precompute import diet_lane
+from app.services.pdf_service import PDFPageReader
+from app.services.population_benchmarks import (
+    compare_with_population,
+    normalize_results,
+)
+from app.services.text_compaction import compact_report_text
+from app.services.tts_service import synthesize_summary
+from app.utils.custom_exceptions import ProviderUnavailableError, UploadTooLargeError
+from app.utils.file_handlers import take_upload
+from app.utils.data_parsers import IncrementalJSONObjectParser
 from fastapi import status
 from dotenv import load_dotenv
 from app.models.diet_plan import DietPlan
-import pdfplumber
-import google.generativeai as genai
-from elevenlabs.client import ElevenLabs
+from app.models.report_text import ReportText
+import asyncio
 import base64
-import os
+import io
 import json
 import re
+import time
+import zlib
 
 load_dotenv()
-genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
-client = ElevenLabs(api_key=os.getenv("ELEVENLABS_API_KEY"))
 
 router = APIRouter()
 
 
-def validate_lab_report(text: str) -> bool:
-    """Validate if text contains lab report elements using Gemini"""
-    model = genai.GenerativeModel("gemini-1.5-flash")
+def has_lab_report_keywords(text: str) -> bool:
+    """Cheap keyword check run before any Gemini call"""
+    return any(kw in text.lower() for kw in ["patient", "result", "test", "lab"])
 
-    prompt = f"""Analyze this document and determine if it's a medical lab report:
 
-    {text[:5000]}  # First 5000 chars for efficiency
+def summary_sections(analysis: dict) -> list:
+    """Spoken summary of the analysis, one entry per section.
 
-    Respond ONLY with JSON:
-    {{
-        "is_lab_report": boolean,
-        "validation_reason": "string"
-    }}"""
-
-    try:
-        response = model.generate_content(prompt)
-        result = json.loads(re.sub(r"```json|```", "", response.text))
-        return result.get("is_lab_report", False)
-    except:
-        return False
-
-def analyze_with_gemini(text: str) -> dict:
-    """Full analysis using Gemini 1.5 Flash"""
-    model = genai.GenerativeModel("gemini-1.5-flash")
-
-    prompt = f"""**Medical Lab Report Analysis Task**
-
-Analyze this lab report and provide a detailed and comprehensive analysis. In addition to extracting the patient demographics and lab test results, please perform the following:
-
-1. **Data Processing & Ingestion:**  
-   - Extract the lab report data from the provided PDF text, handling both structured and unstructured formats.
-   - Recognize and appropriately categorize different lab test types (e.g., blood tests, liver function, cholesterol, etc.).
-
-2. **Natural Language Interpretation:**  
-   - Translate any medical jargon into plain, human-friendly language.
-   - Provide clear, plain language explanations for each test result.
-
-3. **Data Visualization:**  
-   - Identify and suggest trends over time (e.g., changes in blood work like cholesterol levels).
-   - Indicate how test results might be visually represented, including historical comparisons if applicable.
-
-4. **Risk & Abnormality Detection:**  
-   - Highlight any abnormal results with clear, color-coded alerts.
-   - Provide personalized recommendations such as dietary or lifestyle changes based on the findings.
-
-5. **Population Health Comparison:**  
-   - Compare the individual test results with age-group population benchmarks.
-   - Indicate whether each value falls within a normal distribution for the given demographic.
-   - Provide commentary on any deviations from the expected benchmarks.
-
-Now, analyze the lab report below and provide structured output:
-
-{text}
-
-**Required Output Format (strict JSON):**
-{{
-    "patient": {{
-        "name": "str",
-        "age": "str",
-        "gender": "str",
-        "patient_id": "str"
-    }},
-    "abnormal_results": [
-        {{
-            "test_name": "str",
-            "result": "str",
-            "normal_range": "str",
-            "significance": "str"
-        }}
-    ],
-    "recommendations": {{
-        "immediate_actions": ["str"],
-        "lifestyle_changes": ["str"],
-        "follow_up_tests": ["str"]
-    }},
-    "red_flags": ["str"],
-    "population_comparison": {{
-        "benchmark": "str",
-        "normal_distribution": "str",
-        "commentary": "str"
-    }}
-}}
-
-**Validation Rules:**
-1. Document must contain patient demographics.
-2. Must include lab test results with numerical values.
-3. Should reference medical measurement units.
-4. Must have collection date/time.
-"""
-
-    try:
-        response = model.generate_content(prompt)
-        cleaned = re.sub(r"```json|```", "", response.text)
-        return json.loads(cleaned)
-    except Exception as e:
-        return {"error": str(e)}
-
-
-def generate_summary_text(analysis: dict) -> str:
-    """Generate structured text summary from analysis data"""
+    Headers are sections of their own so their audio can be reused.
+    """
     summary = []
 
     # Patient information
@@ -137,19 +78,22 @@ def generate_summary_text(analysis: dict) -> str:
     # Abnormal results
     abnormal = analysis.get("abnormal_results", [])
     if abnormal:
-        summary.append(f"Found {len(abnormal)} abnormal results:")
-        for result in abnormal:
-            summary.append(
-                f"{result['test_name']}: {result['result']}. "
-                f"Normal range is {result['normal_range']}. "
-                f"This indicates {result['significance']}."
+        summary.append(
+            " ".join(
+                [f"Found {len(abnormal)} abnormal results:"]
+                + [
+                    f"{result['test_name']}: {result['result']}. "
+                    f"Normal range is {result['normal_range']}. "
+                    f"This indicates {result['significance']}."
+                    for result in abnormal
+                ]
             )
+        )
 
     # Critical alerts
     alerts = analysis.get("red_flags", [])
     if alerts:
-        summary.append("Critical alerts detected:")
-        summary.extend(alerts)
+        summary.append(" ".join(["Critical alerts detected:"] + alerts))
 
     # Recommendations
     recs = analysis.get("recommendations", {})
@@ -158,47 +102,10 @@ def generate_summary_text(analysis: dict) -> str:
         for category, items in recs.items():
             if items:
                 friendly_name = category.replace("_", " ").title()
-                summary.append(f"{friendly_name}:")
-                summary.extend(items)
-
-    return " ".join(summary)
-
-
-def generate_diet_plan(analysis: dict) -> dict:
-    """Generate a personalized diet plan based on lab analysis."""
-    model = genai.GenerativeModel("gemini-1.5-flash")
-
-    prompt = f"""Based on the following lab report analysis, create a personalized diet plan:
-
-    {json.dumps(analysis, indent=2)}
-
-    **Diet Plan Format (strict JSON, no additional text):**
-    {{
-        "diet_recommendations": [
-            {{
-                "meal": "Breakfast",
-                "foods": ["food1", "food2"],
-                "reason": "Why these foods are recommended"
-            }},
-            {{
-                "meal": "Lunch",
-                "foods": ["food1", "food2"],
-                "reason": "Why these foods are recommended"
-            }}
-        ],
-        "general_nutrition_tips": ["Tip 1", "Tip 2"]
-    }}
-    """
+                summary.append(" ".join([f"{friendly_name}:"] + items))
+
+    return summary
 
-    try:
-        response = model.generate_content(prompt)
-        match = re.search(r"\{.*\}", response.text, re.DOTALL)
-        if not match:
-            return {"error": "Invalid JSON format received from Gemini"}
-        cleaned_json = match.group(0)
-        return json.loads(cleaned_json)
-    except Exception as e:
-        return {"error": str(e)}
 
 def extract_visualization_data(analysis: dict) -> dict:
     """
@@ -239,89 +146,187 @@ def extract_visualization_data(analysis: dict) -> dict:
     return {"trends": trends}
 
 
+def format_analysis(analysis: dict) -> dict:
+    """Shape a stored analysis into the structure returned to the frontend"""
+    return {
+        "patient_info": analysis.get("patient", {}),
+        "clinical_findings": {
+            "abnormal_results": analysis.get("abnormal_results", []),
+            "critical_alerts": analysis.get("red_flags", []),
+        },
+        "recommendations": analysis.get("recommendations", {}),
+        "warnings": ["This analysis should be verified by a medical professional"],
+        "population_comparison": analysis.get("population_comparison"),
+    }
+
+
+@timed("persist")
+async def save_report(
+    db: AsyncSession,
+    user_id: int,
+    filename: str,
+    analysis: dict,
+    visualization_data: dict,
+    text: str = None,
+) -> LabReport:
+    """Store an analysis, overwriting the user's report with the same filename.
+
+    `text` is the compacted report text, kept for delta re-analysis.
+    """
+    # Check if report with same filename already exists for this user.
+    existing = await report_service.find_by_filenames(db, user_id, [filename])
+    existing_report = existing.get(filename)
+
+    if existing_report:
+        # Override processed_data and visualization_data of the existing report.
+        existing_report.processed_data = json.dumps(analysis)
+        existing_report.visualization_data = json.dumps(visualization_data)
+        # A plan derived from the previous analysis no longer applies
+        await db.execute(
+            delete(DietPlan).where(DietPlan.report_id == existing_report.id)
+        )
+        lab_report = existing_report
+    else:
+        # Create new LabReport with both processed_data and visualization_data.
+        lab_report = LabReport(
+            user_id=user_id,
+            filename=filename,
+            processed_data=json.dumps(analysis),
+            visualization_data=json.dumps(visualization_data)
+        )
+        db.add(lab_report)
+        await db.flush()
+
+    await apply_report_rollup(db, lab_report.id, user_id, analysis)
+    if text is not None:
+        await db.merge(ReportText(report_id=lab_report.id, normalized_text=text))
+    await db.commit()
+    await db.refresh(lab_report)
+    return lab_report
+
+
+@timed("audio")
+def generate_audio_summary(analysis: dict) -> dict:
+    """Synthesize the spoken summary; failures are reported, not raised"""
+    try:
+        sections = summary_sections(analysis)
+        summary_text = " ".join(sections)
+        audio_data = synthesize_summary(sections)
+
+        audio_base64 = base64.b64encode(audio_data).decode("utf-8")
+        return {
+            "content": audio_base64,
+            "content_type": "audio/mpeg",
+            "text_length": len(summary_text),
+        }
+    except ProviderUnavailableError as e:
+        # TTS outage: the upload still succeeds, just without audio
+        return {"skipped": True, "error": f"Audio summary unavailable: {e.detail}"}
+    except Exception as e:
+        return {"error": f"Audio generation failed: {str(e)}"}
+
+
+def provider_unavailable(error: ProviderUnavailableError) -> HTTPException:
+    """503 for a failed or circuit-broken provider, with Retry-After if known"""
+    headers = {"Retry-After": str(error.retry_after)} if error.retry_after else None
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail=f"Analysis service temporarily unavailable ({error.detail})",
+        headers=headers,
+    )
+
+
+def upload_too_large(error: UploadTooLargeError) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=error.detail
+    )
+
+
+async def open_pdf_pages(upload) -> tuple:
+    """Open a spooled PDF and extract only the pages needed for validation.
+
+    Returns the reader, for extracting the remaining pages once the
+    document has passed validation, and the leading pages' text.
+    """
+    reader = await run_in_threadpool(PDFPageReader, upload, settings.UPLOAD_MAX_PAGES)
+    try:
+        pages = await run_in_threadpool(reader.read, settings.UPLOAD_VALIDATION_PAGES)
+    except BaseException:
+        reader.close()
+        raise
+    return reader, pages
+
+
+async def validate_or_reject(text: str):
+    """Keyword check, then the Gemini lab report check, on the leading pages"""
+    with timed("validate"):
+        if not has_lab_report_keywords(text):
+            raise HTTPException(
+                status_code=400, detail="Document lacks basic lab report elements"
+            )
+        if not await run_in_threadpool(validate_lab_report, text):
+            raise HTTPException(status_code=400, detail="Invalid lab report format")
+
+
 @router.post("/reports/upload")
 async def upload_pdf(
     file: UploadFile = File(..., description="PDF file to upload"),
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
+    _admission: None = Depends(admit_expensive_request),
 ):
+    upload = None
+    reader = None
     try:
         if file.content_type != "application/pdf":
             raise HTTPException(status_code=400, detail="Only PDF files accepted")
 
-        # Extract text from PDF
-        with pdfplumber.open(file.file) as pdf:
-            text = "\n".join([p.extract_text() for p in pdf.pages if p.extract_text()])
-
-        # Initial keyword validation
-        if not any(kw in text.lower() for kw in ["patient", "result", "test", "lab"]):
-            raise HTTPException(
-                status_code=400, detail="Document lacks basic lab report elements"
-            )
-
-        # AI validation
-        if not validate_lab_report(text):
-            raise HTTPException(status_code=400, detail="Invalid lab report format")
+        # Check the size of the already spooled upload and extract only the
+        # first pages, so documents that fail validation are never fully parsed
+        with timed("extract"):
+            upload = take_upload(file)
+            reader, pages = await open_pdf_pages(upload)
+            leading_text = compact_report_text(pages)
+
+        # Keyword and AI validation
+        await validate_or_reject(leading_text)
+        previous = await load_previous_version(db, current_user.id, file.filename)
+
+        # Extract the remaining pages and strip repeated boilerplate
+        with timed("extract_remaining"):
+            pages += await run_in_threadpool(reader.read)
+            text = compact_report_text(pages)
+
+        # A re-upload that mostly matches the stored version only has its
+        # changed sections analyzed
+        with timed("diff"):
+            diff = diff_report_text(previous[1], text) if previous else None
+
+        if diff and is_small_change(diff):
+            with timed("analyze"):
+                analysis = await reanalyze_delta(previous[0], diff)
+            analysis_mode = delta_outcome(diff)
+        else:
+            if diff:
+                DELTA_REANALYSIS.inc(outcome="full")
 
-        # Full analysis
-        analysis = analyze_with_gemini(text)
+            # Full analysis
+            with timed("analyze"):
+                analysis = await analyze_report(text, len(pages))
+            analysis_mode = "full"
         if "error" in analysis:
             raise HTTPException(status_code=500, detail=analysis["error"])
 
         # Extract visualization data for enhanced frontend visualizations
         visualization_data = extract_visualization_data(analysis)
 
-        # Check if report with same filename already exists for this user.
-        result = await db.execute(
-            select(LabReport).where(
-                LabReport.user_id == current_user.id,
-                LabReport.filename == file.filename
-            )
+        lab_report = await save_report(
+            db, current_user.id, file.filename, analysis, visualization_data, text
         )
-        existing_report = result.scalars().first()
-
-        if existing_report:
-            # Override processed_data and visualization_data of the existing report.
-            existing_report.processed_data = json.dumps(analysis)
-            existing_report.visualization_data = json.dumps(visualization_data)
-            lab_report = existing_report
-        else:
-            # Create new LabReport with both processed_data and visualization_data.
-            lab_report = LabReport(
-                user_id=current_user.id,
-                filename=file.filename,
-                processed_data=json.dumps(analysis),
-                visualization_data=json.dumps(visualization_data)
-            )
-            db.add(lab_report)
-
-        await db.commit()
-        await db.refresh(lab_report)
+        diet_lane.schedule(lab_report.id, current_user.id, analysis)
 
         # Generate audio summary
-        audio_response = {}
-        try:
-            summary_text = generate_summary_text(analysis)
-            audio = client.generate(
-                text=summary_text,
-                voice="MF3mGyEYCl7XYWbV9V6O",  # Rachel's voice ID
-                model="eleven_monolingual_v1",
-            )
-
-            # Collect audio chunks
-            audio_data = bytes()
-            for chunk in audio:
-                if chunk:
-                    audio_data += chunk
-
-            audio_base64 = base64.b64encode(audio_data).decode("utf-8")
-            audio_response = {
-                "content": audio_base64,
-                "content_type": "audio/mpeg",
-                "text_length": len(summary_text),
-            }
-        except Exception as e:
-            audio_response = {"error": f"Audio generation failed: {str(e)}"}
+        audio_response = await run_in_threadpool(generate_audio_summary, analysis)
 
         # Return combined response including visualization_data and population_comparison.
         return {
@@ -329,19 +334,9 @@ async def upload_pdf(
                 "filename": file.filename,
                 "report_id": lab_report.id,
                 "message": "Report uploaded and analyzed successfully",
+                "analysis_mode": analysis_mode,
             },
-            "analysis": {
-                "patient_info": analysis.get("patient", {}),
-                "clinical_findings": {
-                    "abnormal_results": analysis.get("abnormal_results", []),
-                    "critical_alerts": analysis.get("red_flags", []),
-                },
-                "recommendations": analysis.get("recommendations", {}),
-                "warnings": [
-                    "This analysis should be verified by a medical professional"
-                ],
-                "population_comparison": analysis.get("population_comparison")
-            },
+            "analysis": format_analysis(analysis),
             "audio_summary": audio_response,
             "visualization_data": visualization_data
         }
@@ -349,24 +344,399 @@ async def upload_pdf(
     except HTTPException as he:
         await db.rollback()
         raise he
+    except UploadTooLargeError as e:
+        await db.rollback()
+        raise upload_too_large(e)
+    except ProviderUnavailableError as e:
+        await db.rollback()
+        raise provider_unavailable(e)
     except Exception as e:
         await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to upload and analyze report: {str(e)}",
         )
+    finally:
+        if reader is not None:
+            reader.close()
+        if upload is not None:
+            upload.close()
+
+
+async def analyze_batch_file(
+    index: int,
+    filename: str,
+    upload,
+    user_id: int,
+    extract_limit: asyncio.Semaphore,
+    llm_limit: asyncio.Semaphore,
+) -> dict:
+    """Extract, validate and analyze one spooled file of a batch upload.
+
+    Extraction and Gemini calls run in the threadpool, each bounded by its
+    own semaphore so a large batch cannot monopolise CPU or the API quota.
+    Each Gemini step also holds an admission slot of its own, so a batch
+    counts against the global and per-user limits like separate uploads.
+    Only the first pages are extracted until the file passes validation.
+    Returns a per-file result dict, tagged with the file's upload index,
+    instead of raising.
+    """
+    reader = None
+    size = upload.seek(0, io.SEEK_END)
+    upload.seek(0)
+    try:
+        async with extract_limit:
+            with timed("extract"):
+                reader, pages = await open_pdf_pages(upload)
+        leading_text = compact_report_text(pages)
+
+        async with llm_limit, admission.slot(user_id, priority=size):
+            await validate_or_reject(leading_text)
+
+        async with extract_limit:
+            with timed("extract_remaining"):
+                pages += await run_in_threadpool(reader.read)
+                text = compact_report_text(pages)
+
+        async with llm_limit, admission.slot(user_id, priority=size):
+            with timed("analyze"):
+                analysis = await analyze_report(text, len(pages))
+        if "error" in analysis:
+            raise HTTPException(status_code=500, detail=analysis["error"])
+
+        return {
+            "index": index,
+            "filename": filename,
+            "status": "analyzed",
+            "analysis": analysis,
+            "visualization_data": extract_visualization_data(analysis),
+            "text": text,
+        }
+    except (ProviderUnavailableError, UploadTooLargeError) as e:
+        if isinstance(e, ProviderUnavailableError):
+            he = provider_unavailable(e)
+        else:
+            he = upload_too_large(e)
+        return {
+            "index": index,
+            "filename": filename,
+            "status": "error",
+            "status_code": he.status_code,
+            "detail": he.detail,
+        }
+    except HTTPException as he:
+        error = {
+            "index": index,
+            "filename": filename,
+            "status": "error",
+            "status_code": he.status_code,
+            "detail": he.detail,
+        }
+        if he.headers and "Retry-After" in he.headers:
+            error["retry_after"] = int(he.headers["Retry-After"])
+        return error
+    except Exception as e:
+        return {
+            "index": index,
+            "filename": filename,
+            "status": "error",
+            "status_code": status.HTTP_500_INTERNAL_SERVER_ERROR,
+            "detail": f"Failed to analyze report: {str(e)}",
+        }
+    finally:
+        if reader is not None:
+            reader.close()
+        upload.close()
+
+
+@timed("persist")
+async def persist_batch(user_id: int, analyzed: dict) -> dict:
+    """Upsert every analyzed file of a batch in a single transaction.
+
+    `analyzed` maps upload index to result. Mirrors `upload_pdf`: a report
+    with the same filename for the same user is overwritten, so of several
+    files sharing a name the last uploaded is stored, as if they had been
+    uploaded one after another. Returns an upload index -> report_id mapping.
+    """
+    latest = {item["filename"]: item for _, item in sorted(analyzed.items())}
+    async with AsyncSessionLocal() as db:
+        async with db.begin():
+            existing = await report_service.find_by_filenames(db, user_id, list(latest))
+
+            stale = [report.id for report in existing.values()]
+            if stale:
+                await db.execute(delete(DietPlan).where(DietPlan.report_id.in_(stale)))
+
+            reports = {}
+            for filename, item in latest.items():
+                lab_report = existing.get(filename)
+                if lab_report is None:
+                    lab_report = LabReport(user_id=user_id, filename=filename)
+                    db.add(lab_report)
+                lab_report.processed_data = json.dumps(item["analysis"])
+                lab_report.visualization_data = json.dumps(item["visualization_data"])
+                reports[filename] = lab_report
+
+            await db.flush()
+            for filename, report in reports.items():
+                await apply_report_rollup(
+                    db, report.id, user_id, latest[filename]["analysis"]
+                )
+                await db.merge(
+                    ReportText(
+                        report_id=report.id, normalized_text=latest[filename]["text"]
+                    )
+                )
+            return {
+                index: reports[item["filename"]].id for index, item in analyzed.items()
+            }
+
+
+@router.post("/reports/upload/batch")
+async def upload_pdf_batch(
+    files: List[UploadFile] = File(..., description="PDF files to upload"),
+    current_user: User = Depends(get_current_user),
+):
+    """Upload and analyze many lab reports concurrently.
+
+    Streams one NDJSON line per file as soon as its analysis finishes, then
+    writes all successful analyses in one bulk transaction and ends the
+    stream with a summary line carrying the stored report IDs. Every line
+    carries the file's `index` in the upload, since filenames may repeat.
+    A batch admission would refuse outright gets its 429 or 503 up front;
+    otherwise every file takes admission slots for its Gemini steps.
+    """
+    if len(files) > settings.BATCH_UPLOAD_MAX_FILES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {settings.BATCH_UPLOAD_MAX_FILES} files per batch",
+        )
+    admission.check(current_user.id)
+
+    # Uploaded files are closed once this handler returns, so take them now.
+    pending = []
+    rejected = []
+    for index, file in enumerate(files):
+        if file.content_type != "application/pdf":
+            rejected.append(
+                {
+                    "index": index,
+                    "filename": file.filename,
+                    "status": "error",
+                    "status_code": 400,
+                    "detail": "Only PDF files accepted",
+                }
+            )
+            continue
+        try:
+            pending.append((index, file.filename, take_upload(file)))
+        except UploadTooLargeError as e:
+            rejected.append(
+                {
+                    "index": index,
+                    "filename": file.filename,
+                    "status": "error",
+                    "status_code": status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                    "detail": e.detail,
+                }
+            )
+
+    user_id = current_user.id
+    extract_limit = asyncio.Semaphore(settings.BATCH_EXTRACT_CONCURRENCY)
+    # More parallel files than the per-user limit would only be refused
+    llm_limit = asyncio.Semaphore(
+        min(settings.BATCH_LLM_CONCURRENCY, admission.max_per_user)
+    )
+
+    async def stream_results():
+        tasks = [
+            asyncio.create_task(
+                analyze_batch_file(
+                    index, filename, upload, user_id, extract_limit, llm_limit
+                )
+            )
+            for index, filename, upload in pending
+        ]
+        try:
+            for item in rejected:
+                yield json.dumps(item) + "\n"
+
+            analyzed = {}
+            for next_done in asyncio.as_completed(tasks):
+                item = await next_done
+                if item["status"] == "analyzed":
+                    analyzed[item["index"]] = item
+                    line = {
+                        "index": item["index"],
+                        "filename": item["filename"],
+                        "status": "analyzed",
+                        "analysis": format_analysis(item["analysis"]),
+                        "visualization_data": item["visualization_data"],
+                    }
+                else:
+                    line = item
+                yield json.dumps(line) + "\n"
+
+            summary = {
+                "status": "complete",
+                "analyzed": len(analyzed),
+                "failed": len(files) - len(analyzed),
+                "reports": [],
+            }
+            if analyzed:
+                try:
+                    report_ids = await persist_batch(user_id, analyzed)
+                    # Duplicate names share a report; the last upload won
+                    stored = {
+                        report_ids[index]: analyzed[index]["analysis"]
+                        for index in sorted(report_ids)
+                    }
+                    for report_id, analysis in stored.items():
+                        diet_lane.schedule(report_id, user_id, analysis)
+                    summary["reports"] = [
+                        {
+                            "index": index,
+                            "filename": analyzed[index]["filename"],
+                            "report_id": report_ids[index],
+                        }
+                        for index in sorted(report_ids)
+                    ]
+                except Exception as e:
+                    summary["status"] = "error"
+                    summary["detail"] = f"Failed to store batch results: {str(e)}"
+            yield json.dumps(summary) + "\n"
+        finally:
+            # Client went away mid-stream: stop the remaining work.
+            for task in tasks:
+                task.cancel()
+            for *_, upload in pending:
+                upload.close()
+
+    return StreamingResponse(stream_results(), media_type="application/x-ndjson")
+
+
+def sse_event(event: str, data) -> str:
+    """Format one Server-Sent Event with a JSON payload"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@router.post("/reports/upload/stream")
+async def upload_pdf_stream(
+    file: UploadFile = File(..., description="PDF file to upload"),
+    current_user: User = Depends(get_current_user),
+):
+    """Upload a lab report and stream its analysis as Server-Sent Events.
+
+    Emits a `status` event per pipeline step, then one event per top-level
+    analysis section (`patient`, `abnormal_results`, `red_flags`,
+    `recommendations`, ...) as soon as the model finishes generating it.
+    The report is stored once the stream completes and a final `complete`
+    event carries the report ID and visualization data. Failures arrive as
+    an `error` event carrying the HTTP status the upload route would use.
+    """
+    if file.content_type != "application/pdf":
+        raise HTTPException(status_code=400, detail="Only PDF files accepted")
+
+    # Uploaded files are closed once this handler returns, so take it now.
+    try:
+        upload = take_upload(file)
+    except UploadTooLargeError as e:
+        raise upload_too_large(e)
+    size = upload.seek(0, io.SEEK_END)
+    upload.seek(0)
+    filename = file.filename
+    user_id = current_user.id
+
+    async def stream_events():
+        reader = None
+        try:
+            # Held inside the stream so the slot lives as long as the work
+            async with admission.slot(user_id, priority=size):
+                yield sse_event("status", {"stage": "extracting"})
+                with timed("extract"):
+                    reader, pages = await open_pdf_pages(upload)
+                    leading_text = compact_report_text(pages)
+
+                yield sse_event("status", {"stage": "validating"})
+                await validate_or_reject(leading_text)
+
+                with timed("extract_remaining"):
+                    pages += await run_in_threadpool(reader.read)
+                    text = compact_report_text(pages)
+
+                yield sse_event("status", {"stage": "analyzing"})
+                parser = IncrementalJSONObjectParser()
+                with timed("analyze"):
+                    async for delta in iterate_in_threadpool(
+                        stream_analysis(text, len(pages))
+                    ):
+                        for section, value in parser.feed(delta):
+                            yield sse_event(section, value)
+                    analysis = parser.result()
+                analysis["population_comparison"] = compare_with_population(analysis)
+                yield sse_event(
+                    "population_comparison", analysis["population_comparison"]
+                )
+
+                visualization_data = extract_visualization_data(analysis)
+                async with AsyncSessionLocal() as db:
+                    lab_report = await save_report(
+                        db, user_id, filename, analysis, visualization_data, text
+                    )
+                diet_lane.schedule(lab_report.id, user_id, analysis)
+
+            yield sse_event(
+                "complete",
+                {
+                    "filename": filename,
+                    "report_id": lab_report.id,
+                    "visualization_data": visualization_data,
+                },
+            )
+        except (HTTPException, ProviderUnavailableError, UploadTooLargeError) as e:
+            he = e
+            if isinstance(e, ProviderUnavailableError):
+                he = provider_unavailable(e)
+            elif isinstance(e, UploadTooLargeError):
+                he = upload_too_large(e)
+            error = {"status_code": he.status_code, "detail": he.detail}
+            if he.headers and "Retry-After" in he.headers:
+                error["retry_after"] = int(he.headers["Retry-After"])
+            yield sse_event("error", error)
+        except Exception as e:
+            yield sse_event(
+                "error",
+                {
+                    "status_code": status.HTTP_500_INTERNAL_SERVER_ERROR,
+                    "detail": f"Failed to upload and analyze report: {str(e)}",
+                },
+            )
+        finally:
+            if reader is not None:
+                reader.close()
+            upload.close()
+
+    return StreamingResponse(
+        stream_events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 @router.get("/reports/history")
 async def get_history(
+    ids: List[int] = Query(None),
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
+    """The user's reports, or only those listed in `ids`"""
     try:
-        result = await db.execute(
-            select(LabReport).where(LabReport.user_id == current_user.id)
-        )
-        reports = result.scalars().all()
+        if ids:
+            reports = await report_service.get_many(
+                db, ids, current_user.id, report_service.HISTORY_COLUMNS
+            )
+        else:
+            reports = await report_service.list_reports(db, current_user.id)
         return {
             "user_id": current_user.id,
             "history": [
@@ -382,6 +752,138 @@ async def get_history(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to retrieve report history: {str(e)}",
         )
+
+
+def ndjson_line(record: dict) -> bytes:
+    return (json.dumps(record) + "\n").encode()
+
+
+async def export_records(user_id: int):
+    """Yield NDJSON batches of a user's reports, results and diet plans.
+
+    Rows are read through server-side cursors EXPORT_BATCH_SIZE at a time
+    and only the needed columns are selected, so memory use does not grow
+    with the size of the history.
+    """
+    batch_size = settings.EXPORT_BATCH_SIZE
+    async with AsyncSessionLocal() as db:
+        yield ndjson_line(
+            {"type": "export", "user_id": user_id, "exported_at": int(time.time())}
+        )
+
+        reports = report_service.owned_rows(
+            db,
+            LabReport,
+            user_id,
+            (
+                LabReport.id,
+                LabReport.filename,
+                LabReport.processed_data,
+                LabReport.visualization_data,
+            ),
+            batch_size,
+        )
+        async for rows in reports:
+            lines = []
+            for report_id, filename, processed_data, visualization_data in rows:
+                analysis = report_service.load_json(processed_data or "{}", None)
+                visualization = report_service.load_json(
+                    visualization_data or "{}", None
+                )
+                if not isinstance(analysis, dict) or visualization is None:
+                    # One unreadable row must not abort the rest of the export
+                    lines.append(
+                        ndjson_line(
+                            {
+                                "type": "error",
+                                "report_id": report_id,
+                                "filename": filename,
+                                "detail": "Stored report data could not be read",
+                            }
+                        )
+                    )
+                    continue
+                lines.append(
+                    ndjson_line(
+                        {
+                            "type": "report",
+                            "report_id": report_id,
+                            "filename": filename,
+                            "analysis": analysis,
+                            "visualization_data": visualization,
+                        }
+                    )
+                )
+                for result in normalize_results(analysis.get("abnormal_results") or []):
+                    lines.append(
+                        ndjson_line(
+                            {"type": "result", "report_id": report_id, **result}
+                        )
+                    )
+            yield b"".join(lines)
+
+        diet_plans = report_service.owned_rows(
+            db,
+            DietPlan,
+            user_id,
+            (DietPlan.id, DietPlan.report_id, DietPlan.diet_data),
+            batch_size,
+        )
+        async for rows in diet_plans:
+            lines = []
+            for diet_plan_id, report_id, diet_data in rows:
+                diet_plan = report_service.load_json(diet_data, None)
+                if diet_plan is None:
+                    record = {
+                        "type": "error",
+                        "diet_plan_id": diet_plan_id,
+                        "report_id": report_id,
+                        "detail": "Stored diet plan could not be read",
+                    }
+                else:
+                    record = {
+                        "type": "diet_plan",
+                        "diet_plan_id": diet_plan_id,
+                        "report_id": report_id,
+                        "diet_plan": diet_plan,
+                    }
+                lines.append(ndjson_line(record))
+            yield b"".join(lines)
+
+
+async def gzip_stream(chunks):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits 31: gzip framing
+    async for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+@router.get("/reports/export")
+async def export_reports(
+    format: str = Query("ndjson", pattern="^(ndjson|ndjson.gz)$"),
+    current_user: User = Depends(get_current_user),
+):
+    """Stream the user's full history as NDJSON, optionally gzip-compressed.
+
+    One line per record: an `export` header, then each `report` followed by
+    its normalized `result` lines, then every `diet_plan`. A row whose stored
+    JSON cannot be read is exported as an `error` line instead.
+    """
+    records = export_records(current_user.id)
+    if format == "ndjson.gz":
+        media_type = "application/gzip"
+        records = gzip_stream(records)
+    else:
+        media_type = "application/x-ndjson"
+    return StreamingResponse(
+        records,
+        media_type=media_type,
+        headers={
+            "Content-Disposition": f'attachment; filename="lablens-export.{format}"'
+        },
+    )
 @router.get("/reports/{report_id}")
 async def get_report(
     report_id: int,
@@ -389,26 +891,17 @@ async def get_report(
     current_user: User = Depends(get_current_user),
 ):
     try:
-        result = await db.execute(select(LabReport).where(LabReport.id == report_id))
-        report = result.scalars().first()
+        report = await report_service.get_report(db, report_id, current_user.id)
 
         if not report:
             raise HTTPException(status_code=404, detail="Report not found")
 
-        if report.user_id != current_user.id:
-            raise HTTPException(status_code=403, detail="Unauthorized access")
-
         # Parse the stored JSON data
-        try:
-            analysis_data = json.loads(report.processed_data)
-        except json.JSONDecodeError:
-            analysis_data = {"error": "Failed to parse stored analysis data"}
+        analysis_data = report_service.load_json(
+            report.processed_data, {"error": "Failed to parse stored analysis data"}
+        )
         # Retrieve visualization data from the stored column
-        visualization = {}
-        try:
-            visualization = json.loads(report.visualization_data) if report.visualization_data else {}
-        except Exception:
-            visualization = {}
+        visualization = report_service.load_json(report.visualization_data, {})
 
         # Structure the response including visualization_data and population_comparison
         return {
@@ -417,18 +910,7 @@ async def get_report(
                 "report_id": report.id,
                 "message": "Report retrieved successfully",
             },
-            "analysis": {
-                "patient_info": analysis_data.get("patient", {}),
-                "clinical_findings": {
-                    "abnormal_results": analysis_data.get("abnormal_results", []),
-                    "critical_alerts": analysis_data.get("red_flags", []),
-                },
-                "recommendations": analysis_data.get("recommendations", {}),
-                "warnings": [
-                    "This analysis should be verified by a medical professional"
-                ],
-                "population_comparison": analysis_data.get("population_comparison")
-            },
+            "analysis": format_analysis(analysis_data),
             "visualization_data": visualization
         }
 
@@ -448,17 +930,42 @@ async def get_diet_plan(
 ):
     """Generate a diet plan based on the lab report and store it in the database."""
     try:
-        result = await db.execute(select(LabReport).where(LabReport.id == report_id))
-        report = result.scalars().first()
+        report = await report_service.get_report(
+            db,
+            report_id,
+            current_user.id,
+            report_service.ANALYSIS_COLUMNS,
+            with_diet_plan=True,
+        )
 
         if not report:
             raise HTTPException(status_code=404, detail="Report not found")
 
-        if report.user_id != current_user.id:
-            raise HTTPException(status_code=403, detail="Unauthorized access")
+        # A stored plan for this report is served as-is instead of regenerated
+        diet_plan = report_service.latest_diet_plan(report)
+        if diet_plan:
+            CACHE_HITS.inc(cache="diet_plan")
+            return {
+                "report_id": report_id,
+                "diet_plan": json.loads(diet_plan.diet_data),
+            }
+
+        # Join a speculative generation already under way, or cancel a queued one
+        pending = diet_lane.claim(report_id)
+        if pending is not None:
+            diet_plan_data = await asyncio.shield(pending)
+            if diet_plan_data is not None:
+                CACHE_HITS.inc(cache="diet_plan_speculative")
+                return {"report_id": report_id, "diet_plan": diet_plan_data}
+        CACHE_MISSES.inc(cache="diet_plan")
 
         analysis_data = json.loads(report.processed_data)
-        diet_plan_data = generate_diet_plan(analysis_data)
+        # Only generation needs an admission slot; cached reads stay cheap
+        async with admission.slot(current_user.id):
+            with timed("diet"):
+                diet_plan_data = await run_in_threadpool(
+                    generate_diet_plan, analysis_data
+                )
 
         if "error" in diet_plan_data:
             raise HTTPException(status_code=500, detail=diet_plan_data["error"])
@@ -476,6 +983,8 @@ async def get_diet_plan(
         return {"report_id": report_id, "diet_plan": diet_plan_data}
     except HTTPException:
         raise
+    except ProviderUnavailableError as e:
+        raise provider_unavailable(e)
     except Exception as e:
         raise HTTPException(
             status_code=500, detail=f"Failed to generate and store diet plan: {str(e)}"
@@ -490,27 +999,23 @@ async def get_report_summary(
 ):
     """Fetches both the lab report details and diet plan for a given report ID."""
     try:
-        # Fetch Lab Report
-        result = await db.execute(select(LabReport).where(LabReport.id == report_id))
-        report = result.scalars().first()
+        # Fetch Lab Report together with its diet plans
+        report = await report_service.get_report(
+            db,
+            report_id,
+            current_user.id,
+            report_service.ANALYSIS_COLUMNS,
+            with_diet_plan=True,
+        )
 
         if not report:
             raise HTTPException(status_code=404, detail="Report not found")
 
-        if report.user_id != current_user.id:
-            raise HTTPException(status_code=403, detail="Unauthorized access")
-
         # Parse stored JSON data from lab report
-        try:
-            analysis_data = json.loads(report.processed_data)
-        except json.JSONDecodeError:
-            analysis_data = {"error": "Failed to parse stored analysis data"}
-
-        # Fetch Diet Plan
-        diet_result = await db.execute(
-            select(DietPlan).where(DietPlan.report_id == report_id)
+        analysis_data = report_service.load_json(
+            report.processed_data, {"error": "Failed to parse stored analysis data"}
         )
-        diet_plan = diet_result.scalars().first()
+        diet_plan = report_service.latest_diet_plan(report)
 
         diet_plan_data = json.loads(diet_plan.diet_data) if diet_plan else {"message": "No diet plan available"}
 
@@ -0,0 +1,421 @@
+from starlette.concurrency import run_in_threadpool
+from dotenv import load_dotenv
+from app.core.config import settings
+from app.core.metrics import LLM_CALLS, LLM_CALL_SECONDS
+from app.services.model_router import (
+    choose_route,
+    profile_document,
+    record_route_call,
+    usage_tokens,
+)
+from app.services.population_benchmarks import compare_with_population
+from app.services.providers import get_generative_model
+from app.services.resilience import call_provider, stream_provider
+from app.utils.custom_exceptions import ProviderUnavailableError
+from app.services.text_compaction import chunk_to_budget, estimate_tokens
+import google.generativeai as genai
+import asyncio
+import os
+import json
+import re
+import time
+
+load_dotenv()
+genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+
+
+def generate_content(route: dict, prompt: str, kind: str):
+    """Call the routed model, recording call counts, latency and cost"""
+    model = get_generative_model(route["model"])
+    outcome = "error"
+    response = None
+    start = time.perf_counter()
+    try:
+        response = call_provider(
+            "gemini",
+            model.generate_content,
+            prompt,
+            latency_key=f"{kind}/{route['tier']}",
+        )
+        outcome = "ok"
+        return response
+    finally:
+        elapsed = time.perf_counter() - start
+        LLM_CALL_SECONDS.observe(elapsed, kind=kind)
+        LLM_CALLS.inc(kind=kind, outcome=outcome)
+        record_route_call(
+            route, kind, elapsed, *usage_tokens(response, prompt), outcome
+        )
+
+
+def stream_content(route: dict, prompt: str, kind: str):
+    """Stream text deltas from the routed model as they arrive"""
+    model = get_generative_model(route["model"])
+    outcome = "error"
+    streamed = []
+    start = time.perf_counter()
+    try:
+        chunks = stream_provider("gemini", model.generate_content, prompt, stream=True)
+        for chunk in chunks:
+            if chunk.text:
+                streamed.append(chunk.text)
+                yield chunk.text
+        outcome = "ok"
+    finally:
+        elapsed = time.perf_counter() - start
+        LLM_CALL_SECONDS.observe(elapsed, kind=kind)
+        LLM_CALLS.inc(kind=kind, outcome=outcome)
+        record_route_call(
+            route,
+            kind,
+            elapsed,
+            *usage_tokens(None, prompt, "".join(streamed)),
+            outcome,
+        )
+
+
+def validate_lab_report(text: str) -> bool:
+    """Validate if text contains lab report elements using Gemini"""
+    prompt = f"""Analyze this document and determine if it's a medical lab report:
+
+    {text[:5000]}  # First 5000 chars for efficiency
+
+    Respond ONLY with JSON:
+    {{
+        "is_lab_report": boolean,
+        "validation_reason": "string"
+    }}"""
+
+    try:
+        route = choose_route("validate", profile_document(text[:5000]))
+        response = generate_content(route, prompt, kind="validate")
+        result = json.loads(re.sub(r"```json|```", "", response.text))
+        return result.get("is_lab_report", False)
+    except ProviderUnavailableError:
+        # An outage is not a verdict on the document; let the caller say so
+        raise
+    except Exception:
+        return False
+
+
+def build_analysis_prompt(text: str) -> str:
+    """Prompt for the full single-call analysis of a lab report"""
+    return f"""**Medical Lab Report Analysis Task**
+
+Analyze this lab report and provide a detailed and comprehensive analysis. In addition to extracting the patient demographics and lab test results, please perform the following:
+
+1. **Data Processing & Ingestion:**  
+   - Extract the lab report data from the provided PDF text, handling both structured and unstructured formats.
+   - Recognize and appropriately categorize different lab test types (e.g., blood tests, liver function, cholesterol, etc.).
+
+2. **Natural Language Interpretation:**  
+   - Translate any medical jargon into plain, human-friendly language.
+   - Provide clear, plain language explanations for each test result.
+
+3. **Data Visualization:**  
+   - Identify and suggest trends over time (e.g., changes in blood work like cholesterol levels).
+   - Indicate how test results might be visually represented, including historical comparisons if applicable.
+
+4. **Risk & Abnormality Detection:**  
+   - Highlight any abnormal results with clear, color-coded alerts.
+   - Provide personalized recommendations such as dietary or lifestyle changes based on the findings.
+
+Now, analyze the lab report below and provide structured output:
+
+{text}
+
+**Required Output Format (strict JSON):**
+{{
+    "patient": {{
+        "name": "str",
+        "age": "str",
+        "gender": "str",
+        "patient_id": "str"
+    }},
+    "abnormal_results": [
+        {{
+            "test_name": "str",
+            "result": "str",
+            "normal_range": "str",
+            "significance": "str"
+        }}
+    ],
+    "recommendations": {{
+        "immediate_actions": ["str"],
+        "lifestyle_changes": ["str"],
+        "follow_up_tests": ["str"]
+    }},
+    "red_flags": ["str"]
+}}
+
+**Validation Rules:**
+1. Document must contain patient demographics.
+2. Must include lab test results with numerical values.
+3. Should reference medical measurement units.
+4. Must have collection date/time.
+"""
+
+
+def analyze_with_gemini(text: str, route: dict = None) -> dict:
+    """Full analysis using the model routed for the report"""
+    prompt = build_analysis_prompt(text)
+    route = route or choose_route("analyze", profile_document(text))
+
+    try:
+        response = generate_content(route, prompt, kind="analyze")
+        cleaned = re.sub(r"```json|```", "", response.text)
+        return json.loads(cleaned)
+    except ProviderUnavailableError:
+        raise
+    except Exception as e:
+        return {"error": str(e)}
+
+
+def stream_analysis(text: str, pages: int = None):
+    """Stream the raw JSON text of a full analysis from the routed model"""
+    route = choose_route("analyze_stream", profile_document(text, pages))
+    return stream_content(route, build_analysis_prompt(text), kind="analyze_stream")
+
+
+def diet_projection(analysis: dict) -> dict:
+    """The parts of an analysis a diet plan depends on: abnormal results, age, sex"""
+    patient = analysis.get("patient") or {}
+    return {
+        "patient": {"age": patient.get("age"), "gender": patient.get("gender")},
+        "abnormal_results": [
+            {key: result.get(key) for key in ("test_name", "result", "normal_range")}
+            for result in analysis.get("abnormal_results") or []
+        ],
+    }
+
+
+def generate_diet_plan(analysis: dict) -> dict:
+    """Generate a personalized diet plan based on lab analysis."""
+    projection = diet_projection(analysis)
+    findings = json.dumps(projection, separators=(",", ":"))
+    prompt = f"""Based on the following lab report findings, create a personalized diet plan:
+
+    {findings}
+
+    **Diet Plan Format (strict JSON, no additional text):**
+    {{
+        "diet_recommendations": [
+            {{
+                "meal": "Breakfast",
+                "foods": ["food1", "food2"],
+                "reason": "Why these foods are recommended"
+            }},
+            {{
+                "meal": "Lunch",
+                "foods": ["food1", "food2"],
+                "reason": "Why these foods are recommended"
+            }}
+        ],
+        "general_nutrition_tips": ["Tip 1", "Tip 2"]
+    }}
+    """
+
+    try:
+        profile = {
+            "tokens": estimate_tokens(findings),
+            "analytes": len(projection["abnormal_results"]),
+        }
+        response = generate_content(choose_route("diet", profile), prompt, kind="diet")
+        match = re.search(r"\{.*\}", response.text, re.DOTALL)
+        if not match:
+            return {"error": "Invalid JSON format received from Gemini"}
+        cleaned_json = match.group(0)
+        return json.loads(cleaned_json)
+    except ProviderUnavailableError:
+        raise
+    except Exception as e:
+        return {"error": str(e)}
+
+
+# Upper-case department headings ("HAEMATOLOGY", "LIPID PROFILE") start a new
+# section when a long report is split for chunked analysis.
+SECTION_HEADING_RE = re.compile(r"^[A-Z][A-Z &/()-]{3,}$")
+RECOMMENDATION_CATEGORIES = [
+    "immediate_actions",
+    "lifestyle_changes",
+    "follow_up_tests",
+]
+PLACEHOLDER_VALUES = {
+    "",
+    "str",
+    "unknown",
+    "n/a",
+    "na",
+    "not available",
+    "not provided",
+}
+
+
+def parse_json_response(response_text: str) -> dict:
+    """Parse a JSON object out of a Gemini response, ignoring code fences"""
+    return json.loads(re.sub(r"```json|```", "", response_text))
+
+
+def analyze_chunk(text: str, part: int, total: int, route: dict = None) -> dict:
+    """Extract findings from one part of a long report"""
+    route = route or choose_route("analyze_chunk", profile_document(text))
+    prompt = f"""**Medical Lab Report Analysis Task (part {part} of {total})**
+
+The text below is one part of a longer lab report. Extract only what appears
+in this part. Leave patient fields empty if they are not present here, and
+translate medical jargon into plain, human-friendly language.
+
+{text}
+
+**Required Output Format (strict JSON):**
+{{
+    "patient": {{
+        "name": "str",
+        "age": "str",
+        "gender": "str",
+        "patient_id": "str"
+    }},
+    "abnormal_results": [
+        {{
+            "test_name": "str",
+            "result": "str",
+            "normal_range": "str",
+            "significance": "str"
+        }}
+    ],
+    "recommendations": {{
+        "immediate_actions": ["str"],
+        "lifestyle_changes": ["str"],
+        "follow_up_tests": ["str"]
+    }},
+    "red_flags": ["str"]
+}}
+"""
+
+    try:
+        response = generate_content(route, prompt, kind="analyze_chunk")
+        return parse_json_response(response.text)
+    except ProviderUnavailableError:
+        raise
+    except Exception as e:
+        return {"error": str(e)}
+
+
+def report_sections(text: str) -> list:
+    """Split report text at section headings; the first is the preamble"""
+    sections = []
+    current = []
+    for line in text.splitlines():
+        if current and SECTION_HEADING_RE.match(line):
+            sections.append("\n".join(current))
+            current = []
+        current.append(line)
+    if current:
+        sections.append("\n".join(current))
+    return sections
+
+
+def split_report_sections(text: str, max_tokens: int) -> list:
+    """Split report text at section headings into chunks of at most max_tokens.
+
+    Consecutive small sections are packed together so a long report becomes
+    a handful of similarly sized chunks rather than one call per heading.
+    """
+    chunks = []
+    for section in report_sections(text):
+        for piece in chunk_to_budget(section, max_tokens):
+            if chunks and estimate_tokens(chunks[-1] + "\n" + piece) <= max_tokens:
+                chunks[-1] += "\n" + piece
+            else:
+                chunks.append(piece)
+    return chunks
+
+
+def _dedupe_key(value) -> str:
+    return " ".join(str(value or "").lower().split())
+
+
+def merge_chunk_analyses(analyses: list) -> dict:
+    """Merge per-chunk analyses in chunk order, dropping duplicates.
+
+    The first meaningful value wins for each patient field; results, red
+    flags and recommendations keep their first occurrence so the merged
+    output does not depend on which chunk call finished first.
+    """
+    patient = {}
+    abnormal_results = []
+    red_flags = []
+    recommendations = {category: [] for category in RECOMMENDATION_CATEGORIES}
+    seen = set()
+
+    for analysis in analyses:
+        for field, value in (analysis.get("patient") or {}).items():
+            if field not in patient and _dedupe_key(value) not in PLACEHOLDER_VALUES:
+                patient[field] = value
+
+        for result in analysis.get("abnormal_results") or []:
+            key = (
+                "result",
+                _dedupe_key(result.get("test_name")),
+                _dedupe_key(result.get("result")),
+            )
+            if key not in seen:
+                seen.add(key)
+                abnormal_results.append(result)
+
+        for flag in analysis.get("red_flags") or []:
+            key = ("flag", _dedupe_key(flag))
+            if key not in seen:
+                seen.add(key)
+                red_flags.append(flag)
+
+        for category, items in (analysis.get("recommendations") or {}).items():
+            for item in items or []:
+                key = ("rec", category, _dedupe_key(item))
+                if key not in seen:
+                    seen.add(key)
+                    recommendations.setdefault(category, []).append(item)
+
+    return {
+        "patient": patient,
+        "abnormal_results": abnormal_results,
+        "recommendations": recommendations,
+        "red_flags": red_flags,
+    }
+
+
+async def analyze_report(text: str, pages: int = None) -> dict:
+    """Analyze report text, switching to map-reduce for long reports.
+
+    Reports within PROMPT_TOKEN_BUDGET get a single `analyze_with_gemini`
+    call. Longer ones are split into sections analyzed concurrently (at most
+    ANALYSIS_CHUNK_CONCURRENCY at a time) and merged locally, so latency
+    tracks the slowest chunk rather than the document length. A single call
+    is routed from the whole document; each chunk is routed from its own
+    profile, so chunks of a long report stay on the cheaper tiers. Either way
+    the population comparison comes from the local benchmark tables.
+    """
+    if estimate_tokens(text) <= settings.PROMPT_TOKEN_BUDGET:
+        route = choose_route("analyze", profile_document(text, pages))
+        analysis = await run_in_threadpool(analyze_with_gemini, text, route)
+        if "error" not in analysis:
+            analysis["population_comparison"] = compare_with_population(analysis)
+        return analysis
+
+    chunks = split_report_sections(text, settings.ANALYSIS_CHUNK_TOKENS)
+    limit = asyncio.Semaphore(settings.ANALYSIS_CHUNK_CONCURRENCY)
+
+    async def run_chunk(index: int, chunk: str) -> dict:
+        async with limit:
+            return await run_in_threadpool(analyze_chunk, chunk, index + 1, len(chunks))
+
+    analyses = await asyncio.gather(
+        *[run_chunk(index, chunk) for index, chunk in enumerate(chunks)]
+    )
+    for analysis in analyses:
+        if "error" in analysis:
+            return {"error": f"Chunked analysis failed: {analysis['error']}"}
+
+    merged = merge_chunk_analyses(analyses)
+    merged["population_comparison"] = compare_with_population(merged)
+    return merged
@@ -0,0 +1,316 @@
+"""Platform-wide report statistics kept as incrementally maintained rollups.
+
+Every saved analysis records its contribution (abnormal analytes, whether
+it raised red flags, the upload week) and adds it to small per-analyte,
+per-week and per-user counter tables in the same transaction. Overwriting a
+report subtracts its previous contribution first, so `/admin/stats` reads a
+few rows instead of parsing every stored analysis. `rebuild_rollups`
+recomputes everything from the stored reports when needed.
+"""
+
+import asyncio
+import json
+from collections import Counter
+from datetime import date, datetime, timedelta, timezone
+
+from sqlalchemy import delete, false, func, select, text
+from sqlalchemy.dialects import postgresql, sqlite
+from starlette.concurrency import run_in_threadpool
+
+from app.core.database import AsyncSessionLocal, engine
+from app.models.analytics import (
+    AnalyteRollup,
+    ReportContribution,
+    UserRollup,
+    WeeklyRollup,
+)
+from app.models.lab_report import LabReport
+from app.services.population_benchmarks import analyte_name
+
+
+ROLLUP_MODELS = (ReportContribution, AnalyteRollup, WeeklyRollup, UserRollup)
+
+
+def current_week() -> date:
+    today = datetime.now(timezone.utc).date()
+    return today - timedelta(days=today.weekday())
+
+
+def report_contribution(analysis: dict) -> dict:
+    """The rollup inputs of one analysis"""
+    analytes = {
+        analyte_name(result.get("test_name"))
+        for result in analysis.get("abnormal_results") or []
+    }
+    return {
+        "analytes": sorted(analyte for analyte in analytes if analyte),
+        "has_red_flags": bool(analysis.get("red_flags")),
+    }
+
+
+async def increment(db, model, key: dict, **deltas):
+    """Atomically add deltas to a counter row, creating it if missing"""
+    if not any(deltas.values()):
+        return
+    dialect = postgresql if engine.dialect.name == "postgresql" else sqlite
+    insert = dialect.insert(model).values(**key, **deltas)
+    await db.execute(
+        insert.on_conflict_do_update(
+            index_elements=list(key),
+            set_={
+                name: getattr(model, name) + insert.excluded[name] for name in deltas
+            },
+        )
+    )
+
+
+async def apply_report_rollup(db, report_id: int, user_id: int, analysis: dict):
+    """Swap a report's previous rollup contribution for its new analysis.
+
+    Runs inside the caller's transaction, before it commits the report.
+    """
+    new = report_contribution(analysis)
+    week = current_week()
+    analytes = Counter(new["analytes"])
+    weekly = Counter(
+        {(week, "reports"): 1, (week, "red_flag_reports"): int(new["has_red_flags"])}
+    )
+
+    previous = await db.get(ReportContribution, report_id)
+    if previous is not None:
+        analytes.subtract(json.loads(previous.analytes))
+        weekly.subtract(
+            {
+                (previous.week, "reports"): 1,
+                (previous.week, "red_flag_reports"): int(previous.has_red_flags),
+            }
+        )
+        previous.week = week
+        previous.analytes = json.dumps(new["analytes"])
+        previous.has_red_flags = new["has_red_flags"]
+    else:
+        db.add(
+            ReportContribution(
+                report_id=report_id,
+                user_id=user_id,
+                week=week,
+                analytes=json.dumps(new["analytes"]),
+                has_red_flags=new["has_red_flags"],
+            )
+        )
+
+    for analyte, delta in sorted(analytes.items()):
+        await increment(db, AnalyteRollup, {"analyte": analyte}, abnormal_count=delta)
+    for changed_week in sorted({key[0] for key in weekly}):
+        await increment(
+            db,
+            WeeklyRollup,
+            {"week": changed_week},
+            reports=weekly[(changed_week, "reports")],
+            red_flag_reports=weekly[(changed_week, "red_flag_reports")],
+        )
+    await increment(
+        db,
+        UserRollup,
+        {"user_id": user_id},
+        uploads=1,
+        reports=0 if previous is not None else 1,
+    )
+
+
+def _batch_contributions(rows: list) -> list:
+    contributions = []
+    for report_id, user_id, processed_data in rows:
+        try:
+            analysis = json.loads(processed_data) if processed_data else {}
+        except json.JSONDecodeError:
+            analysis = {}
+        contributions.append((report_id, user_id, report_contribution(analysis)))
+    return contributions
+
+
+async def lock_rollups(db):
+    """Hold off rollup writers until the caller's transaction ends.
+
+    Uploads already part-way through their rollup update are waited for and
+    later ones block on their first rollup write, so reports read after
+    this stay in step with the rollups until the transaction commits.
+    """
+    if engine.dialect.name == "postgresql":
+        tables = ", ".join(model.__tablename__ for model in ROLLUP_MODELS)
+        await db.execute(text(f"LOCK TABLE {tables} IN EXCLUSIVE MODE"))
+    else:
+        # SQLite locks the whole database at a transaction's first write
+        await db.execute(delete(ReportContribution).where(false()))
+
+
+async def rebuild_rollups(batch_size: int = 500, workers: int = 4) -> dict:
+    """Recompute every rollup from the stored reports.
+
+    Runs as one transaction that first locks the rollups against uploads,
+    so the reports read and the rollups replaced are the same snapshot;
+    uploads wait for it to finish and then apply their own contribution.
+    Reports are read and parsed in id-range batches, `workers` at a time.
+    Upload weeks and upload counts are not stored on reports, so known ones
+    are kept and reports never seen by the rollups are counted in the
+    current week.
+    """
+    async with AsyncSessionLocal() as db:
+        async with db.begin():
+            await lock_rollups(db)
+            return await _rebuild_locked(db, batch_size, workers)
+
+
+async def _rebuild_locked(db, batch_size: int, workers: int) -> dict:
+    ids = (
+        (await db.execute(select(LabReport.id).order_by(LabReport.id))).scalars().all()
+    )
+    weeks = dict(
+        (
+            await db.execute(
+                select(ReportContribution.report_id, ReportContribution.week)
+            )
+        ).all()
+    )
+    uploads = dict(
+        (await db.execute(select(UserRollup.user_id, UserRollup.uploads))).all()
+    )
+
+    limit = asyncio.Semaphore(workers)
+
+    async def load_batch(batch: list) -> list:
+        async with limit:
+            async with AsyncSessionLocal() as reader:
+                result = await reader.execute(
+                    select(
+                        LabReport.id, LabReport.user_id, LabReport.processed_data
+                    ).where(LabReport.id.in_(batch))
+                )
+                rows = result.all()
+            return await run_in_threadpool(_batch_contributions, rows)
+
+    batches = await asyncio.gather(
+        *[
+            load_batch(ids[start : start + batch_size])
+            for start in range(0, len(ids), batch_size)
+        ]
+    )
+
+    week = current_week()
+    analytes, weekly, red_flags, reports = Counter(), Counter(), Counter(), Counter()
+    contributions = []
+    for batch in batches:
+        for report_id, user_id, contribution in batch:
+            report_week = weeks.get(report_id, week)
+            analytes.update(contribution["analytes"])
+            weekly[report_week] += 1
+            red_flags[report_week] += int(contribution["has_red_flags"])
+            reports[user_id] += 1
+            contributions.append(
+                {
+                    "report_id": report_id,
+                    "user_id": user_id,
+                    "week": report_week,
+                    "analytes": json.dumps(contribution["analytes"]),
+                    "has_red_flags": contribution["has_red_flags"],
+                }
+            )
+
+    for model in ROLLUP_MODELS:
+        await db.execute(delete(model))
+    tables = [
+        (ReportContribution, contributions),
+        (
+            AnalyteRollup,
+            [
+                {"analyte": name, "abnormal_count": count}
+                for name, count in analytes.items()
+            ],
+        ),
+        (
+            WeeklyRollup,
+            [
+                {
+                    "week": day,
+                    "reports": count,
+                    "red_flag_reports": red_flags[day],
+                }
+                for day, count in weekly.items()
+            ],
+        ),
+        (
+            UserRollup,
+            [
+                {
+                    "user_id": user_id,
+                    "uploads": max(uploads.get(user_id, 0), count),
+                    "reports": count,
+                }
+                for user_id, count in reports.items()
+            ],
+        ),
+    ]
+    for model, rows in tables:
+        if rows:
+            await db.execute(model.__table__.insert(), rows)
+
+    return {
+        "reports": len(contributions),
+        "analytes": len(analytes),
+        "weeks": len(weekly),
+        "users": len(reports),
+    }
+
+
+async def read_stats(db, top: int = 10, weeks: int = 12) -> dict:
+    """Answer the admin stats from the rollup tables alone"""
+    analytes = await db.execute(
+        select(AnalyteRollup.analyte, AnalyteRollup.abnormal_count)
+        .where(AnalyteRollup.abnormal_count > 0)
+        .order_by(AnalyteRollup.abnormal_count.desc(), AnalyteRollup.analyte)
+        .limit(top)
+    )
+    weekly = await db.execute(
+        select(WeeklyRollup.week, WeeklyRollup.reports, WeeklyRollup.red_flag_reports)
+        .where(WeeklyRollup.reports > 0)
+        .order_by(WeeklyRollup.week.desc())
+        .limit(weeks)
+    )
+    users = await db.execute(
+        select(UserRollup.user_id, UserRollup.uploads, UserRollup.reports)
+        .order_by(UserRollup.uploads.desc(), UserRollup.user_id)
+        .limit(top)
+    )
+    totals = await db.execute(
+        select(
+            func.count(UserRollup.user_id),
+            func.coalesce(func.sum(UserRollup.uploads), 0),
+            func.coalesce(func.sum(UserRollup.reports), 0),
+        )
+    )
+    user_count, upload_count, report_count = totals.one()
+
+    return {
+        "totals": {
+            "users": user_count,
+            "uploads": upload_count,
+            "reports": report_count,
+        },
+        "top_abnormal_analytes": [
+            {"analyte": analyte, "abnormal_reports": count}
+            for analyte, count in analytes.all()
+        ],
+        "red_flag_rate_by_week": [
+            {
+                "week": week.isoformat(),
+                "reports": count,
+                "red_flag_reports": red,
+                "red_flag_rate": round(red / count, 4),
+            }
+            for week, count, red in weekly.all()
+        ],
+        "uploads_by_user": [
+            {"user_id": user_id, "uploads": upload, "reports": report}
+            for user_id, upload, report in users.all()
+        ],
+    }
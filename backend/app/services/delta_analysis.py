@@ -0,0 +1,170 @@
+"""Re-analyze only what changed when a report is re-uploaded.
+
+The compacted text of every analysis is stored next to the report. When
+the same filename is uploaded again, the new text is diffed against it
+section by section. If the patient preamble is unchanged and only a small
+share of lines differ, only the sections that changed are sent to the
+model: the replaced old sections, to re-derive the findings they produced,
+and their new versions. Exactly those old findings are dropped from the
+stored analysis and the new ones merged in. An unchanged text reuses the
+stored analysis without any LLM call.
+"""
+
+import asyncio
+import difflib
+import json
+import re
+
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.core.metrics import DELTA_REANALYSIS
+from app.services import report_service
+from app.services.ai_service import (
+    analyze_chunk,
+    merge_chunk_analyses,
+    report_sections,
+)
+from app.services.model_router import choose_route, profile_document
+from app.services.population_benchmarks import analyte_name, compare_with_population
+
+
+async def load_previous_version(db, user_id: int, filename: str):
+    """(analysis, normalized text) stored for this filename, or None"""
+    row = await report_service.get_stored_text(db, user_id, filename)
+    if row is None or not row.processed_data:
+        return None
+    return json.loads(row.processed_data), row.normalized_text
+
+
+def _keyed(sections: list) -> dict:
+    """Sections keyed by (heading, occurrence) so repeated headings stay apart"""
+    keyed = {}
+    seen = {}
+    for position, section in enumerate(sections):
+        heading = section.split("\n", 1)[0] if position else ""
+        seen[heading] = seen.get(heading, 0) + 1
+        keyed[(heading, seen[heading])] = section
+    return keyed
+
+
+def diff_report_text(old_text: str, new_text: str) -> dict:
+    """Compare two versions of a report's text.
+
+    `change` is the share of lines inserted, deleted or replaced; `changed`
+    holds the new sections to re-analyze and `stale` the old sections whose
+    findings no longer apply.
+    """
+    old_lines, new_lines = old_text.splitlines(), new_text.splitlines()
+    matcher = difflib.SequenceMatcher(None, old_lines, new_lines, autojunk=False)
+    changed_lines = sum(
+        max(i2 - i1, j2 - j1)
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes()
+        if tag != "equal"
+    )
+    change = changed_lines / max(len(old_lines), len(new_lines), 1)
+
+    old_sections = _keyed(report_sections(old_text))
+    new_sections = _keyed(report_sections(new_text))
+    preamble = ("", 1)
+    return {
+        "change": change,
+        "preamble_changed": old_sections.get(preamble) != new_sections.get(preamble),
+        "changed": [
+            section
+            for key, section in new_sections.items()
+            if key != preamble and old_sections.get(key) != section
+        ],
+        "stale": [
+            section
+            for key, section in old_sections.items()
+            if key != preamble and new_sections.get(key) != section
+        ],
+    }
+
+
+def is_small_change(diff: dict) -> bool:
+    return not diff["preamble_changed"] and (
+        diff["change"] <= settings.DELTA_REANALYSIS_MAX_CHANGE
+    )
+
+
+def _normalized(text: str) -> str:
+    return " ".join(re.sub(r"[^a-z0-9]+", " ", str(text or "").lower()).split())
+
+
+def drop_stale_findings(analysis: dict, stale: dict) -> dict:
+    """Remove the findings re-derived from replaced sections.
+
+    `stale` is the analysis of the old sections. Results are matched by
+    canonical analyte, red flags and recommendations by their normalized
+    text; red flags naming a dropped analyte go too.
+    """
+    stale_analytes = {
+        analyte_name(result.get("test_name"))
+        for result in stale.get("abnormal_results") or []
+    }
+    kept, dropped = [], []
+    for result in analysis.get("abnormal_results") or []:
+        name = analyte_name(result.get("test_name"))
+        (dropped if name in stale_analytes else kept).append(result)
+
+    dropped_names = {
+        _normalized(name)
+        for result in dropped
+        for name in (result.get("test_name"), analyte_name(result.get("test_name")))
+    }
+    stale_flags = {_normalized(flag) for flag in stale.get("red_flags") or []}
+    red_flags = [
+        flag
+        for flag in analysis.get("red_flags") or []
+        if _normalized(flag) not in stale_flags
+        and not any(f" {name} " in f" {_normalized(flag)} " for name in dropped_names)
+    ]
+
+    stale_recommendations = stale.get("recommendations") or {}
+    recommendations = {}
+    for category, items in (analysis.get("recommendations") or {}).items():
+        removed = {
+            _normalized(item) for item in stale_recommendations.get(category) or []
+        }
+        recommendations[category] = [
+            item for item in items or [] if _normalized(item) not in removed
+        ]
+    return {
+        **analysis,
+        "abnormal_results": kept,
+        "red_flags": red_flags,
+        "recommendations": recommendations,
+    }
+
+
+async def analyze_sections(sections: list) -> dict:
+    """Findings of a few report sections, from one call routed by their size"""
+    if not sections:
+        return {}
+    text = "\n".join(sections)
+    route = choose_route("analyze_delta", profile_document(text))
+    return await run_in_threadpool(analyze_chunk, text, 1, 1, route)
+
+
+def delta_outcome(diff: dict) -> str:
+    """How a small re-upload is handled: delta, removed or unchanged"""
+    if diff["changed"]:
+        return "delta"
+    return "removed" if diff["stale"] else "unchanged"
+
+
+async def reanalyze_delta(previous: dict, diff: dict) -> dict:
+    """Update a stored analysis from the changed sections of a re-upload"""
+    stale, delta = await asyncio.gather(
+        analyze_sections(diff["stale"]), analyze_sections(diff["changed"])
+    )
+    for findings in (stale, delta):
+        if "error" in findings:
+            return {"error": f"Delta analysis failed: {findings['error']}"}
+    DELTA_REANALYSIS.inc(outcome=delta_outcome(diff))
+
+    merged = merge_chunk_analyses([drop_stale_findings(previous, stale), delta])
+    merged["population_comparison"] = compare_with_population(merged)
+    return merged
@@ -0,0 +1,129 @@
+"""Speculative diet-plan generation in a low-priority background lane.
+
+After an analysis is saved its diet plan is queued here, so the first
+`GET /reports/{id}/diet-plan` usually finds it already stored. The lane
+runs one job at a time and only while no interactive upload or diet-plan
+request holds or waits for an admission slot, so speculative Gemini calls
+never compete with a user who is waiting. A plan is only stored if the
+report still holds the analysis it was generated from, so a job overtaken
+by a re-upload never leaves a plan for the old results behind.
+"""
+
+import asyncio
+import json
+
+from sqlalchemy import select
+from starlette.concurrency import run_in_threadpool
+
+from app.core.admission import admission
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.metrics import DIET_PRECOMPUTE
+from app.models.diet_plan import DietPlan
+from app.models.lab_report import LabReport
+from app.services.ai_service import generate_diet_plan
+
+
+class SpeculativeDietLane:
+    def __init__(self):
+        self._loop = None
+        self._queue = None
+        self._worker = None  # Strong reference so the task is not collected
+        self._waiting = {}  # report_id -> (user_id, analysis), not started yet
+        self._running = {}  # report_id -> future resolving to the plan or None
+
+    def _ensure_worker(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # First use on this event loop (tests run several loops in turn)
+            self._loop = loop
+            self._queue = asyncio.Queue(maxsize=settings.DIET_PRECOMPUTE_QUEUE_SIZE)
+            self._waiting = {}
+            self._running = {}
+            self._worker = loop.create_task(self._run())
+
+    def schedule(self, report_id: int, user_id: int, analysis: dict):
+        """Queue a diet plan for a freshly saved report; drops work when full"""
+        if not settings.DIET_PRECOMPUTE_ENABLED:
+            return
+        self._ensure_worker()
+        try:
+            self._queue.put_nowait(report_id)
+        except asyncio.QueueFull:
+            DIET_PRECOMPUTE.inc(outcome="dropped")
+            return
+        self._waiting[report_id] = (user_id, analysis)
+        DIET_PRECOMPUTE.inc(outcome="queued")
+
+    def claim(self, report_id: int):
+        """Take over a report's speculative job for an interactive request.
+
+        Returns the future of a job already running, to be awaited, or None
+        after cancelling a job that had not started yet.
+        """
+        if self._waiting.pop(report_id, None) is not None:
+            DIET_PRECOMPUTE.inc(outcome="claimed")
+        return self._running.get(report_id)
+
+    async def _wait_until_idle(self):
+        while admission.in_flight or admission.queued:
+            await asyncio.sleep(settings.DIET_PRECOMPUTE_IDLE_POLL_SECONDS)
+
+    async def _run(self):
+        while True:
+            report_id = await self._queue.get()
+            if report_id not in self._waiting:
+                continue  # claimed by an interactive request meanwhile
+            await self._wait_until_idle()
+            job = self._waiting.pop(report_id, None)
+            if job is None:
+                continue
+
+            future = self._loop.create_future()
+            self._running[report_id] = future
+            try:
+                future.set_result(await self._generate(report_id, *job))
+            except Exception:
+                DIET_PRECOMPUTE.inc(outcome="failed")
+                future.set_result(None)
+            finally:
+                del self._running[report_id]
+
+    async def _generate(self, report_id: int, user_id: int, analysis: dict) -> dict:
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(DietPlan.id).where(DietPlan.report_id == report_id)
+            )
+            if result.first():
+                DIET_PRECOMPUTE.inc(outcome="skipped")
+                return None
+
+            diet_plan_data = await run_in_threadpool(generate_diet_plan, analysis)
+            if "error" in diet_plan_data:
+                DIET_PRECOMPUTE.inc(outcome="failed")
+                return None
+
+            # The row lock makes an overwrite wait for this commit, after
+            # which it deletes the plan along with the other stale ones
+            result = await db.execute(
+                select(LabReport.processed_data)
+                .where(LabReport.id == report_id)
+                .with_for_update()
+            )
+            if result.scalar() != json.dumps(analysis):
+                DIET_PRECOMPUTE.inc(outcome="superseded")
+                return None
+
+            db.add(
+                DietPlan(
+                    user_id=user_id,
+                    report_id=report_id,
+                    diet_data=json.dumps(diet_plan_data),
+                )
+            )
+            await db.commit()
+            DIET_PRECOMPUTE.inc(outcome="stored")
+            return diet_plan_data
+
+
+diet_lane = SpeculativeDietLane()
@@ -0,0 +1,104 @@
+"""Pick a Gemini model tier per call from the size and complexity of its input.
+
+A document profile (estimated tokens, pages, result tables and distinct
+analytes) is matched against MODEL_ROUTING_POLICY: the first tier whose
+limits all hold wins and the last tier catches everything else. Calls of a
+kind listed in MODEL_ROUTING_PINNED always use that tier. Each routed call
+records its latency, token counts and estimated cost per tier, so the
+thresholds can be tuned from measured data.
+"""
+
+import re
+
+from app.core.config import settings
+from app.core.metrics import (
+    MODEL_ROUTE_CALLS,
+    MODEL_ROUTE_COST,
+    MODEL_ROUTE_SECONDS,
+    MODEL_ROUTE_TOKENS,
+)
+from app.services.text_compaction import RESULT_LINE_RE, estimate_tokens
+
+# Rows of a table: several cells split by tabs, pipes or wide gaps
+TABLE_ROW_RE = re.compile(r"(?:\S+(?:\t|\s\|\s|\s{2,})){2,}\S+")
+TABLE_MIN_ROWS = 3
+LIMITS = ("tokens", "pages", "tables", "analytes")
+
+
+def profile_document(text: str, pages: int = None) -> dict:
+    """Size and complexity signals used for routing"""
+    analytes = set()
+    tables = 0
+    run = 0
+    for line in text.splitlines():
+        match = RESULT_LINE_RE.match(line.strip())
+        if match:
+            analytes.add(" ".join(match.group(1).lower().split()))
+        if TABLE_ROW_RE.search(line) or match:
+            run += 1
+            if run == TABLE_MIN_ROWS:
+                tables += 1
+        else:
+            run = 0
+    return {
+        "tokens": estimate_tokens(text),
+        "pages": pages if pages is not None else 1,
+        "tables": tables,
+        "analytes": len(analytes),
+    }
+
+
+def choose_route(kind: str, profile: dict) -> dict:
+    """The policy tier for a call of `kind` on an input with `profile`"""
+    policy = settings.MODEL_ROUTING_POLICY
+    pinned = settings.MODEL_ROUTING_PINNED.get(kind)
+    for route in policy:
+        if pinned is not None:
+            if route["tier"] == pinned:
+                return route
+            continue
+        if all(
+            route.get(f"max_{limit}") is None
+            or profile.get(limit, 0) <= route[f"max_{limit}"]
+            for limit in LIMITS
+        ):
+            return route
+    return policy[-1]
+
+
+def record_route_call(
+    route: dict,
+    kind: str,
+    seconds: float,
+    input_tokens: int,
+    output_tokens: int,
+    outcome: str,
+):
+    """Record latency, tokens and estimated USD cost of one routed call"""
+    tier = route["tier"]
+    MODEL_ROUTE_CALLS.inc(kind=kind, tier=tier, model=route["model"], outcome=outcome)
+    MODEL_ROUTE_SECONDS.observe(seconds, kind=kind, tier=tier)
+    MODEL_ROUTE_TOKENS.inc(input_tokens, tier=tier, direction="input")
+    MODEL_ROUTE_TOKENS.inc(output_tokens, tier=tier, direction="output")
+    cost = (
+        input_tokens * route.get("input_cost_per_mtok", 0.0)
+        + output_tokens * route.get("output_cost_per_mtok", 0.0)
+    ) / 1_000_000
+    MODEL_ROUTE_COST.inc(cost, kind=kind, tier=tier)
+
+
+def usage_tokens(response, prompt: str, text: str = None) -> tuple:
+    """(input, output) tokens from the response's usage metadata, else estimated"""
+    if text is None:
+        try:
+            text = response.text if response is not None else ""
+        except ValueError:  # Blocked responses have no text
+            text = ""
+    usage = getattr(response, "usage_metadata", None)
+    input_tokens = getattr(usage, "prompt_token_count", None)
+    output_tokens = getattr(usage, "candidates_token_count", None)
+    if input_tokens is None:
+        input_tokens = estimate_tokens(prompt)
+    if output_tokens is None:
+        output_tokens = estimate_tokens(text or "")
+    return input_tokens, output_tokens
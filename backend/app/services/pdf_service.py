@@ -0,0 +1,56 @@
+import pdfplumber
+
+from app.utils.custom_exceptions import UploadTooLargeError
+
+
+def extract_pdf_pages(source) -> list:
+    """Extract the text of each page of a PDF file-like object, skipping blank pages"""
+    with PDFPageReader(source) as reader:
+        return reader.read()
+
+
+class PDFPageReader:
+    """Extract a PDF's pages on demand, freeing each page once its text is read.
+
+    Lets callers validate a document from its first pages and extract the
+    rest only if it passes. Raises UploadTooLargeError for documents with
+    more than max_pages pages before any page is parsed.
+    """
+
+    def __init__(self, source, max_pages: int = None):
+        self._pdf = pdfplumber.open(source)
+        self.page_count = len(self._pdf.pages)
+        self._next = 0
+        if max_pages is not None and self.page_count > max_pages:
+            self.close()
+            raise UploadTooLargeError(
+                f"PDF has {self.page_count} pages; at most {max_pages} are accepted"
+            )
+
+    def read(self, count: int = None) -> list:
+        """Text of the next `count` pages (all remaining if None), blanks skipped"""
+        end = (
+            self.page_count
+            if count is None
+            else min(self._next + count, self.page_count)
+        )
+        texts = []
+        for index in range(self._next, end):
+            page = self._pdf.pages[index]
+            try:
+                text = page.extract_text()
+            finally:
+                page.close()  # Drop the parsed layout objects of this page
+            if text:
+                texts.append(text)
+        self._next = end
+        return texts
+
+    def close(self):
+        self._pdf.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
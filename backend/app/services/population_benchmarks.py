@@ -0,0 +1,276 @@
+"""Population comparison from bundled percentile tables.
+
+The tables under app/data/population_benchmarks (built by
+scripts/build_population_tables.py) hold, per analyte, age band and sex,
+the analyte value at each percentile level plus the distribution's mean and
+standard deviation. They are memory-mapped once at startup and every
+report's results are ranked against them in a single vectorized lookup, so
+`population_comparison` no longer costs LLM output tokens and is the same
+for the same report on every run. The bundled distributions are modelled
+from reference intervals, so each analyte records its parameter source and
+comparisons against approximate tables are labelled as approximate.
+"""
+
+import json
+import re
+import threading
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+from app.core.config import settings
+
+DEFAULT_TABLES_DIR = (
+    Path(__file__).resolve().parent.parent / "data" / "population_benchmarks"
+)
+
+NUMBER_RE = re.compile(r"\d[\d,]*(?:\.\d+)?|\.\d+")
+UNIT_REPLACEMENTS = [
+    ("μ", "µ"),
+    ("mcl", "ul"),
+    ("mcg", "ug"),
+    ("×", "x"),
+    ("10³", "10^3"),
+    ("10⁹", "10^9"),
+]
+SEX_LABELS = {"female": "Women", "male": "Men", "all": "Adults"}
+
+
+def normalize_name(name: str) -> str:
+    name = re.sub(r"\(.*?\)", " ", str(name or "").lower())
+    return " ".join(re.sub(r"[^a-z0-9]+", " ", name).split())
+
+
+def normalize_unit(unit: str) -> str:
+    unit = "".join(str(unit or "").lower().split())
+    for old, new in UNIT_REPLACEMENTS:
+        unit = unit.replace(old, new)
+    return unit
+
+
+def parse_measurement(text: str):
+    """Split '10.8 g/dL' into (10.8, 'g/dl'); (None, '') without a number"""
+    match = NUMBER_RE.search(str(text or ""))
+    if not match:
+        return None, ""
+    value = float(match.group().replace(",", ""))
+    return value, normalize_unit(text[match.end() :])
+
+
+def range_unit(normal_range: str) -> str:
+    """The unit trailing a reference range such as '12.0 - 16.0 g/dL'"""
+    numbers = list(NUMBER_RE.finditer(str(normal_range or "")))
+    return normalize_unit(normal_range[numbers[-1].end() :]) if numbers else ""
+
+
+def ordinal(n: int) -> str:
+    suffix = (
+        "th" if 10 <= n % 100 <= 20 else {1: "st", 2: "nd", 3: "rd"}.get(n % 10, "th")
+    )
+    return f"{n}{suffix}"
+
+
+class PopulationTables:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.loaded = False
+
+    def load(self, directory=None):
+        """Memory-map the tables; cheap to call again once loaded"""
+        with self._lock:
+            if self.loaded:
+                return
+            directory = Path(
+                directory or settings.POPULATION_TABLES_DIR or DEFAULT_TABLES_DIR
+            )
+            index = json.loads((directory / "index.json").read_text())
+            self.quantiles = np.load(directory / "quantiles.npy", mmap_mode="r")
+            self.moments = np.load(directory / "moments.npy", mmap_mode="r")
+            self.levels = np.asarray(index["levels"], dtype=np.float32)
+            self.age_bands = index["age_bands"]
+            self.age_band_starts = np.asarray(index["age_band_starts"])
+            self.sexes = index["sexes"]
+            self.analytes = index["analytes"]
+            self.log_scale = np.array([a["scale"] == "log" for a in self.analytes])
+            self.aliases = {}
+            for position, analyte in enumerate(self.analytes):
+                for alias in [analyte["name"]] + analyte["aliases"]:
+                    self.aliases[normalize_name(alias)] = position
+            self.loaded = True
+
+    def age_band(self, age) -> Optional[int]:
+        """Index of the band containing age; the 'all ages' slot if unknown.
+
+        None below the first band: the tables hold adult distributions only.
+        """
+        match = NUMBER_RE.search(str(age or ""))
+        if not match:
+            return len(self.age_bands) - 1
+        band = (
+            np.searchsorted(
+                self.age_band_starts,
+                float(match.group().replace(",", "")),
+                side="right",
+            )
+            - 1
+        )
+        return int(band) if band >= 0 else None
+
+    def sex(self, gender) -> int:
+        gender = str(gender or "").strip().lower()
+        if gender.startswith(("f", "w")):
+            return self.sexes.index("female")
+        if gender.startswith("m"):
+            return self.sexes.index("male")
+        return self.sexes.index("all")
+
+    def normalize(self, result: dict):
+        """(analyte index, value in the table's unit) of a result, else Nones"""
+        self.load()
+        position = self.aliases.get(normalize_name(result.get("test_name")))
+        value, unit = parse_measurement(result.get("result"))
+        if position is None or value is None:
+            return position, None
+        unit = unit or range_unit(result.get("normal_range"))
+        factor = self.analytes[position]["units"].get(unit, 1.0 if not unit else None)
+        if factor is None:
+            return position, None  # Unknown unit: no safe conversion to the table's
+        return position, value * factor
+
+    def rank(self, analytes, band: int, sex: int, values):
+        """Percentiles and z-scores of values for one demographic, vectorized"""
+        analytes = np.asarray(analytes, dtype=np.intp)
+        values = np.asarray(values, dtype=np.float64)
+        rows = np.asarray(self.quantiles[analytes, band, sex], dtype=np.float64)
+        moments = np.asarray(self.moments[analytes, band, sex], dtype=np.float64)
+
+        # Linear interpolation between the neighbouring percentile levels
+        upper = np.clip((rows <= values[:, None]).sum(axis=1), 1, len(self.levels) - 1)
+        lookup = np.arange(len(values))
+        low, high = rows[lookup, upper - 1], rows[lookup, upper]
+        fraction = np.clip((values - low) / np.maximum(high - low, 1e-12), 0.0, 1.0)
+        levels = self.levels.astype(np.float64)
+        percentiles = levels[upper - 1] + fraction * (levels[upper] - levels[upper - 1])
+
+        scaled = np.where(
+            self.log_scale[analytes], np.log(np.maximum(values, 1e-12)), values
+        )
+        z_scores = (scaled - moments[:, 0]) / moments[:, 1]
+        return percentiles, z_scores
+
+    def compare(self, patient: dict, results: list) -> dict:
+        """Rank a report's results against the patient's age band and sex"""
+        self.load()
+        band = self.age_band(patient.get("age"))
+        if band is None:
+            return {
+                "benchmark": "No paediatric population table",
+                "approximate": False,
+                "normal_distribution": "The population tables cover adults only, "
+                "so results are not compared for patients under "
+                f"{int(self.age_band_starts[0])}",
+                "commentary": "",
+                "results": [],
+            }
+        sex = self.sex(patient.get("gender"))
+        ages = self.age_bands[band]
+        ages = "of all ages" if band == len(self.age_bands) - 1 else f"aged {ages}"
+        group = f"{SEX_LABELS[self.sexes[sex]]} {ages}"
+
+        matched, analytes, values = [], [], []
+        for result in results:
+            position, value = self.normalize(result)
+            if value is None:
+                continue
+            matched.append((result.get("test_name"), self.analytes[position]))
+            analytes.append(position)
+            values.append(value)
+
+        if not matched:
+            return {
+                "benchmark": group,
+                "approximate": False,
+                "normal_distribution": "No results could be matched to the population tables",
+                "commentary": "",
+                "results": [],
+            }
+
+        percentiles, z_scores = self.rank(analytes, band, sex, values)
+        compared = []
+        for (name, analyte), value, pct, z in zip(
+            matched, values, percentiles, z_scores
+        ):
+            compared.append(
+                {
+                    "test_name": name,
+                    "value": round(value, 3),
+                    "unit": analyte["unit"],
+                    "percentile": round(float(pct), 1),
+                    "z_score": round(float(z), 2),
+                    "approximate": analyte.get("approximate", True),
+                }
+            )
+
+        distribution = "; ".join(
+            f"{item['test_name']}: {ordinal(int(min(max(round(item['percentile']), 1), 99)))} percentile (z = {item['z_score']:+.1f})"
+            for item in compared
+        )
+        outliers = [
+            f"{item['test_name']} is lower than {100 - item['percentile']:.0f}% of {group.lower()}"
+            if item["percentile"] < 50
+            else f"{item['test_name']} is higher than {item['percentile']:.0f}% of {group.lower()}"
+            for item in compared
+            if item["percentile"] < 5 or item["percentile"] > 95
+        ]
+        commentary = (
+            ". ".join(outliers) + "."
+            if outliers
+            else f"All compared results lie within the middle 90% of {group.lower()}."
+        )
+        approximate = any(item["approximate"] for item in compared)
+        return {
+            "benchmark": f"{group} (approximate)" if approximate else group,
+            "approximate": approximate,
+            "normal_distribution": distribution,
+            "commentary": commentary,
+            "results": compared,
+        }
+
+
+population_tables = PopulationTables()
+
+
+def compare_with_population(analysis: dict) -> dict:
+    """population_comparison for an analysis, computed from the local tables"""
+    return population_tables.compare(
+        analysis.get("patient") or {}, analysis.get("abnormal_results") or []
+    )
+
+
+def normalize_results(results: list) -> list:
+    """Results with their value parsed and converted to the canonical unit"""
+    normalized = []
+    for result in results:
+        position, value = population_tables.normalize(result)
+        analyte = population_tables.analytes[position] if position is not None else None
+        normalized.append(
+            {
+                "test_name": result.get("test_name"),
+                "analyte": analyte["name"] if analyte else None,
+                "result": result.get("result"),
+                "normal_range": result.get("normal_range"),
+                "value": round(value, 4) if value is not None else None,
+                "unit": analyte["unit"] if analyte and value is not None else None,
+            }
+        )
+    return normalized
+
+
+def analyte_name(test_name: str) -> str:
+    """Canonical analyte for a test name, else the normalized name itself"""
+    population_tables.load()
+    position = population_tables.aliases.get(normalize_name(test_name))
+    if position is None:
+        return normalize_name(test_name)
+    return population_tables.analytes[position]["name"]
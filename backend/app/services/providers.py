@@ -0,0 +1,153 @@
+"""LLM and TTS provider selection, with offline stand-ins for benchmarking.
+
+Set LLM_PROVIDER=fake and/or TTS_PROVIDER=fake to replace Gemini and
+ElevenLabs with local fakes that sleep for a configurable latency and
+return canned (or configured) payloads.
+"""
+
+import json
+import os
+import random
+import time
+
+from dotenv import load_dotenv
+import google.generativeai as genai
+from elevenlabs.client import ElevenLabs
+
+from app.core.config import settings
+
+load_dotenv()
+
+FAKE_PAYLOADS = {
+    "validation": {
+        "is_lab_report": True,
+        "validation_reason": "Contains patient details and test results",
+    },
+    "analysis": {
+        "patient": {
+            "name": "Jane Doe",
+            "age": "42",
+            "gender": "Female",
+            "patient_id": "PX-10234",
+        },
+        "abnormal_results": [
+            {
+                "test_name": "Hemoglobin",
+                "result": "10.8 g/dL",
+                "normal_range": "12.0 - 16.0 g/dL",
+                "significance": "Mild anemia",
+            },
+            {
+                "test_name": "LDL Cholesterol",
+                "result": "162 mg/dL",
+                "normal_range": "50 - 130 mg/dL",
+                "significance": "Raised cardiovascular risk",
+            },
+        ],
+        "recommendations": {
+            "immediate_actions": ["Consult your physician about anemia"],
+            "lifestyle_changes": ["Increase iron-rich foods", "Exercise daily"],
+            "follow_up_tests": ["Repeat lipid profile in 3 months"],
+        },
+        "red_flags": ["Low hemoglobin"],
+    },
+    "diet": {
+        "diet_recommendations": [
+            {
+                "meal": "Breakfast",
+                "foods": ["Oats", "Spinach omelette"],
+                "reason": "Iron and soluble fibre",
+            },
+            {
+                "meal": "Lunch",
+                "foods": ["Lentils", "Brown rice"],
+                "reason": "Plant protein and iron",
+            },
+        ],
+        "general_nutrition_tips": ["Pair iron with vitamin C", "Limit fried food"],
+    },
+}
+
+
+def _fake_failure(rate: float):
+    """Raise like a failing provider with probability `rate`"""
+    if rate and random.random() < rate:
+        raise RuntimeError("Simulated provider failure")
+
+
+def _fake_sleep(latency_ms: float):
+    """Sleep for latency_ms with +/- FAKE_LATENCY_JITTER relative jitter"""
+    jitter = settings.FAKE_LATENCY_JITTER
+    time.sleep(max(0.0, latency_ms * random.uniform(1 - jitter, 1 + jitter)) / 1000)
+
+
+class FakeResponse:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class FakeGenerativeModel:
+    """Stand-in for `genai.GenerativeModel` that never leaves the process"""
+
+    def __init__(self, model_name: str):
+        self.model_name = model_name
+
+    @staticmethod
+    def payload_kind(prompt: str) -> str:
+        """Guess which call a prompt belongs to from its wording"""
+        if "is_lab_report" in prompt:
+            return "validation"
+        if "diet plan" in prompt.lower():
+            return "diet"
+        return "analysis"
+
+    def generate_content(self, prompt: str, stream: bool = False, **kwargs):
+        kind = self.payload_kind(prompt)
+        payload = settings.FAKE_LLM_PAYLOADS.get(kind, FAKE_PAYLOADS[kind])
+        text = f"```json\n{json.dumps(payload, indent=2)}\n```"
+        if stream:
+            return self._stream(text)
+        _fake_sleep(settings.FAKE_LLM_LATENCY_MS)
+        _fake_failure(settings.FAKE_LLM_FAILURE_RATE)
+        return FakeResponse(text)
+
+    @staticmethod
+    def _stream(text: str, pieces: int = 8):
+        """Yield text in pieces spread evenly over the configured latency"""
+        size = max(1, -(-len(text) // pieces))
+        for offset in range(0, len(text), size):
+            _fake_sleep(settings.FAKE_LLM_LATENCY_MS / pieces)
+            _fake_failure(settings.FAKE_LLM_FAILURE_RATE / pieces)
+            yield FakeResponse(text[offset : offset + size])
+
+
+class FakeTTSClient:
+    """Stand-in for the ElevenLabs client returning silent MP3-sized bytes"""
+
+    def generate(self, text: str, voice: str = None, model: str = None):
+        _fake_sleep(settings.FAKE_TTS_LATENCY_MS)
+        _fake_failure(settings.FAKE_TTS_FAILURE_RATE)
+        # Roughly 1 KB of audio per 15 characters of text, in 4 KB chunks
+        size = max(1024, len(text) * 64)
+        for offset in range(0, size, 4096):
+            yield b"\x00" * min(4096, size - offset)
+
+
+_tts_client = None
+
+
+def get_generative_model(model_name: str):
+    """Return a Gemini model, or the offline fake when LLM_PROVIDER=fake"""
+    if settings.LLM_PROVIDER == "fake":
+        return FakeGenerativeModel(model_name)
+    return genai.GenerativeModel(model_name)
+
+
+def get_tts_client():
+    """Return the ElevenLabs client, or the offline fake when TTS_PROVIDER=fake"""
+    global _tts_client
+    if settings.TTS_PROVIDER == "fake":
+        return FakeTTSClient()
+    if _tts_client is None:
+        _tts_client = ElevenLabs(api_key=os.getenv("ELEVENLABS_API_KEY"))
+    return _tts_client
@@ -0,0 +1,129 @@
+"""Ownership-scoped reads of a user's lab reports.
+
+Every lookup filters on the owner in the same WHERE clause as the report
+id, so a report that does not exist and one that belongs to someone else
+are the same miss and each read is a single query. Callers load only the
+columns their view needs, and can have the report's diet plans joined into
+the same statement.
+"""
+
+import json
+
+from sqlalchemy import select
+from sqlalchemy.orm import joinedload, load_only
+
+from app.models.diet_plan import DietPlan
+from app.models.lab_report import LabReport
+from app.models.report_text import ReportText
+
+# Columns loaded per use case; the primary key is always loaded
+HISTORY_COLUMNS = (LabReport.filename,)
+ANALYSIS_COLUMNS = (LabReport.filename, LabReport.processed_data)
+REPORT_COLUMNS = (
+    LabReport.filename,
+    LabReport.processed_data,
+    LabReport.visualization_data,
+)
+
+
+def owned_reports(user_id: int, columns=REPORT_COLUMNS, with_diet_plan=False):
+    """SELECT of the user's reports, projected to `columns`"""
+    query = (
+        select(LabReport)
+        .options(load_only(*columns))
+        .where(LabReport.user_id == user_id)
+    )
+    if with_diet_plan:
+        query = query.options(
+            joinedload(LabReport.diet_plan).load_only(DietPlan.diet_data)
+        )
+    return query
+
+
+async def get_report(
+    db, report_id: int, user_id: int, columns=REPORT_COLUMNS, with_diet_plan=False
+):
+    """The user's report with this id, or None"""
+    result = await db.execute(
+        owned_reports(user_id, columns, with_diet_plan).where(LabReport.id == report_id)
+    )
+    return result.unique().scalars().first()
+
+
+async def get_many(
+    db, report_ids: list, user_id: int, columns=REPORT_COLUMNS, with_diet_plan=False
+) -> list:
+    """The user's reports among `report_ids`, in the order given.
+
+    Ids that are missing or owned by someone else are skipped.
+    """
+    ids = list(dict.fromkeys(report_ids))
+    if not ids:
+        return []
+    result = await db.execute(
+        owned_reports(user_id, columns, with_diet_plan).where(LabReport.id.in_(ids))
+    )
+    found = {report.id: report for report in result.unique().scalars().all()}
+    return [found[report_id] for report_id in ids if report_id in found]
+
+
+async def list_reports(db, user_id: int, columns=HISTORY_COLUMNS) -> list:
+    """All of the user's reports, oldest first"""
+    result = await db.execute(owned_reports(user_id, columns).order_by(LabReport.id))
+    return result.scalars().all()
+
+
+async def owned_rows(db, model, user_id: int, columns, batch_size: int):
+    """Yield the user's `model` rows as `columns` tuples, oldest first.
+
+    Rows come from a server-side cursor in partitions of `batch_size`, so
+    callers can stream a whole history without holding it in memory.
+    """
+    result = await db.stream(
+        select(*columns)
+        .where(model.user_id == user_id)
+        .order_by(model.id)
+        .execution_options(yield_per=batch_size)
+    )
+    async for rows in result.partitions():
+        yield rows
+
+
+async def find_by_filenames(db, user_id: int, filenames: list) -> dict:
+    """filename -> the user's full report entity, for overwriting on re-upload"""
+    result = await db.execute(
+        select(LabReport).where(
+            LabReport.user_id == user_id, LabReport.filename.in_(list(filenames))
+        )
+    )
+    existing = {}
+    for report in result.scalars().all():
+        existing.setdefault(report.filename, report)
+    return existing
+
+
+async def get_stored_text(db, user_id: int, filename: str):
+    """(processed_data, normalized_text) of the user's report with this filename"""
+    result = await db.execute(
+        select(LabReport.processed_data, ReportText.normalized_text)
+        .join(ReportText, ReportText.report_id == LabReport.id)
+        .where(LabReport.user_id == user_id, LabReport.filename == filename)
+        .order_by(LabReport.id)
+        .limit(1)
+    )
+    return result.first()
+
+
+def latest_diet_plan(report: LabReport):
+    """The most recently stored diet plan of an eagerly loaded report"""
+    return max(report.diet_plan, key=lambda plan: plan.id, default=None)
+
+
+def load_json(value, default):
+    """Parse a stored JSON column, or return `default` when empty or unreadable"""
+    if not value:
+        return default
+    try:
+        return json.loads(value)
+    except (TypeError, ValueError):
+        return default
@@ -0,0 +1,227 @@
+"""Circuit breakers and hedged requests for the external AI providers.
+
+Every Gemini and ElevenLabs call goes through `call_provider`:
+- a per-provider circuit breaker fails fast with ProviderUnavailableError
+  after repeated failures, then lets a single probe through once the reset
+  timeout passes (half-open) to decide whether to close again;
+- once enough latency samples exist for that kind of call, a call still
+  running after its p95 latency is hedged with a second identical request
+  and the first successful response wins. Hedges are only sent while the
+  provider's worker pool has idle threads, so they never queue ahead of
+  first attempts.
+"""
+
+import math
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from app.core.config import settings
+from app.core.metrics import CIRCUIT_STATE, HEDGED_CALLS
+from app.utils.custom_exceptions import ProviderUnavailableError
+
+CLOSED, HALF_OPEN, OPEN = "closed", "half_open", "open"
+STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+class CircuitBreaker:
+    def __init__(self, provider: str, failure_threshold: int, reset_timeout: float):
+        self.provider = provider
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+        CIRCUIT_STATE.set(0, provider=provider)
+
+    def _set_state(self, state: str):
+        self.state = state
+        CIRCUIT_STATE.set(STATE_VALUES[state], provider=self.provider)
+
+    def retry_after(self) -> int:
+        remaining = self.reset_timeout - (time.monotonic() - self.opened_at)
+        return max(1, math.ceil(remaining))
+
+    def allow_request(self) -> bool:
+        """Whether a call may go out now; claims the probe when half-open"""
+        with self._lock:
+            if self.state == OPEN:
+                if time.monotonic() - self.opened_at < self.reset_timeout:
+                    return False
+                self._set_state(HALF_OPEN)
+            if self.state == HALF_OPEN:
+                if self._probe_in_flight:
+                    return False
+                self._probe_in_flight = True
+            return True
+
+    def before_call(self):
+        if not self.allow_request():
+            raise ProviderUnavailableError(
+                self.provider,
+                "circuit open after repeated failures",
+                self.retry_after(),
+            )
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self._probe_in_flight = False
+            if self.state != CLOSED:
+                self._set_state(CLOSED)
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._probe_in_flight = False
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+                self._set_state(OPEN)
+
+
+class LatencyTracker:
+    """Rolling window of successful call latencies"""
+
+    def __init__(self, window: int = 200):
+        self.samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float):
+        with self._lock:
+            self.samples.append(seconds)
+
+    def percentile(self, pct: float, min_samples: int) -> float:
+        with self._lock:
+            if len(self.samples) < min_samples:
+                return None
+            ordered = sorted(self.samples)
+        return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+class Provider:
+    def __init__(self, name: str, workers: int = None):
+        self.name = name
+        self.breaker = CircuitBreaker(
+            name, settings.CIRCUIT_FAILURE_THRESHOLD, settings.CIRCUIT_RESET_SECONDS
+        )
+        self.latency = {}  # latency key (call kind, model tier) -> LatencyTracker
+        self.workers = workers or settings.PROVIDER_WORKERS.get(name, 16)
+        # Hedged and timed-out calls keep running here after the caller moves on
+        self.executor = ThreadPoolExecutor(
+            max_workers=self.workers, thread_name_prefix=f"provider-{name}"
+        )
+        self.busy = 0
+        self._lock = threading.Lock()
+
+    def tracker(self, key: str) -> LatencyTracker:
+        with self._lock:
+            return self.latency.setdefault(key, LatencyTracker())
+
+    def submit(self, func, args, kwargs):
+        """Run func on this provider's pool, counting queued and running calls"""
+        with self._lock:
+            self.busy += 1
+        future = self.executor.submit(_timed_call, func, args, kwargs)
+        future.add_done_callback(self._release)
+        return future
+
+    def _release(self, future):
+        with self._lock:
+            self.busy -= 1
+
+    def has_idle_worker(self) -> bool:
+        with self._lock:
+            return self.busy < self.workers
+
+
+PROVIDERS = {"gemini": Provider("gemini"), "elevenlabs": Provider("elevenlabs")}
+
+
+def _timed_call(func, args, kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def call_provider(
+    name: str, func, *args, hedge: bool = True, latency_key: str = "", **kwargs
+):
+    """Run func against provider `name` behind its breaker, hedging slow calls.
+
+    `latency_key` names the kind of call (e.g. "analyze/standard"); hedging
+    uses the p95 of earlier calls with the same key only. Any failure
+    (including a timeout after PROVIDER_TIMEOUT_SECONDS) is recorded on the
+    breaker and raised as ProviderUnavailableError.
+    """
+    provider = PROVIDERS[name]
+    provider.breaker.before_call()
+    latency = provider.tracker(latency_key)
+
+    hedge_after = None
+    if hedge and settings.HEDGE_REQUESTS:
+        hedge_after = latency.percentile(95, settings.HEDGE_MIN_SAMPLES)
+
+    deadline = time.monotonic() + settings.PROVIDER_TIMEOUT_SECONDS
+    pending = {provider.submit(func, args, kwargs)}
+    primary = next(iter(pending))
+    error = None
+    hedged = False
+
+    while pending:
+        timeout = deadline - time.monotonic()
+        if hedge_after is not None and not hedged:
+            timeout = min(timeout, hedge_after)
+        done, pending = wait(
+            pending, timeout=max(0.0, timeout), return_when=FIRST_COMPLETED
+        )
+
+        for future in done:
+            try:
+                result, seconds = future.result()
+            except Exception as e:
+                error = e
+                continue
+            latency.record(seconds)
+            provider.breaker.record_success()
+            for loser in pending:
+                loser.cancel()
+            if hedged:
+                HEDGED_CALLS.inc(
+                    provider=name, winner="primary" if future is primary else "hedge"
+                )
+            return result
+
+        if not done and not hedged and hedge_after is not None:
+            if provider.has_idle_worker():
+                hedged = True
+                pending.add(provider.submit(func, args, kwargs))
+            else:
+                # The pool is saturated; a hedge would only queue behind it
+                hedge_after = None
+        elif not done:
+            error = TimeoutError(
+                f"no response within {settings.PROVIDER_TIMEOUT_SECONDS}s"
+            )
+            break
+
+    provider.breaker.record_failure()
+    raise ProviderUnavailableError(name, str(error)) from error
+
+
+def stream_provider(name: str, func, *args, **kwargs):
+    """Iterate a streaming provider call behind the provider's breaker"""
+    provider = PROVIDERS[name]
+    provider.breaker.before_call()
+    try:
+        yield from func(*args, **kwargs)
+    except GeneratorExit:
+        # Consumer stopped early; says nothing about provider health
+        provider.breaker.record_success()
+        raise
+    except Exception as e:
+        provider.breaker.record_failure()
+        raise ProviderUnavailableError(name, str(e)) from e
+    provider.breaker.record_success()
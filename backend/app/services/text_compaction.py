@@ -0,0 +1,167 @@
+"""Shrink extracted lab report text before it is sent to Gemini.
+
+Lab PDFs repeat letterheads, patient banners, page footers and legal
+disclaimers on every page. None of that helps the model, but all of it is
+billed as prompt tokens and adds to generation latency.
+"""
+
+import math
+import re
+from collections import Counter
+
+from app.core.config import settings
+
+# Lines within this many lines of the top or bottom of a page, and in the
+# outer third at that end, are header/footer candidates. Only exact repeats
+# there are removed, so result rows on short pages are never touched.
+EDGE_LINES = 6
+EDGE_SHARE = 1 / 3
+# A line must appear on at least this share of pages to count as boilerplate.
+REPEAT_RATIO = 0.6
+# Rough characters-per-token ratio for Gemini on English/medical text.
+CHARS_PER_TOKEN = 4
+
+RULER_RE = re.compile(r"^[\s\-=_*~.:|+#•·]{3,}$")
+WHITESPACE_RE = re.compile(r"[ \t\u00a0]+")
+
+# A result row: a test name followed by a value, e.g. "LDL Cholesterol 162 mg/dL"
+RESULT_LINE_RE = re.compile(
+    r"^([A-Za-z][A-Za-z0-9 ()/,.%+-]{1,60}?)[\s:|]+[<>]?\d+(?:\.\d+)?\b"
+)
+# A short heading line without digits or sentence punctuation
+HEADING_RE = re.compile(r"^[A-Z][A-Za-z &/(),'-]{2,80}:?$")
+
+# Headings that open sections with no test results in them. Lines are dropped
+# from the heading to the next heading or result row, or the end of the page.
+NON_RESULT_SECTION_RE = re.compile(
+    r"^(disclaimer|terms\s*(and|&)\s*conditions|conditions\s+of\s+reporting|"
+    r"important\s+(note|instructions?)|limitations?\s+of\s+(the\s+)?test|"
+    r"general\s+instructions?)\b",
+    re.IGNORECASE,
+)
+# Single boilerplate lines dropped wherever they appear.
+BOILERPLATE_LINE_RE = re.compile(
+    r"^(\W*end\s+of\s+(the\s+)?report\W*|page\s+\d+\s*(of|/)\s*\d+|"
+    r"this\s+is\s+(a\s+)?(computer|electronically|system)[\s-]generated\b.*|"
+    r".*\bscan\s+(the\s+)?qr\s+code\b.*|.*\bnot\s+valid\s+for\s+medico[\s-]?legal\b.*)$",
+    re.IGNORECASE,
+)
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap offline token estimate used for budgeting prompts"""
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def normalize_lines(page: str) -> list:
+    """Collapse runs of whitespace and drop empty and ruler lines"""
+    lines = []
+    for line in page.splitlines():
+        line = WHITESPACE_RE.sub(" ", line).strip()
+        if line and not RULER_RE.match(line):
+            lines.append(line)
+    return lines
+
+
+def is_result_line(line: str) -> bool:
+    return bool(RESULT_LINE_RE.match(line))
+
+
+def is_heading(line: str) -> bool:
+    return bool(HEADING_RE.match(line)) and (
+        line.isupper() or line.istitle() or line.endswith(":")
+    )
+
+
+def edge_lines(lines: list) -> list:
+    """(index, line) pairs in the header and footer zones of a page"""
+    edge = min(EDGE_LINES, int(len(lines) * EDGE_SHARE))
+    return [
+        (i, line) for i, line in enumerate(lines) if i < edge or i >= len(lines) - edge
+    ]
+
+
+def find_repeated_lines(pages: list) -> set:
+    """Return the header/footer lines repeated exactly on most pages"""
+    if len(pages) < 2:
+        return set()
+
+    counts = Counter()
+    for lines in pages:
+        counts.update({line.lower() for _, line in edge_lines(lines)})
+
+    threshold = max(2, math.ceil(len(pages) * REPEAT_RATIO))
+    return {key for key, count in counts.items() if count >= threshold}
+
+
+def compact_pages(pages: list) -> str:
+    """Remove repeated boilerplate, rulers and non-result sections.
+
+    The first occurrence of a repeated header/footer line is kept so the
+    patient banner and table headers still reach the model once.
+    """
+    pages = [normalize_lines(page) for page in pages]
+    repeated = find_repeated_lines(pages)
+
+    seen = set()
+    kept = []
+    for lines in pages:
+        edges = {i for i, _ in edge_lines(lines)}
+        skipping = False
+        for i, line in enumerate(lines):
+            if NON_RESULT_SECTION_RE.match(line):
+                skipping = True
+                continue
+            if skipping:
+                if not (is_heading(line) or is_result_line(line)):
+                    continue
+                skipping = False
+            if BOILERPLATE_LINE_RE.match(line):
+                continue
+            key = line.lower()
+            if i in edges and key in repeated:
+                if key in seen:
+                    continue
+                seen.add(key)
+            kept.append(line)
+    return "\n".join(kept)
+
+
+def trim_to_budget(text: str, max_tokens: int) -> str:
+    """Cut text at a line boundary so it fits within max_tokens"""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    cut = text.rfind("\n", 0, max_chars)
+    return text[: cut if cut > 0 else max_chars]
+
+
+def chunk_to_budget(text: str, max_tokens: int) -> list:
+    """Split text at line boundaries into chunks of at most max_tokens"""
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    chunks = []
+    current = []
+    size = 0
+    for line in text.splitlines():
+        while len(line) > max_chars:
+            if current:
+                chunks.append("\n".join(current))
+                current, size = [], 0
+            chunks.append(line[:max_chars])
+            line = line[max_chars:]
+        if current and size + len(line) + 1 > max_chars:
+            chunks.append("\n".join(current))
+            current, size = [], 0
+        current.append(line)
+        size += len(line) + 1
+    if current:
+        chunks.append("\n".join(current))
+    return chunks
+
+
+def compact_report_text(pages: list, max_tokens: int = None) -> str:
+    """Compact extracted pages and trim the result to the report token limit"""
+    if max_tokens is None:
+        max_tokens = settings.REPORT_TOKEN_LIMIT
+    return trim_to_budget(compact_pages(pages), max_tokens)
@@ -0,0 +1,162 @@
+"""Spoken report summaries synthesized as parallel segments.
+
+A summary is split at its section boundaries, and sections longer than
+TTS_SEGMENT_MAX_CHARS again between sentences. Segments are synthesized up
+to TTS_SEGMENT_CONCURRENCY at a time per summary, without hedging, and
+their MP3 audio is joined in order. Each segment's audio is cached by a
+hash of its text, so recurring pieces such as section headers and common
+recommendations are synthesized once and reused across reports.
+"""
+
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from app.core.config import settings
+from app.core.metrics import CACHE_HITS, CACHE_MISSES
+from app.services.providers import get_tts_client
+from app.services.resilience import call_provider
+
+VOICE_ID = "MF3mGyEYCl7XYWbV9V6O"  # Rachel's voice ID
+MODEL_ID = "eleven_monolingual_v1"
+SENTENCE_END_RE = re.compile(r"(?<=[.!?:])\s+")
+
+
+def synthesize_audio(text: str) -> bytes:
+    """Synthesize text with ElevenLabs and collect the MP3 bytes"""
+    audio = get_tts_client().generate(text=text, voice=VOICE_ID, model=MODEL_ID)
+
+    # Collect audio chunks
+    return b"".join(chunk for chunk in audio if chunk)
+
+
+def split_segments(sections: list, max_chars: int = None) -> list:
+    """Sections as segments, splitting any longer than max_chars between sentences"""
+    max_chars = max_chars or settings.TTS_SEGMENT_MAX_CHARS
+    segments = []
+    for section in sections:
+        section = " ".join(section.split())
+        if len(section) <= max_chars:
+            if section:
+                segments.append(section)
+            continue
+        current = ""
+        for sentence in SENTENCE_END_RE.split(section):
+            if current and len(current) + 1 + len(sentence) > max_chars:
+                segments.append(current)
+                current = sentence
+            else:
+                current = f"{current} {sentence}" if current else sentence
+        segments.append(current)
+    return segments
+
+
+def strip_id3(audio: bytes) -> bytes:
+    """Drop a leading ID3v2 tag so joined segments form one MP3 stream"""
+    if len(audio) < 10 or audio[:3] != b"ID3":
+        return audio
+    size = (audio[6] << 21) | (audio[7] << 14) | (audio[8] << 7) | audio[9]
+    footer = 10 if audio[5] & 0x10 else 0
+    return audio[10 + size + footer :]
+
+
+def segment_key(text: str) -> str:
+    """Cache key of a segment's audio for the configured provider and voice"""
+    raw = "\0".join((settings.TTS_PROVIDER, VOICE_ID, MODEL_ID, text))
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+class SegmentCache:
+    """Least recently used segment audio, bounded by total bytes"""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        with self._lock:
+            audio = self._entries.get(key)
+            if audio is not None:
+                self._entries.move_to_end(key)
+            return audio
+
+    def put(self, key: str, audio: bytes):
+        if len(audio) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.size -= len(previous)
+            self._entries[key] = audio
+            self.size += len(audio)
+            while self.size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= len(evicted)
+
+
+segment_cache = SegmentCache(settings.TTS_SEGMENT_CACHE_BYTES)
+
+# Each thread waits on one ElevenLabs call, so the pool matches the
+# provider's own and is shared by every summary being synthesized
+segment_pool = ThreadPoolExecutor(
+    max_workers=settings.PROVIDER_WORKERS.get("elevenlabs", 16),
+    thread_name_prefix="tts-segment",
+)
+
+
+def synthesize_segment(text: str) -> bytes:
+    # Segments are short and numerous; hedging them would mostly double
+    # the characters billed rather than cut the summary's latency
+    return call_provider(
+        "elevenlabs", synthesize_audio, text, hedge=False, latency_key="segment"
+    )
+
+
+def synthesize_segments(segments: list) -> bytes:
+    """Synthesize segments concurrently, reusing cached audio, joined in order.
+
+    The first failed segment raises; segments not yet started are dropped.
+    """
+    keys = [segment_key(segment) for segment in segments]
+    audio = {}
+    missing = {}
+    for key, segment in zip(keys, segments):
+        if key in audio or key in missing:
+            continue
+        cached = segment_cache.get(key)
+        if cached is not None:
+            CACHE_HITS.inc(cache="tts_segment")
+            audio[key] = cached
+        else:
+            CACHE_MISSES.inc(cache="tts_segment")
+            missing[key] = segment
+
+    todo = list(missing.items())
+    running = {}
+    try:
+        while todo or running:
+            while todo and len(running) < settings.TTS_SEGMENT_CONCURRENCY:
+                key, text = todo.pop(0)
+                running[segment_pool.submit(synthesize_segment, text)] = key
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                key = running.pop(future)
+                audio[key] = future.result()
+                segment_cache.put(key, audio[key])
+    finally:
+        for future in running:
+            future.cancel()
+
+    return b"".join(
+        audio[key] if position == 0 else strip_id3(audio[key])
+        for position, key in enumerate(keys)
+    )
+
+
+def synthesize_summary(sections: list) -> bytes:
+    """One MP3 of the summary sections, synthesized as parallel segments"""
+    return synthesize_segments(split_segments(sections))
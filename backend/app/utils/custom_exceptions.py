@@ -0,0 +1,16 @@
+class ProviderUnavailableError(Exception):
+    """An external provider (Gemini, ElevenLabs) failed or its circuit is open"""
+
+    def __init__(self, provider: str, detail: str, retry_after: int = None):
+        super().__init__(f"{provider} is unavailable: {detail}")
+        self.provider = provider
+        self.detail = detail
+        self.retry_after = retry_after
+
+
+class UploadTooLargeError(Exception):
+    """An upload is over the configured byte or page limit"""
+
+    def __init__(self, detail: str):
+        super().__init__(detail)
+        self.detail = detail
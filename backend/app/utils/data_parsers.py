@@ -0,0 +1,64 @@
+import json
+
+
+class IncrementalJSONObjectParser:
+    """Parse a streamed JSON object one top-level member at a time.
+
+    Feed text deltas as they arrive; `feed` returns the ``(key, value)``
+    pairs whose values completed in that delta. Text before the opening
+    brace (such as a ```json fence) is ignored.
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self.position = 0
+        self.depth = 0
+        self.in_string = False
+        self.escaped = False
+        self.member_start = None
+        self.done = False
+        self.members = {}
+
+    def feed(self, delta: str) -> list:
+        self.buffer += delta
+        completed = []
+        while self.position < len(self.buffer) and not self.done:
+            char = self.buffer[self.position]
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif char == "\\":
+                    self.escaped = True
+                elif char == '"':
+                    self.in_string = False
+            elif char == '"':
+                if self.depth > 0:
+                    self.in_string = True
+            elif char in "{[":
+                self.depth += 1
+                if self.depth == 1:
+                    self.member_start = self.position + 1
+            elif char in "}]" and self.depth > 0:
+                if self.depth == 1:
+                    completed.extend(self._close_member())
+                    self.done = True
+                self.depth -= 1
+            elif char == "," and self.depth == 1:
+                completed.extend(self._close_member())
+                self.member_start = self.position + 1
+            self.position += 1
+        return completed
+
+    def _close_member(self) -> list:
+        member = self.buffer[self.member_start : self.position].strip()
+        if not member:
+            return []
+        parsed = json.loads("{" + member + "}")
+        self.members.update(parsed)
+        return list(parsed.items())
+
+    def result(self) -> dict:
+        """The fully parsed object; raises ValueError if the stream was cut short"""
+        if not self.done:
+            raise ValueError("Incomplete JSON object in model response")
+        return self.members
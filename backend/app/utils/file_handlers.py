@@ -0,0 +1,39 @@
+import io
+
+from fastapi import UploadFile
+
+from app.core.config import settings
+from app.utils.custom_exceptions import UploadTooLargeError
+
+# Allowance per file for multipart boundaries and part headers
+MULTIPART_OVERHEAD_BYTES = 16 * 1024
+
+
+def size_limit_detail(max_bytes: int) -> str:
+    return f"File is larger than the {max_bytes // (1024 * 1024)} MB limit"
+
+
+def upload_request_limit(path: str):
+    """Largest request body accepted by an upload route, or None for others"""
+    if "/reports/upload" not in path:
+        return None
+    files = settings.BATCH_UPLOAD_MAX_FILES if path.endswith("/batch") else 1
+    return files * (settings.UPLOAD_MAX_BYTES + MULTIPART_OVERHEAD_BYTES)
+
+
+def take_upload(file: UploadFile, max_bytes: int = None):
+    """Check an upload's size and take over its spooled body.
+
+    Starlette has already spooled the multipart body, in memory up to 1 MB
+    and on disk beyond, so the file is taken over instead of copied. The
+    UploadFile is left an empty buffer, so the body stays open after FastAPI
+    closes the request's uploads. The caller closes the returned file.
+    """
+    max_bytes = settings.UPLOAD_MAX_BYTES if max_bytes is None else max_bytes
+    body = file.file
+    size = file.size if file.size is not None else body.seek(0, io.SEEK_END)
+    if size > max_bytes:
+        raise UploadTooLargeError(size_limit_detail(max_bytes))
+    body.seek(0)
+    file.file = io.BytesIO()
+    return body
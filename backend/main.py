@@ -1,10 +1,51 @@
-from fastapi import FastAPI
-from app.routes.api_v1.endpoints import auth, pdf_processing, health_check, google_auth
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+from app.routes.api_v1.endpoints import auth, pdf_processing, health_check, google_auth, metrics, admin
+from app.core.config import settings
 from app.core.database import engine, Base  # Import Base and engine
+from app.core.metrics import REQUEST_SECONDS
+from app.services.population_benchmarks import population_tables
+from app.utils.file_handlers import size_limit_detail, upload_request_limit
 from fastapi.middleware.cors import CORSMiddleware
+import time
 
 app = FastAPI()
 
+
+@app.middleware("http")
+async def record_request_timing(request: Request, call_next):
+    start = time.perf_counter()
+    status_code = 500
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+        return response
+    finally:
+        # Label by route template so report IDs don't explode cardinality
+        route = request.scope.get("route")
+        REQUEST_SECONDS.observe(
+            time.perf_counter() - start,
+            method=request.method,
+            route=route.path if route else "unmatched",
+            status=status_code,
+        )
+
+
+@app.middleware("http")
+async def reject_oversized_uploads(request: Request, call_next):
+    # Refuse by Content-Length before Starlette receives and spools the body
+    limit = upload_request_limit(request.url.path)
+    length = request.headers.get("content-length")
+    if limit is not None and length and length.isdigit() and int(length) > limit:
+        return JSONResponse(
+            status_code=413,
+            content={"detail": size_limit_detail(settings.UPLOAD_MAX_BYTES)},
+        )
+    return await call_next(request)
+
+
+# Added last so it is outermost and early responses such as the 413 above
+# still carry the CORS headers the frontend needs to read them
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["http://localhost:3000"],  # Next.js dev server
@@ -21,6 +62,11 @@ async def create_tables():
         await conn.run_sync(Base.metadata.create_all)
 
 
+@app.on_event("startup")
+def load_population_tables():
+    population_tables.load()
+
+
 
 app.include_router(auth.router, prefix="/api/v1/auth", tags=["Authentication"])
 app.include_router(
@@ -28,6 +74,8 @@ app.include_router(
 )
 app.include_router(health_check.router, prefix="/api/v1", tags=["Health Check"])
 app.include_router(google_auth.router, prefix="/api/v1/auth/google", tags=["Google Auth"])
+app.include_router(metrics.router, tags=["Metrics"])
+app.include_router(admin.router, prefix="/api/v1/admin", tags=["Admin"])
 
 @app.get("/")
 def read_root():
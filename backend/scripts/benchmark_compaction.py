@@ -0,0 +1,83 @@
+"""Measure prompt compaction on a corpus of lab report PDFs.
+
+Usage (from the backend directory):
+    python -m scripts.benchmark_compaction path/to/pdfs [--live]
+    python -m scripts.benchmark_compaction --synthetic 20
+
+Reports estimated prompt tokens before and after compaction and the time
+spent compacting. With --live the raw and compacted texts are also sent to
+Gemini (GEMINI_API_KEY must be set) to record real token counts and
+analysis latency.
+"""
+
+import argparse
+import random
+import statistics
+import time
+from pathlib import Path
+
+from app.services.pdf_service import extract_pdf_pages
+from app.services.text_compaction import compact_report_text, estimate_tokens
+from scripts.fixtures import synthetic_report
+
+
+def live_analysis(text: str) -> tuple:
+    """Return Gemini's token count and analysis latency for text"""
+    import google.generativeai as genai
+
+    from app.services.ai_service import analyze_with_gemini
+
+    tokens = genai.GenerativeModel("gemini-1.5-flash").count_tokens(text)
+    start = time.perf_counter()
+    analyze_with_gemini(text)
+    return tokens.total_tokens, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("path", nargs="?", help="PDF file or directory of PDFs")
+    parser.add_argument("--synthetic", type=int, default=0, metavar="N")
+    parser.add_argument("--live", action="store_true")
+    args = parser.parse_args()
+
+    corpus = []
+    if args.path:
+        path = Path(args.path)
+        files = sorted(path.glob("*.pdf")) if path.is_dir() else [path]
+        for pdf in files:
+            with open(pdf, "rb") as f:
+                corpus.append((pdf.name, extract_pdf_pages(f)))
+    rng = random.Random(0)
+    for i in range(args.synthetic):
+        corpus.append((f"synthetic-{i}", synthetic_report(rng.randint(2, 12), rng)))
+    if not corpus:
+        parser.error("provide a path or --synthetic N")
+
+    ratios = []
+    print(
+        f"{'document':<28}{'pages':>6}{'tokens':>9}{'compact':>9}{'saved':>8}{'ms':>8}"
+    )
+    for name, pages in corpus:
+        raw = "\n".join(pages)
+        start = time.perf_counter()
+        compacted = compact_report_text(pages)
+        elapsed = (time.perf_counter() - start) * 1000
+        before, after = estimate_tokens(raw), estimate_tokens(compacted)
+        ratios.append(after / before if before else 1.0)
+        print(
+            f"{name[:27]:<28}{len(pages):>6}{before:>9}{after:>9}"
+            f"{1 - ratios[-1]:>8.0%}{elapsed:>8.2f}"
+        )
+        if args.live:
+            raw_tokens, raw_latency = live_analysis(raw)
+            new_tokens, new_latency = live_analysis(compacted)
+            print(
+                f"  gemini tokens {raw_tokens} -> {new_tokens}, "
+                f"latency {raw_latency:.2f}s -> {new_latency:.2f}s"
+            )
+
+    print(f"median token reduction: {1 - statistics.median(ratios):.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""End-to-end benchmark of the upload -> report -> diet-plan -> download flow.
+
+Runs the FastAPI app in-process against the offline provider stand-ins and
+a local SQLite database, so it needs no Gemini, ElevenLabs or Supabase
+access:
+
+    DATABASE_URL=sqlite+aiosqlite:///./bench.db LLM_PROVIDER=fake \\
+    TTS_PROVIDER=fake python -m scripts.benchmark_pipeline --sessions 50
+
+Provider latency is controlled with FAKE_LLM_LATENCY_MS and
+FAKE_TTS_LATENCY_MS. Prints p50/p95/p99 latency and throughput per stage.
+"""
+
+import argparse
+import asyncio
+import math
+import random
+import time
+
+import httpx
+
+from app.core.database import Base, engine
+from scripts.fixtures import (
+    REPORTS_PREFIX,
+    build_pdf,
+    create_benchmark_users,
+    synthetic_report,
+)
+
+STAGES = ["upload", "report", "diet_plan", "download"]
+
+
+def percentile(values: list, pct: float) -> float:
+    """Nearest-rank percentile of values"""
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+def summarize(samples: dict) -> dict:
+    """Per-stage latency percentiles (seconds) and throughput (requests/s)"""
+    results = {}
+    for stage in STAGES:
+        timings = samples[stage]
+        latencies = [end - start for start, end, ok in timings if ok]
+        span = (
+            max(end for _, end, _ in timings) - min(start for start, _, _ in timings)
+            if timings
+            else 0
+        )
+        results[stage] = {
+            "count": len(timings),
+            "errors": sum(1 for *_, ok in timings if not ok),
+            "p50": percentile(latencies, 50) if latencies else None,
+            "p95": percentile(latencies, 95) if latencies else None,
+            "p99": percentile(latencies, 99) if latencies else None,
+            "throughput": len(latencies) / span if span else 0.0,
+        }
+    return results
+
+
+async def run_session(client, token: str, pdf: bytes, index: int, samples: dict):
+    """Drive one upload -> report -> diet-plan -> download flow"""
+    headers = {"Authorization": f"Bearer {token}"}
+
+    async def timed(stage: str, method: str, url: str, **kwargs):
+        start = time.perf_counter()
+        response = await client.request(method, url, headers=headers, **kwargs)
+        ok = response.status_code == 200
+        samples[stage].append((start, time.perf_counter(), ok))
+        return response if ok else None
+
+    response = await timed(
+        "upload",
+        "POST",
+        f"{REPORTS_PREFIX}/upload",
+        files={"file": (f"report-{index}.pdf", pdf, "application/pdf")},
+    )
+    if response is None:
+        return
+    report_id = response.json()["upload_details"]["report_id"]
+    await timed("report", "GET", f"{REPORTS_PREFIX}/{report_id}")
+    await timed("diet_plan", "GET", f"{REPORTS_PREFIX}/{report_id}/diet-plan")
+    await timed("download", "GET", f"{REPORTS_PREFIX}/download-pdf/{report_id}")
+
+
+async def run_benchmark(
+    app, sessions: int = 20, concurrency: int = 10, users: int = 5, seed: int = 0
+) -> dict:
+    """Run `sessions` concurrent flows against app and return stage stats"""
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    rng = random.Random(seed)
+    tokens = await create_benchmark_users(users)
+    pdfs = [build_pdf(synthetic_report(rng.randint(2, 6), rng)) for _ in range(4)]
+    samples = {stage: [] for stage in STAGES}
+    limit = asyncio.Semaphore(concurrency)
+
+    async def bounded(index: int):
+        async with limit:
+            await run_session(
+                client, tokens[index % users], pdfs[index % len(pdfs)], index, samples
+            )
+
+    transport = httpx.ASGITransport(app=app)
+    try:
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://bench", timeout=None
+        ) as client:
+            await asyncio.gather(*[bounded(index) for index in range(sessions)])
+    finally:
+        # Connections are bound to this event loop; don't leak them to the next
+        await engine.dispose()
+    return summarize(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="LabLens upload pipeline benchmark")
+    parser.add_argument("--sessions", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--users", type=int, default=5)
+    args = parser.parse_args()
+
+    from main import app
+
+    start = time.perf_counter()
+    results = asyncio.run(
+        run_benchmark(app, args.sessions, args.concurrency, args.users)
+    )
+    elapsed = time.perf_counter() - start
+
+    print(
+        f"{'stage':<12}{'ok':>5}{'err':>5}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'req/s':>8}"
+    )
+    for stage, stats in results.items():
+        cells = [
+            f"{stats[key] * 1000:>9.1f}" if stats[key] is not None else f"{'-':>9}"
+            for key in ("p50", "p95", "p99")
+        ]
+        print(
+            f"{stage:<12}{stats['count'] - stats['errors']:>5}{stats['errors']:>5}"
+            + "".join(cells)
+            + f"{stats['throughput']:>8.2f}"
+        )
+    print(f"total {elapsed:.2f}s for {args.sessions} sessions")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,279 @@
+"""Build the bundled population-benchmark tables from reference distributions.
+
+Usage (from the backend directory):
+    python -m scripts.build_population_tables [--out app/data/population_benchmarks]
+
+Each analyte is described by a normal (or log-normal, for right-skewed
+analytes) distribution per age band and sex, hand-fitted to published adult
+reference intervals rather than estimated from survey microdata, so the
+rankings are approximate. The script writes:
+
+    index.json      analyte names, aliases, units, age bands and sexes, and
+                    per analyte the parameter source and the parameters used
+    quantiles.npy   float32 [analyte, age band, sex, level] percentile values
+    moments.npy     float32 [analyte, age band, sex, (mean, sd)] in the
+                    distribution's own scale (log scale for log-normal)
+
+The "all" age band and sex slots hold the averaged parameters and are used
+when a report does not state the patient's age or sex. Swapping in
+empirical percentiles only requires writing quantiles.npy and moments.npy
+with the same layout.
+"""
+
+import argparse
+import json
+import math
+from pathlib import Path
+from statistics import NormalDist
+
+import numpy as np
+
+from app.services.population_benchmarks import DEFAULT_TABLES_DIR
+
+AGE_BANDS = [(18, 29), (30, 39), (40, 49), (50, 59), (60, 69), (70, None)]
+SEXES = ["female", "male"]
+LEVELS = [0.1] + list(range(1, 100)) + [99.9]
+
+# Where the parameters of an analyte without its own "source" come from
+MODELLED_SOURCE = (
+    "Approximation: distribution hand-fitted to published adult reference "
+    "intervals, not estimated from population survey data"
+)
+
+# name -> unit, unit conversions to it, aliases, scale, optional source and
+# approximate flag, then per-sex (means per age band, sd). Log-normal means
+# are geometric means and their sd is on the natural-log scale.
+ANALYTES = {
+    "Hemoglobin": {
+        "unit": "g/dL",
+        "units": {"g/dl": 1.0, "g/l": 0.1, "gm/dl": 1.0, "gm%": 1.0},
+        "aliases": ["haemoglobin", "hb", "hgb"],
+        "female": ([13.5, 13.5, 13.4, 13.5, 13.6, 13.4], 1.1),
+        "male": ([15.2, 15.1, 15.0, 14.8, 14.5, 14.1], 1.2),
+    },
+    "Hematocrit": {
+        "unit": "%",
+        "units": {"%": 1.0},
+        "aliases": ["haematocrit", "hct", "pcv", "packed cell volume"],
+        "female": ([40.0, 40.0, 40.0, 40.5, 41.0, 40.5], 3.2),
+        "male": ([45.0, 45.0, 44.5, 44.0, 43.5, 42.5], 3.4),
+    },
+    "White Blood Cell Count": {
+        "unit": "10^3/uL",
+        "units": {
+            "10^3/ul": 1.0,
+            "x10^3/ul": 1.0,
+            "10^9/l": 1.0,
+            "x10^9/l": 1.0,
+            "k/ul": 1.0,
+            "cells/ul": 0.001,
+            "cells/cumm": 0.001,
+            "/cumm": 0.001,
+        },
+        "aliases": [
+            "wbc",
+            "wbc count",
+            "total leukocyte count",
+            "total leucocyte count",
+            "tlc",
+            "leukocytes",
+        ],
+        "scale": "log",
+        "female": ([7.0, 7.0, 6.9, 6.8, 6.6, 6.5], 0.27),
+        "male": ([6.9, 6.9, 6.8, 6.7, 6.6, 6.6], 0.27),
+    },
+    "Platelet Count": {
+        "unit": "10^3/uL",
+        "units": {
+            "10^3/ul": 1.0,
+            "x10^3/ul": 1.0,
+            "10^9/l": 1.0,
+            "x10^9/l": 1.0,
+            "k/ul": 1.0,
+            "lakhs/ul": 100.0,
+            "lakh/cumm": 100.0,
+            "lakhs/cumm": 100.0,
+        },
+        "aliases": ["platelets", "plt"],
+        "female": ([270, 268, 265, 262, 255, 245], 60),
+        "male": ([240, 238, 235, 230, 222, 210], 55),
+    },
+    "Fasting Glucose": {
+        "unit": "mg/dL",
+        "units": {"mg/dl": 1.0, "mmol/l": 18.016},
+        # No bare "glucose": a random glucose is not a fasting one
+        "aliases": [
+            "fasting blood sugar",
+            "fbs",
+            "fasting plasma glucose",
+            "blood glucose fasting",
+        ],
+        "female": ([88, 91, 94, 97, 99, 100], 10),
+        "male": ([91, 94, 97, 100, 102, 103], 11),
+    },
+    "HbA1c": {
+        "unit": "%",
+        "units": {"%": 1.0},
+        "aliases": [
+            "hemoglobin a1c",
+            "glycated hemoglobin",
+            "glycosylated hemoglobin",
+            "a1c",
+        ],
+        "female": ([5.2, 5.3, 5.4, 5.6, 5.7, 5.8], 0.4),
+        "male": ([5.2, 5.3, 5.5, 5.6, 5.7, 5.8], 0.45),
+    },
+    "Total Cholesterol": {
+        "unit": "mg/dL",
+        "units": {"mg/dl": 1.0, "mmol/l": 38.67},
+        "aliases": ["cholesterol", "serum cholesterol", "cholesterol total"],
+        "female": ([180, 188, 200, 215, 218, 212], 36),
+        "male": ([182, 195, 203, 202, 195, 180], 38),
+    },
+    "LDL Cholesterol": {
+        "unit": "mg/dL",
+        "units": {"mg/dl": 1.0, "mmol/l": 38.67},
+        "aliases": [
+            "ldl",
+            "ldl c",
+            "low density lipoprotein",
+            "ldl cholesterol direct",
+        ],
+        "female": ([104, 110, 120, 132, 132, 125], 32),
+        "male": ([110, 122, 128, 126, 118, 105], 34),
+    },
+    "HDL Cholesterol": {
+        "unit": "mg/dL",
+        "units": {"mg/dl": 1.0, "mmol/l": 38.67},
+        "aliases": ["hdl", "hdl c", "high density lipoprotein"],
+        "female": ([58, 59, 60, 62, 63, 63], 15),
+        "male": ([46, 46, 47, 48, 49, 50], 12),
+    },
+    "Triglycerides": {
+        "unit": "mg/dL",
+        "units": {"mg/dl": 1.0, "mmol/l": 88.57},
+        "aliases": ["triglyceride", "tg", "serum triglycerides"],
+        "scale": "log",
+        "female": ([85, 90, 100, 115, 120, 118], 0.5),
+        "male": ([100, 120, 130, 130, 120, 110], 0.5),
+    },
+    "Creatinine": {
+        "unit": "mg/dL",
+        "units": {"mg/dl": 1.0, "umol/l": 0.0113, "µmol/l": 0.0113},
+        "aliases": ["serum creatinine", "creatinine serum"],
+        "female": ([0.75, 0.76, 0.77, 0.79, 0.82, 0.88], 0.15),
+        "male": ([0.98, 0.99, 1.0, 1.02, 1.06, 1.14], 0.18),
+    },
+    "ALT": {
+        "unit": "U/L",
+        "units": {"u/l": 1.0, "iu/l": 1.0},
+        "aliases": ["alanine aminotransferase", "sgpt", "alt sgpt", "sgpt alt"],
+        "scale": "log",
+        "female": ([17, 17, 18, 19, 18, 16], 0.45),
+        "male": ([25, 27, 26, 24, 21, 19], 0.45),
+    },
+    "TSH": {
+        "unit": "mIU/L",
+        "units": {"miu/l": 1.0, "uiu/ml": 1.0, "µiu/ml": 1.0, "miu/ml": 1000.0},
+        "aliases": ["thyroid stimulating hormone", "tsh ultrasensitive"],
+        "scale": "log",
+        "female": ([1.6, 1.6, 1.7, 1.8, 1.9, 2.1], 0.55),
+        "male": ([1.5, 1.5, 1.6, 1.7, 1.8, 2.0], 0.55),
+    },
+    "Vitamin D": {
+        "unit": "ng/mL",
+        "units": {"ng/ml": 1.0, "nmol/l": 0.4},
+        "aliases": [
+            "25 oh vitamin d",
+            "vitamin d 25 hydroxy",
+            "25 hydroxy vitamin d",
+            "vitamin d3",
+        ],
+        "female": ([24, 25, 26, 28, 30, 30], 10),
+        "male": ([24, 25, 26, 27, 28, 28], 9),
+    },
+    "Ferritin": {
+        "unit": "ng/mL",
+        "units": {"ng/ml": 1.0, "ug/l": 1.0, "µg/l": 1.0},
+        "aliases": ["serum ferritin"],
+        "scale": "log",
+        "female": ([40, 45, 55, 85, 105, 115], 0.8),
+        "male": ([130, 150, 160, 165, 160, 150], 0.7),
+    },
+}
+
+
+def band_label(low: int, high) -> str:
+    return f"{low}+" if high is None else f"{low}-{high}"
+
+
+def distribution_params(spec: dict) -> np.ndarray:
+    """[age band + all, sex + all, (mean, sd)] in the distribution's scale"""
+    log = spec.get("scale") == "log"
+    params = np.zeros((len(AGE_BANDS) + 1, len(SEXES) + 1, 2))
+    for s, sex in enumerate(SEXES):
+        means, sd = spec[sex]
+        for b, mean in enumerate(means):
+            params[b, s] = (math.log(mean) if log else mean, sd)
+    params[:-1, -1] = params[:-1, :-1].mean(axis=1)
+    params[-1] = params[:-1].mean(axis=0)
+    return params
+
+
+def build(out: Path):
+    analytes = list(ANALYTES)
+    levels = np.array(LEVELS, dtype=np.float32)
+    quantiles = np.zeros(
+        (len(analytes), len(AGE_BANDS) + 1, len(SEXES) + 1, len(levels)),
+        dtype=np.float32,
+    )
+    moments = np.zeros(quantiles.shape[:3] + (2,), dtype=np.float32)
+    z = np.array([NormalDist().inv_cdf(level / 100) for level in LEVELS])
+
+    for a, name in enumerate(analytes):
+        spec = ANALYTES[name]
+        params = distribution_params(spec)
+        moments[a] = params
+        values = params[..., :1] + params[..., 1:] * z
+        quantiles[a] = np.exp(values) if spec.get("scale") == "log" else values
+
+    index = {
+        "levels": LEVELS,
+        "age_bands": [band_label(*band) for band in AGE_BANDS] + ["all ages"],
+        "age_band_starts": [low for low, _ in AGE_BANDS],
+        "sexes": SEXES + ["all"],
+        "analytes": [
+            {
+                "name": name,
+                "unit": ANALYTES[name]["unit"],
+                "units": ANALYTES[name]["units"],
+                "aliases": ANALYTES[name]["aliases"],
+                "scale": ANALYTES[name].get("scale", "linear"),
+                "source": ANALYTES[name].get("source", MODELLED_SOURCE),
+                "approximate": ANALYTES[name].get("approximate", True),
+                "parameters": {
+                    sex: {"means": ANALYTES[name][sex][0], "sd": ANALYTES[name][sex][1]}
+                    for sex in SEXES
+                },
+            }
+            for name in analytes
+        ],
+    }
+
+    out.mkdir(parents=True, exist_ok=True)
+    np.save(out / "quantiles.npy", quantiles)
+    np.save(out / "moments.npy", moments)
+    (out / "index.json").write_text(json.dumps(index, indent=2) + "\n")
+    print(
+        f"Wrote {len(analytes)} analytes x {len(index['age_bands'])} age bands to {out}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build population benchmark tables")
+    parser.add_argument("--out", type=Path, default=DEFAULT_TABLES_DIR)
+    build(parser.parse_args().out)
+
+
+if __name__ == "__main__":
+    main()
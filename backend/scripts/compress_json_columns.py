@@ -0,0 +1,132 @@
+"""Compress the JSON stored in existing lab report and diet plan rows.
+
+Usage (from the backend directory):
+    python -m scripts.compress_json_columns [--batch-size 200] [--dry-run]
+
+Rows are walked in primary-key order in fixed-size batches, each committed
+on its own, so the migration can be interrupted and re-run: values that
+already carry the compression header are skipped. Prints the stored size
+before and after per column, and the read latency of a sample of rows
+through the ORM before and after compressing them.
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from sqlalchemy import select, text
+
+from app.core.database import AsyncSessionLocal, engine
+from app.models.diet_plan import DietPlan
+from app.models.lab_report import LabReport
+from app.models.types import HEADER, compress_json
+from app.models.user import User  # noqa: F401  (resolves relationship names)
+
+COLUMNS = {
+    "lab_reports": ["processed_data", "visualization_data"],
+    "diet_plans": ["diet_data"],
+}
+MODELS = {"lab_reports": LabReport, "diet_plans": DietPlan}
+
+
+async def sample_read_latency(model, ids: list) -> float:
+    """Median seconds to load and decode one row through the ORM"""
+    timings = []
+    async with AsyncSessionLocal() as db:
+        for row_id in ids:
+            start = time.perf_counter()
+            result = await db.execute(select(model).where(model.id == row_id))
+            result.scalars().first()
+            timings.append(time.perf_counter() - start)
+            db.expunge_all()
+    return statistics.median(timings) if timings else 0.0
+
+
+async def compress_table(table: str, batch_size: int, dry_run: bool) -> dict:
+    columns = COLUMNS[table]
+    stats = {column: {"rows": 0, "before": 0, "after": 0} for column in columns}
+    last_id = 0
+    sample_ids = []
+
+    while True:
+        async with AsyncSessionLocal() as db:
+            # Raw SQL so values are read exactly as stored, bypassing the
+            # column type's decompression
+            rows = (
+                await db.execute(
+                    text(
+                        f"SELECT id, {', '.join(columns)} FROM {table} "
+                        "WHERE id > :last_id ORDER BY id LIMIT :limit"
+                    ),
+                    {"last_id": last_id, "limit": batch_size},
+                )
+            ).all()
+            if not rows:
+                break
+
+            for row in rows:
+                updates = {}
+                for column in columns:
+                    value = getattr(row, column)
+                    if value is None:
+                        continue
+                    compressed = value
+                    if not value.startswith(HEADER):
+                        compressed = compress_json(value)
+                        if compressed != value:
+                            updates[column] = compressed
+                    stats[column]["rows"] += 1
+                    stats[column]["before"] += len(value.encode("utf-8"))
+                    stats[column]["after"] += len(compressed.encode("utf-8"))
+
+                if updates and not dry_run:
+                    assignments = ", ".join(
+                        f"{column} = :{column}" for column in updates
+                    )
+                    await db.execute(
+                        text(f"UPDATE {table} SET {assignments} WHERE id = :id"),
+                        {**updates, "id": row.id},
+                    )
+                if updates and len(sample_ids) < 50:
+                    sample_ids.append(row.id)
+
+            await db.commit()
+            last_id = rows[-1].id
+
+    return stats, sample_ids
+
+
+async def main(batch_size: int, dry_run: bool):
+    try:
+        for table, model in MODELS.items():
+            # Pick the sample before compressing so both timings read the same rows
+            _, sample_ids = await compress_table(table, batch_size, dry_run=True)
+            before_latency = await sample_read_latency(model, sample_ids)
+            stats, _ = await compress_table(table, batch_size, dry_run)
+            after_latency = await sample_read_latency(model, sample_ids)
+
+            for column, column_stats in stats.items():
+                before, after = column_stats["before"], column_stats["after"]
+                saved = 1 - after / before if before else 0.0
+                print(
+                    f"{table}.{column}: {column_stats['rows']} rows, "
+                    f"{before / 1024:.1f} KiB -> {after / 1024:.1f} KiB ({saved:.0%} saved)"
+                )
+            if sample_ids:
+                print(
+                    f"{table} median row read: {before_latency * 1000:.2f} ms -> "
+                    f"{after_latency * 1000:.2f} ms over {len(sample_ids)} rows"
+                )
+        if dry_run:
+            print("dry run: no rows were modified")
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compress stored JSON columns")
+    parser.add_argument("--batch-size", type=int, default=200)
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+    asyncio.run(main(args.batch_size, args.dry_run))
@@ -0,0 +1,126 @@
+"""Synthetic lab reports, PDFs and users shared by the benchmarks and tests.
+
+Nothing here touches a real provider: reports are generated from a fixed
+list of analytes with the headers, footers and disclaimers real lab PDFs
+carry, and users are created directly in the configured database.
+"""
+
+import random
+import uuid
+
+from app.core.database import AsyncSessionLocal
+from app.core.security import create_access_token
+from app.models.user import User
+
+REPORTS_PREFIX = "/api/v1/reports/reports"
+
+SYNTHETIC_TESTS = [
+    ("Hemoglobin", "g/dL", 12.0, 16.0),
+    ("Total Leukocyte Count", "cells/uL", 4000, 11000),
+    ("Platelet Count", "lakhs/uL", 1.5, 4.5),
+    ("Fasting Blood Sugar", "mg/dL", 70, 100),
+    ("HbA1c", "%", 4.0, 5.6),
+    ("Total Cholesterol", "mg/dL", 125, 200),
+    ("LDL Cholesterol", "mg/dL", 50, 130),
+    ("Triglycerides", "mg/dL", 40, 150),
+    ("Serum Creatinine", "mg/dL", 0.6, 1.2),
+    ("SGPT (ALT)", "U/L", 7, 56),
+    ("TSH", "uIU/mL", 0.4, 4.0),
+    ("Vitamin D (25-OH)", "ng/mL", 30, 100),
+]
+
+
+def synthetic_report(pages: int, rng: random.Random) -> list:
+    """Build a multi-page report with the boilerplate real lab PDFs carry"""
+    header = [
+        "CITY DIAGNOSTICS & PATHOLOGY LABORATORY",
+        "NABL Accredited | 24x7 Helpline 1800-000-0000 | www.example-lab.test",
+        "Patient Name : Jane Doe    Age/Sex : 42 Y / F    Patient ID : PX-10234",
+        "Collected : 12/03/2025 08:15    Reported : 12/03/2025 14:40",
+        "-" * 90,
+        "Test Name                 Result      Unit        Reference Range",
+    ]
+    footer = [
+        "=" * 90,
+        "This is a computer generated report and does not require a signature.",
+        "Disclaimer",
+        "Results relate only to the sample received. Values must be correlated",
+        "clinically. The laboratory is not liable for interpretation of results",
+        "by anyone other than a registered medical practitioner.",
+    ]
+    report = []
+    for page in range(1, pages + 1):
+        body = []
+        for name, unit, low, high in rng.sample(SYNTHETIC_TESTS, 6):
+            value = round(rng.uniform(low * 0.7, high * 1.3), 1)
+            body.append(f"{name:<26}{value:<12}{unit:<12}{low} - {high}")
+        report.append("\n".join(header + body + footer + [f"Page {page} of {pages}"]))
+    return report
+
+
+def build_pdf(pages: list) -> bytes:
+    """Build a minimal text-only PDF with one page per entry in pages"""
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # Page tree, filled in once the page objects are numbered
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    kids = []
+    for text in pages:
+        lines = []
+        for line in text.splitlines():
+            escaped = line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+            lines.append(f"({escaped}) Tj T*")
+        stream = "BT /F1 9 Tf 11 TL 40 760 Td " + " ".join(lines) + " ET"
+        stream = stream.encode("latin-1", "replace")
+        objects.append(
+            b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream)
+        )
+        kids.append(len(objects) + 1)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>"
+            % (len(objects))
+        )
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (
+        b" ".join(b"%d 0 R" % kid for kid in kids),
+        len(kids),
+    )
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        out += b"%010d 00000 n \n" % offset
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (
+        len(objects) + 1,
+        xref,
+    )
+    return bytes(out)
+
+
+async def create_users(count: int) -> list:
+    """Create verified users directly in the database"""
+    async with AsyncSessionLocal() as db:
+        users = []
+        for _ in range(count):
+            name = f"bench-{uuid.uuid4().hex[:12]}"
+            users.append(
+                User(username=name, email=f"{name}@bench.local", is_verified=True)
+            )
+        db.add_all(users)
+        await db.commit()
+        return users
+
+
+def bearer_token(user: User) -> str:
+    return create_access_token({"sub": str(user.id)})
+
+
+async def create_benchmark_users(count: int) -> list:
+    """Create users directly in the database and return bearer tokens"""
+    return [bearer_token(user) for user in await create_users(count)]
@@ -0,0 +1,48 @@
+"""Recompute the analytics rollup tables from every stored lab report.
+
+Usage (from the backend directory):
+    python -m scripts.rebuild_rollups [--batch-size 500] [--workers 4]
+
+Uploads keep the rollups current on their own; run this after changing how
+contributions are computed, or to repair drift. Reports are read and parsed
+in id batches, `--workers` at a time, and the rollups are swapped in one
+transaction. That transaction locks the rollups first, so uploads made
+while it runs wait for it and are not lost; safe to run against a live
+deployment, at the cost of pausing uploads for the duration.
+"""
+
+import argparse
+import asyncio
+import time
+
+from app.core.database import Base, engine
+from app.models.user import User  # noqa: F401  (resolves relationship names)
+from app.services.analytics import rebuild_rollups
+
+
+async def run(batch_size: int, workers: int) -> dict:
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    try:
+        return await rebuild_rollups(batch_size, workers)
+    finally:
+        await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild analytics rollups")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    counts = asyncio.run(run(args.batch_size, args.workers))
+    print(
+        f"Rebuilt rollups from {counts['reports']} reports: {counts['analytes']} analytes, "
+        f"{counts['weeks']} weeks, {counts['users']} users "
+        f"in {time.perf_counter() - start:.2f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
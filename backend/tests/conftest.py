@@ -0,0 +1,157 @@
+import asyncio
+import os
+import random
+import re
+import tempfile
+from types import SimpleNamespace
+
+# Point the app at the offline benchmark profile before anything imports
+# app.core.config: a throwaway SQLite database and the fake providers.
+_db_dir = tempfile.mkdtemp(prefix="lablens-tests-")
+os.environ.setdefault(
+    "DATABASE_URL", f"sqlite+aiosqlite:///{os.path.join(_db_dir, 'test.db')}"
+)
+os.environ.setdefault("LLM_PROVIDER", "fake")
+os.environ.setdefault("TTS_PROVIDER", "fake")
+
+import pytest
+
+from app.core.config import settings
+from scripts import fixtures
+
+
+@pytest.fixture
+def fake_providers(monkeypatch):
+    """Fast fake Gemini/ElevenLabs latencies; tests may override per call"""
+    monkeypatch.setattr(settings, "LLM_PROVIDER", "fake")
+    monkeypatch.setattr(settings, "TTS_PROVIDER", "fake")
+    monkeypatch.setattr(settings, "FAKE_LLM_LATENCY_MS", 20.0)
+    monkeypatch.setattr(settings, "FAKE_TTS_LATENCY_MS", 20.0)
+    monkeypatch.setattr(settings, "FAKE_LLM_PAYLOADS", {})
+    return settings
+
+
+@pytest.fixture
+def app():
+    from main import app
+
+    return app
+
+
+@pytest.fixture
+def pipeline_benchmark(app, fake_providers):
+    """Run the end-to-end upload pipeline benchmark against the local profile"""
+    import asyncio
+
+    from scripts.benchmark_pipeline import run_benchmark
+
+    def run(**kwargs):
+        return asyncio.run(run_benchmark(app, **kwargs))
+
+    return run
+
+
+@pytest.fixture
+def metric_value():
+    """Sum of the /metrics samples named `name` whose labels match `labels`"""
+    from app.core.metrics import render_metrics
+
+    def read(name: str, **labels) -> float:
+        total = 0.0
+        for line in render_metrics().splitlines():
+            if line.startswith("#") or not line:
+                continue
+            sample, value = line.rsplit(" ", 1)
+            sample_name, _, rendered = sample.partition("{")
+            found = dict(re.findall(r'(\w+)="([^"]*)"', rendered))
+            if sample_name == name and all(
+                found.get(label) == str(wanted) for label, wanted in labels.items()
+            ):
+                total += float(value)
+        return total
+
+    return read
+
+
+@pytest.fixture
+def reports_prefix():
+    return fixtures.REPORTS_PREFIX
+
+
+@pytest.fixture
+def synthetic_report():
+    """Build a synthetic report: `synthetic_report(pages, seed=0)` -> page texts"""
+
+    def build(pages: int, seed: int = 0) -> list:
+        return fixtures.synthetic_report(pages, random.Random(seed))
+
+    return build
+
+
+@pytest.fixture
+def build_pdf():
+    """Build a text-only PDF from a list of page texts"""
+    return fixtures.build_pdf
+
+
+@pytest.fixture
+def report_pdf(synthetic_report, build_pdf):
+    """PDF of a synthetic report: `report_pdf(pages, seed=0)` -> bytes"""
+
+    def build(pages: int, seed: int = 0) -> bytes:
+        return build_pdf(synthetic_report(pages, seed))
+
+    return build
+
+
+@pytest.fixture
+def run_with_db():
+    """Run `scenario()` on a fresh event loop with the tables created.
+
+    The engine is disposed afterwards, so no pooled connection outlives the
+    loop it was opened on.
+    """
+    from app.core.database import Base, engine
+
+    def run(scenario):
+        async def main():
+            try:
+                async with engine.begin() as conn:
+                    await conn.run_sync(Base.metadata.create_all)
+                return await scenario()
+            finally:
+                await engine.dispose()
+
+        return asyncio.run(main())
+
+    return run
+
+
+@pytest.fixture
+def run_app(app, run_with_db):
+    """Run `scenario(client, *users)` against the app with `users` new accounts.
+
+    `client` is an httpx client bound to the app in-process; each user has
+    the account's `id` and the `headers` authenticating as it.
+    """
+    import httpx
+
+    def run(scenario, users: int = 0):
+        async def with_client():
+            accounts = [
+                SimpleNamespace(
+                    id=user.id,
+                    email=user.email,
+                    headers={"Authorization": f"Bearer {fixtures.bearer_token(user)}"},
+                )
+                for user in await fixtures.create_users(users)
+            ]
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(
+                transport=transport, base_url="http://t", timeout=30
+            ) as client:
+                return await scenario(client, *accounts)
+
+        return run_with_db(with_client)
+
+    return run
@@ -0,0 +1,87 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from app.core.admission import AdmissionController
+
+
+def make_controller(**overrides):
+    options = dict(
+        max_concurrent=1,
+        max_per_user=2,
+        max_queue=2,
+        queue_timeout=1.0,
+        retry_after=5,
+    )
+    options.update(overrides)
+    return AdmissionController(**options)
+
+
+def test_queued_requests_are_admitted_smallest_first():
+    async def scenario():
+        controller = make_controller(max_per_user=5, max_queue=5)
+        order = []
+
+        async def request(user_id, priority):
+            async with controller.slot(user_id, priority):
+                order.append(priority)
+                await asyncio.sleep(0.01)
+
+        await controller.acquire(user_id=0)
+        waiters = [
+            asyncio.create_task(request(1, 300)),
+            asyncio.create_task(request(2, 10)),
+            asyncio.create_task(request(3, 50)),
+        ]
+        await asyncio.sleep(0)
+        controller.release(user_id=0)
+        await asyncio.gather(*waiters)
+        return order, controller.in_flight, controller.queued
+
+    order, in_flight, queued = asyncio.run(scenario())
+    assert order == [10, 50, 300]
+    assert (in_flight, queued) == (0, 0)
+
+
+def test_full_queue_is_rejected_with_retry_after():
+    async def scenario():
+        controller = make_controller()
+        await controller.acquire(user_id=1)
+        queued = [asyncio.create_task(controller.acquire(user_id=n)) for n in (2, 3)]
+        await asyncio.sleep(0)
+        with pytest.raises(HTTPException) as rejected:
+            await controller.acquire(user_id=4)
+        for task in queued:
+            task.cancel()
+        return rejected.value
+
+    error = asyncio.run(scenario())
+    assert error.status_code == 503
+    assert int(error.headers["Retry-After"]) >= 5
+
+
+def test_user_over_limit_gets_429():
+    async def scenario():
+        controller = make_controller(max_concurrent=5, max_per_user=1)
+        await controller.acquire(user_id=1)
+        with pytest.raises(HTTPException) as rejected:
+            await controller.acquire(user_id=1)
+        return rejected.value
+
+    assert asyncio.run(scenario()).status_code == 429
+
+
+def test_queue_deadline_expires_and_frees_the_user():
+    async def scenario():
+        controller = make_controller(queue_timeout=0.05)
+        await controller.acquire(user_id=1)
+        with pytest.raises(HTTPException) as rejected:
+            await controller.acquire(user_id=2)
+        controller.release(user_id=1)
+        await controller.acquire(user_id=2)
+        return rejected.value, controller.in_flight
+
+    error, in_flight = asyncio.run(scenario())
+    assert error.status_code == 503
+    assert in_flight == 1
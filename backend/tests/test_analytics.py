@@ -0,0 +1,98 @@
+import asyncio
+import time
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal, Base
+from app.models.user import User
+from app.routes.api_v1.endpoints.pdf_processing import save_report
+from app.services.analytics import read_stats, rebuild_rollups
+
+ANEMIA = {
+    "patient": {"age": "42", "gender": "Female"},
+    "abnormal_results": [
+        {"test_name": "Hb", "result": "10.8 g/dL"},
+        {"test_name": "LDL Cholesterol", "result": "162 mg/dL"},
+    ],
+    "red_flags": ["Low hemoglobin"],
+}
+LIPIDS = {
+    "patient": {"age": "42", "gender": "Female"},
+    "abnormal_results": [{"test_name": "LDL-C", "result": "170 mg/dL"}],
+    "red_flags": [],
+}
+
+
+def test_rollups_apply_deltas_and_match_a_rebuild(run_app, monkeypatch):
+    async def scenario(client, admin):
+        async with AsyncSessionLocal() as db:
+            # Rollups are platform-wide; start from an empty history
+            for table in reversed(Base.metadata.sorted_tables):
+                if table.name != "users":
+                    await db.execute(table.delete())
+            await db.commit()
+
+            await save_report(db, admin.id, "a.pdf", ANEMIA, {})
+            await save_report(db, admin.id, "b.pdf", ANEMIA, {})
+            # Overwrite: b.pdf's anemia findings are replaced, not added to
+            await save_report(db, admin.id, "b.pdf", LIPIDS, {})
+            incremental = await read_stats(db)
+
+        rebuilt_counts = await rebuild_rollups(batch_size=1, workers=2)
+        async with AsyncSessionLocal() as db:
+            rebuilt = await read_stats(db)
+
+        monkeypatch.setattr(settings, "ADMIN_EMAILS", [admin.email])
+        allowed = await client.get("/api/v1/admin/stats", headers=admin.headers)
+        monkeypatch.setattr(settings, "ADMIN_EMAILS", [])
+        denied = await client.get("/api/v1/admin/stats", headers=admin.headers)
+        return incremental, rebuilt_counts, rebuilt, allowed, denied
+
+    incremental, rebuilt_counts, rebuilt, allowed, denied = run_app(scenario, users=1)
+
+    assert incremental["top_abnormal_analytes"] == [
+        {"analyte": "LDL Cholesterol", "abnormal_reports": 2},
+        {"analyte": "Hemoglobin", "abnormal_reports": 1},
+    ]
+    (week,) = incremental["red_flag_rate_by_week"]
+    assert (week["reports"], week["red_flag_reports"]) == (2, 1)
+    assert incremental["uploads_by_user"][0]["uploads"] == 3
+    assert incremental["uploads_by_user"][0]["reports"] == 2
+
+    assert rebuilt_counts["reports"] == 2
+    assert rebuilt == incremental
+    assert allowed.status_code == 200 and allowed.json() == incremental
+    assert denied.status_code == 403
+
+
+def test_upload_during_a_rebuild_is_not_lost(run_with_db, monkeypatch):
+    from app.services import analytics
+
+    def slow_contributions(rows):
+        time.sleep(0.3)
+        return parse(rows)
+
+    parse = analytics._batch_contributions
+    monkeypatch.setattr(analytics, "_batch_contributions", slow_contributions)
+
+    async def scenario():
+        async with AsyncSessionLocal() as db:
+            user = User(username="rollup-racer", email="racer@rollup.test")
+            db.add(user)
+            await db.commit()
+            await save_report(db, user.id, "first.pdf", ANEMIA, {})
+
+        async def upload_midway():
+            await asyncio.sleep(0.1)
+            async with AsyncSessionLocal() as db:
+                await save_report(db, user.id, "second.pdf", LIPIDS, {})
+
+        await asyncio.gather(rebuild_rollups(batch_size=1), upload_midway())
+        async with AsyncSessionLocal() as db:
+            after_race = await read_stats(db)
+        await rebuild_rollups()
+        async with AsyncSessionLocal() as db:
+            quiescent = await read_stats(db)
+        return after_race, quiescent
+
+    after_race, quiescent = run_with_db(scenario)
+    assert after_race == quiescent
@@ -0,0 +1,104 @@
+import asyncio
+import json
+
+from app.core.admission import admission
+from app.core.config import settings
+from app.routes.api_v1.endpoints import pdf_processing
+from app.services.providers import FAKE_PAYLOADS
+
+
+def test_batch_reports_every_file_by_index_including_duplicate_names(
+    run_app, fake_providers, monkeypatch, reports_prefix, build_pdf, report_pdf
+):
+    # No speculative diet plans outliving the test's event loop
+    monkeypatch.setattr(settings, "DIET_PRECOMPUTE_ENABLED", False)
+    first = report_pdf(2, 1)
+    second = report_pdf(2, 2)
+    memo = build_pdf([f"Quarterly sales memo, section {i}" for i in range(2)])
+
+    async def scenario(client, user):
+        response = await client.post(
+            f"{reports_prefix}/upload/batch",
+            files=[
+                ("files", ("same.pdf", first, "application/pdf")),
+                ("files", ("memo.pdf", memo, "application/pdf")),
+                ("files", ("same.pdf", second, "application/pdf")),
+                ("files", ("notes.txt", b"hello", "text/plain")),
+            ],
+            headers=user.headers,
+        )
+        history = await client.get(f"{reports_prefix}/history", headers=user.headers)
+        return response, history
+
+    response, history = run_app(scenario, users=1)
+
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    *items, summary = lines
+    by_index = {item["index"]: item for item in items}
+    assert sorted(by_index) == [0, 1, 2, 3]
+    assert [by_index[i]["status"] for i in range(4)] == [
+        "analyzed",
+        "error",
+        "analyzed",
+        "error",
+    ]
+    assert by_index[1]["status_code"] == 400 and by_index[3]["status_code"] == 400
+
+    assert summary["status"] == "complete"
+    assert (summary["analyzed"], summary["failed"]) == (2, 2)
+    assert [report["index"] for report in summary["reports"]] == [0, 2]
+    assert len({report["report_id"] for report in summary["reports"]}) == 1
+    stored = [item["filename"] for item in history.json()["history"]]
+    assert stored.count("same.pdf") == 1
+
+
+def test_batch_over_the_admission_limit_is_refused_up_front(
+    run_app, monkeypatch, reports_prefix, report_pdf
+):
+    monkeypatch.setattr(admission, "max_per_user", 0)
+    pdf = report_pdf(2, 3)
+
+    async def scenario(client, user):
+        return await client.post(
+            f"{reports_prefix}/upload/batch",
+            files=[("files", ("a.pdf", pdf, "application/pdf"))] * 2,
+            headers=user.headers,
+        )
+
+    response = run_app(scenario, users=1)
+    assert response.status_code == 429
+    assert "retry-after" in response.headers
+
+
+def test_every_analysis_in_a_batch_holds_its_own_admission_slot(
+    run_app, fake_providers, monkeypatch, reports_prefix, report_pdf
+):
+    monkeypatch.setattr(settings, "DIET_PRECOMPUTE_ENABLED", False)
+    monkeypatch.setattr(admission, "max_per_user", 2)
+    running = []
+    seen = []
+
+    async def fake_analyze(text, pages=None):
+        running.append(text)
+        seen.append((len(running), admission.in_flight))
+        await asyncio.sleep(0.05)
+        running.remove(text)
+        return dict(FAKE_PAYLOADS["analysis"])
+
+    monkeypatch.setattr(pdf_processing, "analyze_report", fake_analyze)
+    pdfs = [report_pdf(1, seed) for seed in range(5)]
+
+    async def scenario(client, user):
+        return await client.post(
+            f"{reports_prefix}/upload/batch",
+            files=[
+                ("files", (f"{i}.pdf", pdf, "application/pdf"))
+                for i, pdf in enumerate(pdfs)
+            ],
+            headers=user.headers,
+        )
+
+    summary = json.loads(run_app(scenario, users=1).text.splitlines()[-1])
+    assert summary["analyzed"] == 5
+    assert max(concurrent for concurrent, _ in seen) == 2
+    assert all(in_flight >= concurrent for concurrent, in_flight in seen)
@@ -0,0 +1,101 @@
+import asyncio
+import time
+
+from app.core.config import settings
+from app.services import ai_service
+from app.services.ai_service import merge_chunk_analyses, split_report_sections
+from app.services.text_compaction import estimate_tokens
+
+REPORT = "\n".join(
+    [
+        "Patient Name : Jane Doe",
+        "HAEMATOLOGY",
+        "Hemoglobin 13.5 g/dL",
+        "WBC 7000 /uL",
+        "LIPID PROFILE",
+        "LDL Cholesterol 162 mg/dL",
+        "HDL Cholesterol 41 mg/dL",
+        "Triglycerides 180 mg/dL",
+        "THYROID PANEL",
+        "TSH 2.1 uIU/mL",
+    ]
+)
+
+
+def test_sections_are_split_at_headings_and_packed_within_budget():
+    chunks = split_report_sections(REPORT, max_tokens=25)
+
+    assert "\n".join(chunks) == REPORT
+    assert all(estimate_tokens(chunk) <= 25 for chunk in chunks)
+    # Each later chunk starts at a heading, and small sections share one
+    assert [chunk.splitlines()[0] for chunk in chunks[1:]] == [
+        "LIPID PROFILE",
+        "THYROID PANEL",
+    ]
+    assert "HAEMATOLOGY" in chunks[0]
+
+
+def test_merge_drops_repeats_across_chunks_but_keeps_other_categories():
+    merged = merge_chunk_analyses(
+        [
+            {
+                "abnormal_results": [{"test_name": "LDL", "result": "162 mg/dL"}],
+                "red_flags": ["Very high LDL"],
+                "recommendations": {"lifestyle_changes": ["Walk daily"]},
+            },
+            {
+                "abnormal_results": [
+                    {"test_name": " ldl ", "result": "162  MG/DL"},
+                    {"test_name": "LDL", "result": "170 mg/dL"},
+                ],
+                "red_flags": ["very high  ldl"],
+                "recommendations": {
+                    "lifestyle_changes": ["walk daily"],
+                    "follow_up_tests": ["Walk daily"],
+                },
+            },
+        ]
+    )
+
+    assert merged["abnormal_results"] == [
+        {"test_name": "LDL", "result": "162 mg/dL"},
+        {"test_name": "LDL", "result": "170 mg/dL"},
+    ]
+    assert merged["red_flags"] == ["Very high LDL"]
+    assert merged["recommendations"]["lifestyle_changes"] == ["Walk daily"]
+    assert merged["recommendations"]["follow_up_tests"] == ["Walk daily"]
+
+
+def test_first_meaningful_patient_field_wins():
+    merged = merge_chunk_analyses(
+        [
+            {"patient": {"name": "Unknown", "age": "", "gender": "Female"}},
+            {"patient": {"name": "Jane Doe", "age": "N/A", "gender": "Male"}},
+            {"patient": {"name": "J. Doe", "age": "42"}},
+        ]
+    )
+
+    assert merged["patient"] == {"name": "Jane Doe", "age": "42", "gender": "Female"}
+
+
+def test_merged_results_follow_chunk_order_not_completion_order(monkeypatch):
+    monkeypatch.setattr(settings, "PROMPT_TOKEN_BUDGET", 10)
+    monkeypatch.setattr(settings, "ANALYSIS_CHUNK_TOKENS", 25)
+    finished = []
+
+    def fake_chunk(text, part, total, route=None):
+        # Later parts finish first
+        time.sleep(0.02 * (total - part))
+        finished.append(part)
+        return {"abnormal_results": [{"test_name": f"part {part}", "result": "1"}]}
+
+    monkeypatch.setattr(ai_service, "analyze_chunk", fake_chunk)
+
+    merged = asyncio.run(ai_service.analyze_report(REPORT))
+
+    assert finished == [3, 2, 1]
+    assert [result["test_name"] for result in merged["abnormal_results"]] == [
+        "part 1",
+        "part 2",
+        "part 3",
+    ]
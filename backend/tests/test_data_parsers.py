@@ -0,0 +1,35 @@
+import json
+
+import pytest
+
+from app.utils.data_parsers import IncrementalJSONObjectParser
+
+
+def test_sections_are_emitted_as_soon_as_they_complete():
+    analysis = {
+        "patient": {"name": 'Jane "JD" Doe', "age": "42"},
+        "abnormal_results": [{"test_name": "LDL, direct", "result": "162 {mg/dL}"}],
+        "red_flags": ["Low hemoglobin"],
+    }
+    text = "```json\n" + json.dumps(analysis, indent=2) + "\n```"
+    parser = IncrementalJSONObjectParser()
+
+    emitted = []
+    for offset in range(0, len(text), 5):
+        emitted.extend(key for key, _ in parser.feed(text[offset : offset + 5]))
+        if offset + 5 < text.index("red_flags"):
+            # Sections are available before the rest has streamed in
+            assert "red_flags" not in emitted
+        if offset > text.index("abnormal_results"):
+            assert "patient" in emitted
+
+    assert emitted == ["patient", "abnormal_results", "red_flags"]
+    assert parser.result() == analysis
+
+
+def test_truncated_stream_is_rejected():
+    parser = IncrementalJSONObjectParser()
+    parser.feed('{"patient": {"name": "Jane"}, "red_flags": ["Lo')
+
+    with pytest.raises(ValueError):
+        parser.result()
@@ -0,0 +1,101 @@
+import asyncio
+
+from app.services.delta_analysis import (
+    delta_outcome,
+    diff_report_text,
+    drop_stale_findings,
+    is_small_change,
+    reanalyze_delta,
+)
+
+PREAMBLE = "Patient Name : Jane Doe Age/Sex : 42 Y / F\nCollected : 12/03/2025"
+HAEMATOLOGY = "HAEMATOLOGY\nHemoglobin 10.8 g/dL 12.0 - 16.0\nPlatelet Count 2.5 lakhs/uL 1.5 - 4.5"
+LIPIDS = "LIPID PROFILE\nLDL Cholesterol 162 mg/dL 50 - 130\nHDL Cholesterol 52 mg/dL 40 - 60"
+THYROID = "THYROID\nTSH 2.1 mIU/L 0.4 - 4.0\nFree T4 1.2 ng/dL 0.8 - 1.8"
+KIDNEY = "KIDNEY FUNCTION\nCreatinine 0.9 mg/dL 0.6 - 1.1\nUrea 28 mg/dL 15 - 40"
+ORIGINAL = "\n".join([PREAMBLE, HAEMATOLOGY, LIPIDS, THYROID, KIDNEY])
+
+PREVIOUS = {
+    "patient": {"name": "Jane Doe", "age": "42", "gender": "Female"},
+    "abnormal_results": [
+        {"test_name": "Hemoglobin", "result": "10.8 g/dL"},
+        {"test_name": "LDL Cholesterol", "result": "162 mg/dL"},
+    ],
+    "recommendations": {"immediate_actions": ["See a physician about anemia"]},
+    "red_flags": ["Low hemoglobin", "High LDL cholesterol"],
+}
+
+
+def test_diff_isolates_changed_sections():
+    corrected = ORIGINAL.replace("Hemoglobin 10.8", "Hemoglobin 13.1")
+    diff = diff_report_text(ORIGINAL, corrected)
+
+    assert is_small_change(diff)
+    assert diff["changed"] == [HAEMATOLOGY.replace("10.8", "13.1")]
+    assert diff["stale"] == [HAEMATOLOGY]
+
+    other_patient = corrected.replace("Jane Doe", "John Roe")
+    assert not is_small_change(diff_report_text(ORIGINAL, other_patient))
+    rewritten = "\n".join([PREAMBLE, "HAEMATOLOGY\nESR 40 mm/hr 0 - 20"] * 3)
+    assert not is_small_change(diff_report_text(ORIGINAL, rewritten))
+
+
+def test_stale_findings_are_dropped_exactly():
+    previous = {
+        **PREVIOUS,
+        "abnormal_results": PREVIOUS["abnormal_results"]
+        + [{"test_name": "HbA1c", "result": "6.1 %"}],
+        "recommendations": {
+            "immediate_actions": ["See a physician about anemia"],
+            "lifestyle_changes": ["Eat more leafy greens", "Walk daily"],
+        },
+    }
+    # The model names the analyte differently when re-reading the section
+    stale = {
+        "abnormal_results": [{"test_name": "Haemoglobin (Hb)", "result": "10.8"}],
+        "recommendations": {"lifestyle_changes": ["Eat more leafy greens."]},
+    }
+
+    pruned = drop_stale_findings(previous, stale)
+
+    names = [r["test_name"] for r in pruned["abnormal_results"]]
+    assert names == ["LDL Cholesterol", "HbA1c"]
+    assert pruned["red_flags"] == ["High LDL cholesterol"]
+    assert pruned["recommendations"] == {
+        "immediate_actions": ["See a physician about anemia"],
+        "lifestyle_changes": ["Walk daily"],
+    }
+
+
+def test_reanalysis_only_calls_the_model_for_changed_sections(
+    fake_providers, metric_value
+):
+    def calls():
+        return metric_value(
+            "lablens_llm_calls_total", kind="analyze_chunk", outcome="ok"
+        )
+
+    unchanged = diff_report_text(ORIGINAL, ORIGINAL)
+    before = calls()
+    same = asyncio.run(reanalyze_delta(PREVIOUS, unchanged))
+    assert calls() == before
+    assert same["abnormal_results"] == PREVIOUS["abnormal_results"]
+    assert same["population_comparison"]["results"]
+
+    # One call re-derives the replaced section's findings, one reads the new one
+    corrected = ORIGINAL.replace("Hemoglobin 10.8", "Hemoglobin 9.9")
+    updated = asyncio.run(
+        reanalyze_delta(PREVIOUS, diff_report_text(ORIGINAL, corrected))
+    )
+    assert calls() == before + 2
+    names = [r["test_name"] for r in updated["abnormal_results"]]
+    assert names.count("LDL Cholesterol") == 1 and "Hemoglobin" in names
+
+
+def test_outcome_tells_removed_sections_from_unchanged_ones():
+    shortened = ORIGINAL.replace("\n" + THYROID, "")
+    corrected = ORIGINAL.replace("Hemoglobin 10.8", "Hemoglobin 9.9")
+
+    assert delta_outcome(diff_report_text(ORIGINAL, ORIGINAL)) == "unchanged"
+    assert delta_outcome(diff_report_text(ORIGINAL, shortened)) == "removed"
+    assert delta_outcome(diff_report_text(ORIGINAL, corrected)) == "delta"
@@ -0,0 +1,105 @@
+import asyncio
+import json
+
+from sqlalchemy import select, update
+
+from app.core.database import AsyncSessionLocal
+from app.models.diet_plan import DietPlan
+from app.models.lab_report import LabReport
+from app.models.user import User
+from app.services.ai_service import diet_projection
+from app.services.diet_precompute import SpeculativeDietLane
+
+ANALYSIS = {
+    "patient": {"name": "Jane Doe", "age": "52", "gender": "Female", "id": "P-1"},
+    "abnormal_results": [
+        {
+            "test_name": "LDL",
+            "result": "160 mg/dL",
+            "normal_range": "<100",
+            "interpretation": "High",
+        }
+    ],
+    "normal_results": [{"test_name": "Sodium", "result": "140 mmol/L"}],
+}
+
+
+def test_diet_projection_keeps_only_diet_inputs():
+    assert diet_projection(ANALYSIS) == {
+        "patient": {"age": "52", "gender": "Female"},
+        "abnormal_results": [
+            {"test_name": "LDL", "result": "160 mg/dL", "normal_range": "<100"}
+        ],
+    }
+
+
+async def create_report(name: str = "diet-lane") -> tuple:
+    async with AsyncSessionLocal() as db:
+        user = User(username=name, email=f"{name}@test.local")
+        db.add(user)
+        await db.flush()
+        report = LabReport(
+            user_id=user.id, filename="lane.pdf", processed_data=json.dumps(ANALYSIS)
+        )
+        db.add(report)
+        await db.commit()
+        return user.id, report.id
+
+
+async def stored_plans(report_id: int) -> list:
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            select(DietPlan).where(DietPlan.report_id == report_id)
+        )
+        return result.scalars().all()
+
+
+def test_lane_stores_plan_and_yields_to_interactive_claims(run_with_db, fake_providers):
+    async def scenario():
+        user_id, report_id = await create_report()
+        lane = SpeculativeDietLane()
+        # Claimed before the worker starts: the request generates it itself
+        lane.schedule(report_id, user_id, ANALYSIS)
+        assert lane.claim(report_id) is None
+        await asyncio.sleep(0.1)
+        assert await stored_plans(report_id) == []
+
+        lane.schedule(report_id, user_id, ANALYSIS)
+        await asyncio.sleep(0)
+        pending = lane.claim(report_id)
+        assert pending is not None
+        plan = await pending
+        assert plan["diet_recommendations"]
+        assert len(await stored_plans(report_id)) == 1
+
+    run_with_db(scenario)
+
+
+def test_job_overtaken_by_a_reupload_stores_nothing(run_with_db, fake_providers):
+    updated = {**ANALYSIS, "abnormal_results": []}
+
+    async def scenario():
+        user_id, report_id = await create_report("diet-lane-reupload")
+        lane = SpeculativeDietLane()
+        lane.schedule(report_id, user_id, ANALYSIS)
+        await asyncio.sleep(0)
+        running = lane.claim(report_id)
+        assert running is not None
+        # The report is overwritten while the old job is generating
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                update(LabReport)
+                .where(LabReport.id == report_id)
+                .values(processed_data=json.dumps(updated))
+            )
+            await db.commit()
+        lane.schedule(report_id, user_id, updated)
+
+        assert await running is None
+        await asyncio.sleep(0.2)
+        (plan,) = await stored_plans(report_id)
+        assert lane._worker is not None
+        return plan
+
+    plan = run_with_db(scenario)
+    assert plan.diet_data
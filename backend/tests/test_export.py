@@ -0,0 +1,93 @@
+import gzip
+import json
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models.diet_plan import DietPlan
+from app.models.lab_report import LabReport
+from app.services.providers import FAKE_PAYLOADS
+
+
+def test_export_streams_every_record_in_both_formats(
+    run_app, monkeypatch, reports_prefix
+):
+    monkeypatch.setattr(settings, "EXPORT_BATCH_SIZE", 2)
+
+    async def scenario(client, user):
+        async with AsyncSessionLocal() as db:
+            reports = [
+                LabReport(
+                    user_id=user.id,
+                    filename=f"export-{i}.pdf",
+                    processed_data=json.dumps(FAKE_PAYLOADS["analysis"]),
+                    visualization_data=json.dumps({}),
+                )
+                for i in range(5)
+            ]
+            db.add_all(reports)
+            await db.flush()
+            db.add(
+                DietPlan(
+                    user_id=user.id,
+                    report_id=reports[0].id,
+                    diet_data=json.dumps(FAKE_PAYLOADS["diet"]),
+                )
+            )
+            await db.commit()
+
+        plain = await client.get(f"{reports_prefix}/export", headers=user.headers)
+        packed = await client.get(
+            f"{reports_prefix}/export",
+            params={"format": "ndjson.gz"},
+            headers=user.headers,
+        )
+        return plain, packed
+
+    plain, packed = run_app(scenario, users=1)
+
+    assert plain.status_code == 200
+    assert plain.headers["content-type"] == "application/x-ndjson"
+    records = [json.loads(line) for line in plain.text.splitlines()]
+    types = [record["type"] for record in records]
+    assert types[0] == "export"
+    assert types.count("report") == 5
+    assert types.count("result") == 10
+    assert types.count("diet_plan") == 1
+    result = next(record for record in records if record["type"] == "result")
+    assert result["analyte"] == "Hemoglobin" and result["value"] == 10.8
+
+    assert packed.headers["content-type"] == "application/gzip"
+    unpacked = gzip.decompress(packed.content).decode().splitlines()
+    assert [json.loads(line)["type"] for line in unpacked] == types
+
+
+def test_unreadable_rows_become_error_records(run_app, reports_prefix):
+    async def scenario(client, user):
+        async with AsyncSessionLocal() as db:
+            broken, intact = (
+                LabReport(
+                    user_id=user.id,
+                    filename=f"{name}.pdf",
+                    processed_data=data,
+                    visualization_data=json.dumps({}),
+                )
+                for name, data in (
+                    ("broken", "{not json"),
+                    ("intact", json.dumps(FAKE_PAYLOADS["analysis"])),
+                )
+            )
+            db.add_all([broken, intact])
+            await db.flush()
+            db.add(DietPlan(user_id=user.id, report_id=intact.id, diet_data="{"))
+            await db.commit()
+        return await client.get(f"{reports_prefix}/export", headers=user.headers)
+
+    response = run_app(scenario, users=1)
+
+    assert response.status_code == 200
+    records = [json.loads(line) for line in response.text.splitlines()]
+    errors = [record for record in records if record["type"] == "error"]
+    assert [error.get("filename") for error in errors] == ["broken.pdf", None]
+    assert "diet_plan_id" in errors[1]
+    (report,) = [record for record in records if record["type"] == "report"]
+    assert report["filename"] == "intact.pdf"
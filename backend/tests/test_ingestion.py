@@ -0,0 +1,81 @@
+import io
+
+import pytest
+from starlette.datastructures import UploadFile
+
+from app.core.config import settings
+from app.services.pdf_service import PDFPageReader
+from app.utils.custom_exceptions import UploadTooLargeError
+from app.utils.file_handlers import take_upload
+
+
+@pytest.fixture
+def pdf(report_pdf):
+    return report_pdf(6)
+
+
+def test_take_upload_checks_the_size_without_copying(pdf):
+    body = io.BytesIO(pdf)
+    file = UploadFile(body, size=len(pdf))
+
+    assert take_upload(file, len(pdf)) is body
+    assert body.read() == pdf and file.file is not body
+
+    with pytest.raises(UploadTooLargeError):
+        take_upload(UploadFile(io.BytesIO(pdf)), len(pdf) - 1)
+
+
+def test_oversized_uploads_are_refused_readably_by_the_frontend(
+    run_app, monkeypatch, reports_prefix, pdf
+):
+    monkeypatch.setattr(settings, "UPLOAD_MAX_BYTES", 1024)
+
+    async def scenario(client):
+        return await client.post(
+            f"{reports_prefix}/upload",
+            files={"file": ("big.pdf", pdf + b" " * 65536, "application/pdf")},
+            headers={"Origin": "http://localhost:3000"},
+        )
+
+    response = run_app(scenario)
+    assert response.status_code == 413
+    assert response.json()["detail"].startswith("File is larger than")
+    # The browser only exposes the detail with the CORS headers present
+    assert response.headers["access-control-allow-origin"] == "http://localhost:3000"
+
+
+def test_reader_extracts_pages_lazily_and_enforces_the_page_limit(pdf):
+    with pytest.raises(UploadTooLargeError):
+        PDFPageReader(io.BytesIO(pdf), max_pages=5)
+
+    with PDFPageReader(io.BytesIO(pdf), max_pages=6) as reader:
+        leading = reader.read(2)
+        assert len(leading) == 2 and reader.page_count == 6
+        assert len(reader.read()) == 4
+        assert reader.read() == []
+
+
+def test_upload_rejects_before_extracting_the_remaining_pages(
+    run_app, monkeypatch, reports_prefix, build_pdf, pdf
+):
+    read_counts = []
+    original_read = PDFPageReader.read
+
+    def counting_read(self, count=None):
+        pages = original_read(self, count)
+        read_counts.append(len(pages))
+        return pages
+
+    monkeypatch.setattr(PDFPageReader, "read", counting_read)
+    not_a_report = build_pdf([f"Quarterly sales memo, section {i}" for i in range(8)])
+
+    async def scenario(client, user):
+        return await client.post(
+            f"{reports_prefix}/upload",
+            files={"file": ("memo.pdf", not_a_report, "application/pdf")},
+            headers=user.headers,
+        )
+
+    response = run_app(scenario, users=1)
+    assert response.status_code == 400
+    assert read_counts == [3]
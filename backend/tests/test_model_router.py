@@ -0,0 +1,83 @@
+import asyncio
+
+from app.services.ai_service import (
+    analyze_report,
+    analyze_with_gemini,
+    validate_lab_report,
+)
+from app.services.model_router import choose_route, profile_document
+from app.services.text_compaction import compact_report_text
+
+
+def profile(report: list) -> dict:
+    return profile_document(compact_report_text(report), len(report))
+
+
+def test_reports_route_by_size_and_complexity(synthetic_report):
+    small = profile(synthetic_report(1))
+    assert small["analytes"] > 0 and small["tables"] >= 1
+    assert choose_route("analyze", small)["tier"] == "fast"
+    assert choose_route("analyze", profile(synthetic_report(6)))["tier"] == "standard"
+    assert (
+        choose_route("analyze", profile(synthetic_report(40)))["tier"] == "long_context"
+    )
+    # Pinned kinds ignore the profile
+    assert choose_route("validate", profile(synthetic_report(40)))["tier"] == "fast"
+
+
+def test_policy_is_configurable(
+    fake_providers, monkeypatch, metric_value, synthetic_report
+):
+    monkeypatch.setattr(
+        fake_providers,
+        "MODEL_ROUTING_POLICY",
+        [
+            {"tier": "tiny", "model": "m-tiny", "max_analytes": 1},
+            {"tier": "big", "model": "m-big", "input_cost_per_mtok": 1e6},
+        ],
+    )
+    monkeypatch.setattr(fake_providers, "MODEL_ROUTING_PINNED", {"validate": "big"})
+    text = compact_report_text(synthetic_report(1))
+
+    def calls(kind):
+        return metric_value(
+            "lablens_model_route_calls_total", kind=kind, tier="big", model="m-big"
+        )
+
+    def cost():
+        return metric_value(
+            "lablens_model_route_cost_usd_total", kind="analyze", tier="big"
+        )
+
+    before = calls("analyze"), calls("validate"), cost()
+    analyze_with_gemini(text)
+    validate_lab_report(text)
+
+    assert calls("analyze") == before[0] + 1
+    assert calls("validate") == before[1] + 1
+    assert cost() > before[2]
+
+
+def test_chunks_of_long_reports_route_by_their_own_size(
+    fake_providers, monkeypatch, metric_value, synthetic_report
+):
+    monkeypatch.setattr(fake_providers, "PROMPT_TOKEN_BUDGET", 1000)
+    monkeypatch.setattr(fake_providers, "ANALYSIS_CHUNK_TOKENS", 400)
+    report = synthetic_report(40)
+    text = compact_report_text(report)
+    assert (
+        choose_route("analyze", profile_document(text, len(report)))["tier"]
+        == "long_context"
+    )
+
+    def chunk_calls(tier):
+        return metric_value(
+            "lablens_model_route_calls_total", kind="analyze_chunk", tier=tier
+        )
+
+    before = chunk_calls("fast"), chunk_calls("long_context")
+    analysis = asyncio.run(analyze_report(text, len(report)))
+
+    assert "error" not in analysis
+    assert chunk_calls("fast") > before[0]
+    assert chunk_calls("long_context") == before[1]
@@ -0,0 +1,23 @@
+from scripts.benchmark_pipeline import STAGES
+
+
+def test_pipeline_benchmark_completes_every_stage(pipeline_benchmark):
+    results = pipeline_benchmark(sessions=8, concurrency=4, users=2)
+
+    for stage in STAGES:
+        assert results[stage]["count"] == 8, stage
+        assert results[stage]["errors"] == 0, stage
+
+
+def test_pipeline_benchmark_latency_regression(pipeline_benchmark, fake_providers):
+    fake_providers.FAKE_LLM_LATENCY_MS = 10.0
+    fake_providers.FAKE_TTS_LATENCY_MS = 10.0
+
+    results = pipeline_benchmark(sessions=6, concurrency=3, users=2)
+
+    # Two LLM calls, one parallel TTS fan-out and a few DB round trips per
+    # upload; the bound is loose enough for slow CI but catches accidental
+    # serialisation or extra provider calls creeping into the hot path.
+    assert results["upload"]["p95"] < 2.0
+    assert results["report"]["p95"] < 1.0
+    assert results["download"]["p95"] < 1.0
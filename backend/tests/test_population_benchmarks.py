@@ -0,0 +1,66 @@
+from statistics import NormalDist
+
+import pytest
+
+from app.services.population_benchmarks import population_tables
+
+
+def test_rank_matches_reference_distribution():
+    population_tables.load()
+    ldl = population_tables.aliases["ldl cholesterol"]
+    band = population_tables.age_band("45 years")
+    sex = population_tables.sex("F")
+    mean, sd = population_tables.moments[ldl, band, sex]
+
+    values = [mean - sd, mean, mean + 2 * sd]
+    percentiles, z_scores = population_tables.rank([ldl] * 3, band, sex, values)
+
+    assert z_scores == pytest.approx([-1.0, 0.0, 2.0], abs=1e-4)
+    expected = [NormalDist().cdf(z) * 100 for z in (-1.0, 0.0, 2.0)]
+    assert percentiles == pytest.approx(expected, abs=0.2)
+
+
+def test_compare_converts_units_and_skips_unknown_results():
+    comparison = population_tables.compare(
+        {"age": "52", "gender": "Male"},
+        [
+            {"test_name": "LDL-C (direct)", "result": "5.2 mmol/L"},
+            {"test_name": "Hb", "result": "9.1", "normal_range": "13 - 17 g/dL"},
+            {"test_name": "Hemoglobin", "result": "91 mmHg"},
+            {"test_name": "Mystery marker", "result": "3.0"},
+        ],
+    )
+
+    assert comparison["benchmark"] == "Men aged 50-59 (approximate)"
+    assert comparison["approximate"] is True
+    names = [item["test_name"] for item in comparison["results"]]
+    assert names == ["LDL-C (direct)", "Hb"]
+    ldl, hb = comparison["results"]
+    assert ldl["value"] == pytest.approx(5.2 * 38.67, rel=1e-3)
+    assert ldl["percentile"] > 95 and hb["percentile"] < 1
+    assert "Hb is lower than" in comparison["commentary"]
+
+
+def test_random_glucose_is_not_ranked_as_fasting_glucose():
+    comparison = population_tables.compare(
+        {"age": "35", "gender": "F"},
+        [
+            {"test_name": "Glucose", "result": "160 mg/dL"},
+            {"test_name": "Fasting Blood Sugar", "result": "160 mg/dL"},
+        ],
+    )
+
+    assert [item["test_name"] for item in comparison["results"]] == [
+        "Fasting Blood Sugar"
+    ]
+
+
+def test_minors_are_not_ranked_against_adult_tables():
+    comparison = population_tables.compare(
+        {"age": "12 years", "gender": "F"},
+        [{"test_name": "LDL Cholesterol", "result": "162 mg/dL"}],
+    )
+
+    assert comparison["results"] == []
+    assert "paediatric" in comparison["benchmark"]
+    assert population_tables.age_band("18") == 0
@@ -0,0 +1,78 @@
+import json
+
+from sqlalchemy import event
+
+from app.core.database import AsyncSessionLocal, engine
+from app.models.diet_plan import DietPlan
+from app.models.lab_report import LabReport
+from app.services.providers import FAKE_PAYLOADS
+
+
+def test_report_reads_are_one_owner_scoped_query(run_app, reports_prefix):
+    statements = []
+
+    def count(conn, cursor, statement, *args):
+        if "lab_reports" in statement:
+            statements.append(statement)
+
+    async def scenario(client, owner, other):
+        async with AsyncSessionLocal() as db:
+            reports = [
+                LabReport(
+                    user_id=owner.id,
+                    filename=f"repo-{i}.pdf",
+                    processed_data=json.dumps(FAKE_PAYLOADS["analysis"]),
+                    visualization_data=json.dumps({}),
+                )
+                for i in range(3)
+            ]
+            db.add_all(reports)
+            await db.flush()
+            for plan in ({"plan": "old"}, {"plan": "new"}):
+                db.add(
+                    DietPlan(
+                        user_id=owner.id,
+                        report_id=reports[0].id,
+                        diet_data=json.dumps(plan),
+                    )
+                )
+            await db.commit()
+        first, second, third = (report.id for report in reports)
+
+        async def get(path, user, **params):
+            statements.clear()
+            response = await client.get(
+                f"{reports_prefix}/{path}",
+                params=params,
+                headers=user.headers,
+            )
+            return response, len(statements)
+
+        event.listen(engine.sync_engine, "before_cursor_execute", count)
+        try:
+            results = {
+                "diet": await get(f"{first}/diet-plan", owner),
+                "summary": await get(f"download-pdf/{first}", owner),
+                "foreign": await get(f"{first}", other),
+                "many": await get("history", owner, ids=[third, 0, first]),
+            }
+        finally:
+            event.remove(engine.sync_engine, "before_cursor_execute", count)
+        return results, (first, third)
+
+    results, (first, third) = run_app(scenario, users=2)
+
+    diet, queries = results["diet"]
+    assert diet.json()["diet_plan"] == {"plan": "new"}
+    assert queries == 1
+
+    summary, queries = results["summary"]
+    assert summary.json()["diet_summary"]["diet_plan"] == {"plan": "new"}
+    assert queries == 1
+
+    foreign, _ = results["foreign"]
+    assert foreign.status_code == 404
+
+    many, queries = results["many"]
+    assert [item["report_id"] for item in many.json()["history"]] == [third, first]
+    assert queries == 1
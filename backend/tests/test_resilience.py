@@ -0,0 +1,113 @@
+import time
+
+import pytest
+
+from app.routes.api_v1.endpoints.pdf_processing import generate_audio_summary
+from app.services import resilience, tts_service
+from app.services.ai_service import validate_lab_report
+from app.services.providers import FAKE_PAYLOADS
+from app.services.resilience import CircuitBreaker, Provider, call_provider
+from app.utils.custom_exceptions import ProviderUnavailableError
+
+
+@pytest.fixture
+def fresh_providers(monkeypatch, fake_providers):
+    monkeypatch.setattr(fake_providers, "CIRCUIT_FAILURE_THRESHOLD", 2)
+    monkeypatch.setattr(fake_providers, "CIRCUIT_RESET_SECONDS", 0.05)
+    monkeypatch.setattr(fake_providers, "HEDGE_MIN_SAMPLES", 5)
+    providers = {"gemini": Provider("gemini"), "elevenlabs": Provider("elevenlabs")}
+    monkeypatch.setattr(resilience, "PROVIDERS", providers)
+    # Audio cached by earlier tests would hide a TTS outage
+    monkeypatch.setattr(tts_service, "segment_cache", tts_service.SegmentCache(0))
+    return providers
+
+
+def test_breaker_opens_then_half_open_probe_closes_it():
+    breaker = CircuitBreaker("gemini", failure_threshold=2, reset_timeout=0.05)
+    breaker.record_failure()
+    breaker.record_failure()
+
+    with pytest.raises(ProviderUnavailableError):
+        breaker.before_call()
+
+    time.sleep(0.06)
+    assert breaker.allow_request()  # the single half-open probe
+    assert not breaker.allow_request()
+    breaker.record_success()
+    assert breaker.state == "closed"
+
+
+def test_failed_probe_reopens_the_circuit():
+    breaker = CircuitBreaker("gemini", failure_threshold=1, reset_timeout=0.05)
+    breaker.record_failure()
+    time.sleep(0.06)
+    breaker.before_call()
+    breaker.record_failure()
+
+    assert breaker.state == "open"
+
+
+def test_slow_call_is_hedged_past_p95(fresh_providers):
+    for _ in range(5):
+        fresh_providers["gemini"].tracker("").record(0.01)
+    calls = []
+
+    def flaky_latency():
+        calls.append(None)
+        # The first request stalls; the hedge answers quickly
+        time.sleep(1.0 if len(calls) == 1 else 0.01)
+        return len(calls)
+
+    start = time.perf_counter()
+    assert call_provider("gemini", flaky_latency) == 2
+    assert time.perf_counter() - start < 0.5
+
+
+def test_hedging_uses_the_latency_of_the_same_kind_of_call(fresh_providers):
+    for _ in range(5):
+        fresh_providers["gemini"].tracker("validate/fast").record(0.01)
+    calls = []
+
+    def slow():
+        calls.append(None)
+        time.sleep(0.2)
+        return len(calls)
+
+    # Fast validate calls say nothing about how long an analysis takes
+    assert call_provider("gemini", slow, latency_key="analyze/long_context") == 1
+    assert len(calls) == 1
+
+
+def test_no_hedge_when_the_provider_pool_is_saturated(fresh_providers, monkeypatch):
+    provider = Provider("gemini", workers=1)
+    monkeypatch.setitem(fresh_providers, "gemini", provider)
+    for _ in range(5):
+        provider.tracker("").record(0.01)
+    calls = []
+
+    def slow():
+        calls.append(None)
+        time.sleep(0.2)
+        return len(calls)
+
+    assert call_provider("gemini", slow) == 1
+    assert len(calls) == 1
+
+
+def test_validation_reports_outage_instead_of_invalid(fresh_providers):
+    fresh_providers["gemini"].breaker.record_failure()
+    fresh_providers["gemini"].breaker.record_failure()
+
+    with pytest.raises(ProviderUnavailableError):
+        validate_lab_report("Patient test results")
+
+
+def test_upload_audio_is_skipped_during_tts_outage(fresh_providers, monkeypatch):
+    monkeypatch.setattr(fresh_providers["elevenlabs"].breaker, "failure_threshold", 1)
+    monkeypatch.setattr(resilience.settings, "FAKE_TTS_FAILURE_RATE", 1.0)
+
+    first = generate_audio_summary(FAKE_PAYLOADS["analysis"])
+    second = generate_audio_summary(FAKE_PAYLOADS["analysis"])
+
+    assert first["skipped"] and second["skipped"]
+    assert "circuit open" in second["error"]
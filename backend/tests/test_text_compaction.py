@@ -0,0 +1,62 @@
+from app.services.text_compaction import chunk_to_budget, compact_pages
+
+HEADER = "CITY DIAGNOSTICS LABORATORY\nPatient Name : Jane Doe"
+FOOTER = "This is a computer generated report.\nPage {} of 3"
+BODY = [("Glucose", 100), ("Urea", 30), ("Calcium", 9)]
+
+
+def test_results_on_short_pages_are_never_dropped():
+    pages = ["Hemoglobin 13.5 g/dL", "Hemoglobin 9.1 g/dL\nWBC 15000 /uL"]
+
+    assert compact_pages(pages).splitlines() == [
+        "Hemoglobin 13.5 g/dL",
+        "Hemoglobin 9.1 g/dL",
+        "WBC 15000 /uL",
+    ]
+
+
+def test_exact_header_repeats_are_kept_once_and_footers_dropped():
+    pages = [
+        "\n".join(
+            [HEADER]
+            + [f"{name} {value + page} mg/dL" for name, value in BODY]
+            + ["-" * 20, FOOTER.format(page)]
+        )
+        for page in (1, 2, 3)
+    ]
+
+    lines = compact_pages(pages).splitlines()
+
+    assert lines[:2] == HEADER.splitlines()
+    assert lines[2:] == [
+        f"{name} {value + page} mg/dL" for page in (1, 2, 3) for name, value in BODY
+    ]
+
+
+def test_non_result_section_ends_at_next_heading_or_result():
+    page = "\n".join(
+        [
+            "Important Note: fasting sample",
+            "Please fast for ten hours before collection.",
+            "Glucose 250 mg/dL",
+            "Disclaimer",
+            "Results relate only to the sample received.",
+            "LIPID PROFILE",
+            "LDL Cholesterol 162 mg/dL",
+        ]
+    )
+
+    assert compact_pages([page]).splitlines() == [
+        "Glucose 250 mg/dL",
+        "LIPID PROFILE",
+        "LDL Cholesterol 162 mg/dL",
+    ]
+
+
+def test_chunks_split_at_line_boundaries_within_budget():
+    text = "\n".join(f"Analyte {i} {i}.0 mg/dL" for i in range(40))
+
+    chunks = chunk_to_budget(text, max_tokens=20)
+
+    assert "\n".join(chunks) == text
+    assert all(len(chunk) <= 80 for chunk in chunks)
@@ -0,0 +1,47 @@
+import threading
+import time
+
+from app.core.config import settings
+from app.services import tts_service
+
+
+def test_long_sections_split_between_sentences():
+    sections = ["Recommendations:", "One two. Three four! Five six?", "  "]
+
+    segments = tts_service.split_segments(sections, max_chars=20)
+
+    assert segments == ["Recommendations:", "One two. Three four!", "Five six?"]
+
+
+def test_segments_synthesize_concurrently_join_in_order_and_are_cached(monkeypatch):
+    # Hedging would duplicate the slow "e." call once latencies are known
+    monkeypatch.setattr(settings, "HEDGE_REQUESTS", True)
+    monkeypatch.setattr(settings, "HEDGE_MIN_SAMPLES", 1)
+    monkeypatch.setattr(settings, "TTS_SEGMENT_CONCURRENCY", 3)
+    monkeypatch.setattr(tts_service, "segment_cache", tts_service.SegmentCache(1024))
+    calls = []
+    running = []
+    peak = []
+    lock = threading.Lock()
+
+    def fake_synthesize(text):
+        with lock:
+            calls.append(text)
+            running.append(text)
+            peak.append(len(running))
+        time.sleep(0.3 if text == "e." else 0.05)
+        with lock:
+            running.remove(text)
+        # Every segment but the first carries an ID3 tag to be stripped
+        tag = b"ID3\x04\x00\x00\x00\x00\x00\x02xx"
+        return tag + text.encode()
+
+    monkeypatch.setattr(tts_service, "synthesize_audio", fake_synthesize)
+
+    first = tts_service.synthesize_segments(["a.", "b.", "c.", "d.", "a."])
+    second = tts_service.synthesize_segments(["d.", "e."])
+
+    assert first.endswith(b"a.b.c.d.a.") and first.count(b"ID3") == 1
+    assert second.endswith(b"d.e.")
+    assert sorted(calls) == ["a.", "b.", "c.", "d.", "e."]
+    assert max(peak) == 3
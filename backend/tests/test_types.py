@@ -0,0 +1,26 @@
+import json
+
+from app.models.types import HEADER, CompressedJSON, compress_json, decompress_json
+
+ANALYSIS = {
+    "abnormal_results": [
+        {"test_name": f"Test {i}", "result": "10.8 g/dL", "normal_range": "12 - 16"}
+        for i in range(20)
+    ]
+}
+
+
+def test_round_trip_compresses_large_values():
+    stored = CompressedJSON().process_bind_param(ANALYSIS, dialect=None)
+
+    assert stored.startswith(HEADER)
+    assert len(stored) < len(json.dumps(ANALYSIS))
+    loaded = CompressedJSON().process_result_value(stored, dialect=None)
+    assert json.loads(loaded) == ANALYSIS
+
+
+def test_legacy_and_small_values_pass_through():
+    legacy = json.dumps(ANALYSIS)
+
+    assert decompress_json(legacy) == legacy
+    assert compress_json('{"trends": []}') == '{"trends": []}'